@@ -0,0 +1,458 @@
+from Lexer import (
+    Module, Func,
+    Instruction, BinaryInstruction,
+    _i32_const, _i32_add, _i32_sub, _i32_mul, _i32_div_s,
+    _i32_ge_u, _i32_gt_s, _i32_lt_s, _i32_lt_u, _i32_clz,
+    _local_get, _local_set, _local_tee,
+    _global_get, _global_set,
+    _call, _return, _block, _loop, _br, _br_if, _if, _then, _else, _end,
+    _i32_load, _i32_store
+)
+from Interpreter import Interpreter, RuntimeError
+from Runtime import (
+    I32_MIN, I32_MAX, U32_MASK, wrap_i32, i32_div_s, i32_clz, parse_int,
+    host_log, HOST_FUNCTIONS,
+    immediate, label_of, block_parts, split_if, flatten,
+    local_index, global_index, function_index, find_function
+)
+from typing import List, Any, Optional
+import struct
+import Log
+
+log = Log.get_logger("Bytecode")
+
+# Opcodes, roughly ordered by how often they show up in loop bodies
+LOCAL_GET = 0
+CONST = 1
+LOCAL_SET = 2
+LOCAL_TEE = 3
+ADD = 4
+SUB = 5
+MUL = 6
+LT_S = 7
+LT_U = 8
+GT_S = 9
+GE_U = 10
+JMP_IF = 11     # pop condition, jump to arg if non-zero (br_if)
+JMP_IFNOT = 12  # pop condition, jump to arg if zero (if)
+JMP = 13
+LOAD = 14
+STORE = 15
+DIV_S = 16
+CLZ = 17
+GLOBAL_GET = 18
+GLOBAL_SET = 19
+CALL = 20       # arg: index into module.funcs
+CALL_HOST = 21  # arg: host function name
+UNWIND = 22     # arg: operand stack height to truncate to (br out of a block)
+RETURN = 23
+TRAP = 24       # arg: error message, stands in for a body that failed to compile
+
+OPCODE_NAMES = {
+    LOCAL_GET: 'local.get', CONST: 'i32.const', LOCAL_SET: 'local.set',
+    LOCAL_TEE: 'local.tee', ADD: 'i32.add', SUB: 'i32.sub', MUL: 'i32.mul',
+    LT_S: 'i32.lt_s', LT_U: 'i32.lt_u', GT_S: 'i32.gt_s', GE_U: 'i32.ge_u',
+    JMP_IF: 'jmp_if', JMP_IFNOT: 'jmp_ifnot', JMP: 'jmp',
+    LOAD: 'i32.load', STORE: 'i32.store', DIV_S: 'i32.div_s', CLZ: 'i32.clz',
+    GLOBAL_GET: 'global.get', GLOBAL_SET: 'global.set',
+    CALL: 'call', CALL_HOST: 'call_host', UNWIND: 'unwind', RETURN: 'return',
+    TRAP: 'trap',
+}
+
+BINARY_OPCODES = {
+    _i32_add: ADD,
+    _i32_sub: SUB,
+    _i32_mul: MUL,
+    _i32_div_s: DIV_S,
+    _i32_ge_u: GE_U,
+    _i32_gt_s: GT_S,
+    _i32_lt_s: LT_S,
+    _i32_lt_u: LT_U,
+}
+
+# Operand stack effect (pops, pushes) of the fixed-arity opcodes
+STACK_EFFECT = {
+    LOCAL_GET: (0, 1), CONST: (0, 1), LOCAL_SET: (1, 0), LOCAL_TEE: (1, 1),
+    ADD: (2, 1), SUB: (2, 1), MUL: (2, 1), DIV_S: (2, 1),
+    LT_S: (2, 1), LT_U: (2, 1), GT_S: (2, 1), GE_U: (2, 1), CLZ: (1, 1),
+    LOAD: (1, 1), STORE: (2, 0), GLOBAL_GET: (0, 1), GLOBAL_SET: (1, 0),
+    JMP_IF: (1, 0), JMP_IFNOT: (1, 0), JMP: (0, 0),
+}
+
+_I32 = struct.Struct('<i')
+
+class CodeObject:
+    """Flat bytecode of one function, `code[pc]` is the opcode and `args[pc]`
+    its already decoded immediate (constant, slot index, absolute jump target)"""
+
+    def __init__(self, func: Func, index: int):
+        self.func = func
+        self.index = index
+        self.name = func.name
+        self.nparams = len(func.params)
+        self.nlocals = len(func.locals)
+        self.nresults = len(func.results)
+        self.code: List[int] = []
+        self.args: List[Any] = []
+        self.max_stack = 0
+        self.loop_headers: List[int] = []
+
+    def emit(self, op: int, arg: Any = None) -> int:
+        self.code.append(op)
+        self.args.append(arg)
+        return len(self.code) - 1
+
+    def disassemble(self) -> str:
+        lines = [f"{self.name} (params={self.nparams}, locals={self.nlocals}, "
+                 f"results={self.nresults}, max_stack={self.max_stack})"]
+        for pc, (op, arg) in enumerate(zip(self.code, self.args)):
+            marker = ">" if pc in self.loop_headers else " "
+            operand = "" if arg is None else f" {arg}"
+            lines.append(f"  {marker}{pc:4d}  {OPCODE_NAMES[op]}{operand}")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"CodeObject({self.name}, {len(self.code)} instructions)"
+
+class _Label:
+    def __init__(self, kind: str, name: Optional[str], height: int, target: Optional[int] = None):
+        self.kind = kind
+        self.name = name
+        self.height = height
+        self.target = target    # known for loops (the header), patched later for blocks/ifs
+        self.patches: List[int] = []
+
+class BytecodeCompiler:
+    """Compiles the Func bodies of a Module into CodeObjects"""
+
+    def __init__(self, module: Module):
+        self.module = module
+
+    def compile_module(self) -> List[CodeObject]:
+        codes = []
+        for i, func in enumerate(self.module.funcs):
+            try:
+                codes.append(self.compile_function(func, i))
+            except RuntimeError as e:
+                # Keep the rest of the module usable, the error surfaces when
+                # the broken function is actually called (like the tree walker)
+                code_obj = CodeObject(func, i)
+                code_obj.emit(TRAP, e.message)
+                codes.append(code_obj)
+        return codes
+
+    def compile_function(self, func: Func, index: int) -> CodeObject:
+        self.func = func
+        self.code_obj = CodeObject(func, index)
+        self.labels: List[_Label] = []
+        self.exit = _Label('function', None, 0)     # branches to the body itself return
+        self.height = 0
+        self.unreachable = False
+
+        self.compile_body(flatten(func.body))
+        for pc in self.exit.patches:
+            self.code_obj.args[pc] = len(self.code_obj.code)
+        self.code_obj.emit(RETURN)
+        return self.code_obj
+
+    def compile_body(self, instrs: List[Any]) -> None:
+        for instr in instrs:
+            if self.unreachable:
+                break   # dead code after br/return
+            self.compile_instruction(instr)
+
+    def adjust(self, pops: int, pushes: int) -> None:
+        self.height -= pops
+        if self.height < 0:
+            raise RuntimeError(f"Stack underflow while compiling {self.func.name}")
+        self.height += pushes
+        if self.height > self.code_obj.max_stack:
+            self.code_obj.max_stack = self.height
+
+    def emit(self, op: int, arg: Any = None) -> int:
+        if op in STACK_EFFECT:
+            self.adjust(*STACK_EFFECT[op])
+        return self.code_obj.emit(op, arg)
+
+    def compile_instruction(self, instr: Instruction) -> None:
+        if isinstance(instr, _i32_const):
+            self.emit(CONST, parse_int(immediate(instr)))
+        elif isinstance(instr, BinaryInstruction):
+            op = BINARY_OPCODES.get(type(instr))
+            if op is None:
+                raise RuntimeError(f"Unsupported binary instruction: {type(instr).__name__}")
+            self.emit(op)
+        elif isinstance(instr, _i32_clz):
+            self.emit(CLZ)
+        elif isinstance(instr, _local_get):
+            self.emit(LOCAL_GET, local_index(self.func, immediate(instr)))
+        elif isinstance(instr, _local_set):
+            self.emit(LOCAL_SET, local_index(self.func, immediate(instr)))
+        elif isinstance(instr, _local_tee):
+            self.emit(LOCAL_TEE, local_index(self.func, immediate(instr)))
+        elif isinstance(instr, _global_get):
+            self.emit(GLOBAL_GET, global_index(self.module, immediate(instr)))
+        elif isinstance(instr, _global_set):
+            self.emit(GLOBAL_SET, global_index(self.module, immediate(instr)))
+        elif isinstance(instr, _i32_load):
+            self.emit(LOAD)
+        elif isinstance(instr, _i32_store):
+            self.emit(STORE)
+        elif isinstance(instr, _call):
+            self.compile_call(instr)
+        elif isinstance(instr, _return):
+            self.code_obj.emit(RETURN)
+            self.unreachable = True
+        elif isinstance(instr, _block):
+            self.compile_block(instr)
+        elif isinstance(instr, _loop):
+            self.compile_loop(instr)
+        elif isinstance(instr, _if):
+            self.compile_if(instr)
+        elif isinstance(instr, _br):
+            self.compile_br(label_of(immediate(instr)))
+        elif isinstance(instr, _br_if):
+            self.compile_br_if(label_of(immediate(instr)))
+        elif isinstance(instr, (_then, _else, _end)):
+            pass    # structural markers, already consumed by split_if/block_parts
+        else:
+            raise RuntimeError(f"Unsupported instruction: {type(instr).__name__}")
+
+    def compile_call(self, instr: _call) -> None:
+        target = immediate(instr)
+        index = function_index(self.module, target)
+        if index is None:
+            params, results = HOST_FUNCTIONS.get(target, (0, 0))
+            self.adjust(params, results)
+            self.code_obj.emit(CALL_HOST, target)
+        else:
+            callee = self.module.funcs[index]
+            self.adjust(len(callee.params), len(callee.results))
+            self.code_obj.emit(CALL, index)
+
+    def compile_block(self, instr: _block) -> None:
+        name, body, _ = block_parts(instr)
+        label = _Label('block', name, self.height)
+        self.labels.append(label)
+        self.compile_body(body)
+        self.labels.pop()
+        self.end_label(label, len(self.code_obj.code))
+
+    def compile_loop(self, instr: _loop) -> None:
+        name, body, _ = block_parts(instr)
+        header = len(self.code_obj.code)
+        label = _Label('loop', name, self.height, header)
+        self.code_obj.loop_headers.append(header)
+        self.labels.append(label)
+        self.compile_body(body)
+        self.labels.pop()
+        self.end_label(label, None)
+
+    def compile_if(self, instr: _if) -> None:
+        cond, then_body, else_body = split_if(instr)
+        self.compile_body(cond)
+        jump_else = self.emit(JMP_IFNOT, None)
+
+        label = _Label('if', getattr(instr, 'name', None), self.height)
+        self.labels.append(label)
+        self.compile_body(then_body)
+        if else_body:
+            if not self.unreachable:
+                label.patches.append(self.emit(JMP, None))
+            self.code_obj.args[jump_else] = len(self.code_obj.code)
+            self.height = label.height
+            self.unreachable = False
+            self.compile_body(else_body)
+            self.labels.pop()
+            self.end_label(label, len(self.code_obj.code))
+        else:
+            self.labels.pop()
+            self.end_label(label, len(self.code_obj.code))
+            self.code_obj.args[jump_else] = len(self.code_obj.code)
+
+    def end_label(self, label: _Label, end: Optional[int]) -> None:
+        for pc in label.patches:
+            self.code_obj.args[pc] = end
+        self.height = label.height
+        self.unreachable = False
+
+    def resolve_label(self, target) -> _Label:
+        if isinstance(target, int):
+            if target == len(self.labels):
+                return self.exit
+            if target > len(self.labels):
+                raise RuntimeError(f"Undefined label: {target}")
+            return self.labels[-1 - target]
+        for label in reversed(self.labels):
+            if label.name == target:
+                return label
+        raise RuntimeError(f"Undefined label: {target}")
+
+    def emit_jump(self, op: int, label: _Label) -> None:
+        pc = self.emit(op, label.target)
+        if label.target is None:
+            label.patches.append(pc)
+
+    def compile_br(self, target) -> None:
+        label = self.resolve_label(target)
+        if label is self.exit:
+            # RETURN takes the results from the top, nothing to unwind
+            self.code_obj.emit(RETURN)
+            self.unreachable = True
+            return
+        if self.height > label.height:
+            self.code_obj.emit(UNWIND, label.height)
+        self.emit_jump(JMP, label)
+        self.unreachable = True
+
+    def compile_br_if(self, target) -> None:
+        label = self.resolve_label(target)
+        if label is not self.exit and self.height - 1 > label.height:
+            # taken branch has to drop the values pushed inside the block
+            skip = self.emit(JMP_IFNOT, None)
+            self.code_obj.emit(UNWIND, label.height)
+            self.emit_jump(JMP, label)
+            self.code_obj.args[skip] = len(self.code_obj.code)
+        else:
+            self.emit_jump(JMP_IF, label)
+
+class BytecodeInterpreter(Interpreter):
+    """Executes compiled bytecode in a single dispatch loop per call"""
+
+    def __init__(self, module: Module, verbose: bool = False, use_colors: bool = False):
+        super().__init__(module, verbose=verbose, use_colors=use_colors)
+        self.codes: List[CodeObject] = BytecodeCompiler(self.module).compile_module()
+        for code_obj in self.codes:
+            log.info("Compiled %s to %d instructions", code_obj.name, len(code_obj.code))
+
+    def execute_function(self, func_name: str, args: List[Any] = None) -> Any:
+        if isinstance(func_name, Func):
+            func_name = func_name.name
+        if args is None:
+            args = []
+        code_obj = self.codes[find_function(self.module, func_name)]
+        if len(args) != code_obj.nparams:
+            raise RuntimeError(f"Function {code_obj.name} expects {code_obj.nparams} arguments, got {len(args)}")
+        return self.run(code_obj, [wrap_i32(int(a)) for a in args])
+
+    def run(self, code_obj: CodeObject, args: List[int]) -> Any:
+        try:
+            return self._run(code_obj, args)
+        except IndexError:
+            raise RuntimeError(f"Stack underflow in {code_obj.name}")
+
+    def _run(self, code_obj: CodeObject, args: List[int]) -> Any:
+        code = code_obj.code
+        imms = code_obj.args
+        n = len(code)
+        locals_ = args + [0] * code_obj.nlocals
+        stack: List[int] = []
+        push = stack.append
+        pop = stack.pop
+        memory = self.memory
+        globals_ = self.globals
+        unpack_from = _I32.unpack_from
+        pack_into = _I32.pack_into
+        pc = 0
+
+        while pc < n:
+            op = code[pc]
+            arg = imms[pc]
+            pc += 1
+            if op == LOCAL_GET:
+                push(locals_[arg])
+            elif op == CONST:
+                push(arg)
+            elif op == LOCAL_SET:
+                locals_[arg] = pop()
+            elif op == LOCAL_TEE:
+                locals_[arg] = stack[-1]
+            elif op == ADD:
+                b = pop()
+                r = pop() + b
+                push(r if I32_MIN <= r <= I32_MAX else wrap_i32(r))
+            elif op == SUB:
+                b = pop()
+                r = pop() - b
+                push(r if I32_MIN <= r <= I32_MAX else wrap_i32(r))
+            elif op == MUL:
+                b = pop()
+                r = pop() * b
+                push(r if I32_MIN <= r <= I32_MAX else wrap_i32(r))
+            elif op == LT_S:
+                b = pop()
+                push(1 if pop() < b else 0)
+            elif op == LT_U:
+                b = pop() & U32_MASK
+                push(1 if (pop() & U32_MASK) < b else 0)
+            elif op == GT_S:
+                b = pop()
+                push(1 if pop() > b else 0)
+            elif op == GE_U:
+                b = pop() & U32_MASK
+                push(1 if (pop() & U32_MASK) >= b else 0)
+            elif op == JMP_IF:
+                if pop():
+                    pc = arg
+            elif op == JMP_IFNOT:
+                if not pop():
+                    pc = arg
+            elif op == JMP:
+                pc = arg
+            elif op == LOAD:
+                address = pop()
+                if address < 0 or address + 4 > len(memory):
+                    raise RuntimeError(f"Memory access out of bounds: {address}")
+                push(unpack_from(memory, address)[0])
+            elif op == STORE:
+                value = pop()
+                address = pop()
+                if address < 0 or address + 4 > len(memory):
+                    raise RuntimeError(f"Memory access out of bounds: {address}")
+                pack_into(memory, address, value)
+            elif op == DIV_S:
+                b = pop()
+                push(i32_div_s(pop(), b))
+            elif op == CLZ:
+                push(i32_clz(pop()))
+            elif op == GLOBAL_GET:
+                push(globals_[arg])
+            elif op == GLOBAL_SET:
+                globals_[arg] = pop()
+            elif op == CALL:
+                callee = self.codes[arg]
+                count = callee.nparams
+                if count:
+                    call_args = stack[-count:]
+                    del stack[-count:]
+                else:
+                    call_args = []
+                result = self._run(callee, call_args)
+                if callee.nresults == 1:
+                    push(result)
+                elif callee.nresults > 1:
+                    stack.extend(result)
+            elif op == CALL_HOST:
+                self.call_host(arg, stack)
+            elif op == UNWIND:
+                del stack[arg:]
+            elif op == RETURN:
+                break
+            elif op == TRAP:
+                raise RuntimeError(arg)
+
+        nresults = code_obj.nresults
+        if nresults == 0 or not stack:
+            return None
+        if nresults == 1:
+            return stack[-1]
+        return tuple(stack[-nresults:])
+
+    def call_host(self, name: str, stack: List[int]) -> None:
+        if name == '$log':
+            host_log(stack.pop(), self.use_colors)
+        else:
+            raise RuntimeError(f"Undefined function: {name}")
+
+    def disassemble(self) -> str:
+        return "\n".join(code_obj.disassemble() for code_obj in self.codes)
@@ -0,0 +1,148 @@
+from Interpreter import Interpreter, CompiledModule, ExecutionContext, RuntimeError
+from typing import List, Dict, Any
+import base64
+import hashlib
+import json
+import os
+import zlib
+
+# Checkpoints of a paused tree-walker execution. Everything the tree walker
+# needs to continue lives in Interpreter state, so a checkpoint is plain
+# data: the frames (function, pc and label stack, with their locals on the
+# operand stack), the operand stack, globals and the non-zero pages of
+# memory. Labels refer to AST nodes, they are saved as positions in the
+# enclosing body and found again in the module of the resuming process.
+# The file is zlib-compressed JSON.
+
+FORMAT_VERSION = 1
+PAGE_SIZE = 65536
+ZERO_PAGE = bytes(PAGE_SIZE)
+
+# Attributes of a quickened node holding the body a label executes
+ARMS = ('body', 'then_body', 'else_body')
+
+def fingerprint(compiled: CompiledModule) -> str:
+    """Identifies the shape of a module, resuming requires the same one"""
+
+    shape = [(func.name, layout.nparams, layout.nlocals, len(layout.body))
+             for func, layout in ((f, compiled.layouts[id(f)]) for f in compiled.module.funcs)]
+    shape.append((compiled.memory_size, len(compiled.globals)))
+    return hashlib.sha256(repr(shape).encode()).hexdigest()[:16]
+
+def position(body: List[Any], node: Any) -> int:
+    for i, instr in enumerate(body):
+        if instr is node:
+            return i
+    raise RuntimeError("Label node not found in the enclosing body")
+
+def capture_frame(context: ExecutionContext, function_indices: Dict[int, int]) -> Dict[str, Any]:
+    """A frame's label stack, outermost (the function body) first"""
+
+    saved = [context.labels[n:n + 4] for n in range(0, context.nlabels, 4)]
+    levels = saved + [[context.body, context.pc, context.node, context.height]]
+    labels = []
+    enclosing = None
+    for body, pc, node, height in levels:
+        if node is None:
+            labels.append([None, None, pc, height])
+        else:
+            arm = next(a for a in ARMS if getattr(node, a, None) is body)
+            labels.append([position(enclosing, node), arm, pc, height])
+        enclosing = body
+    return {'func': function_indices[id(context.func)], 'fp': context.fp,
+            'stack_base': context.stack_base, 'labels': labels}
+
+def capture(interpreter: Interpreter) -> Dict[str, Any]:
+    """The state of a paused execution as JSON-compatible data"""
+
+    function_indices = {id(func): i for i, func in enumerate(interpreter.module.funcs)}
+    memory = interpreter.memory
+    pages = []
+    for start in range(0, len(memory), PAGE_SIZE):
+        page = memory[start:start + PAGE_SIZE]
+        if page != ZERO_PAGE[:len(page)]:
+            pages.append([start // PAGE_SIZE, base64.b64encode(page).decode('ascii')])
+    entry, base = interpreter.entry
+    return {
+        'version': FORMAT_VERSION,
+        'module': fingerprint(interpreter.compiled_module),
+        'entry': function_indices[id(entry)],
+        'base': base,
+        'fuel': interpreter.fuel,
+        'fuel_used': interpreter.fuel_used,
+        'stack': interpreter.stack[:interpreter.sp],
+        'globals': list(interpreter.globals),
+        'memory_size': len(memory),
+        'pages': pages,
+        'frames': [capture_frame(context, function_indices) for context in interpreter.call_stack],
+    }
+
+def restore_frame(interpreter: Interpreter, frame: Dict[str, Any]) -> ExecutionContext:
+
+    func = interpreter.module.funcs[frame['func']]
+    layout = interpreter.layouts[id(func)]
+    context = ExecutionContext()
+    context.func = func
+    context.layout = layout
+    context.fp = frame['fp']
+    context.stack_base = frame['stack_base']
+
+    levels = []
+    body, node = layout.body, None
+    for index, arm, pc, height in frame['labels']:
+        if index is not None:
+            node = body[index]
+            body = getattr(node, arm, None)
+            if body is None:
+                raise RuntimeError(f"Checkpoint label does not match {func.name}")
+        levels.append((body, pc, node, height))
+    for saved in levels[:-1]:
+        context.labels.extend(saved)
+    context.nlabels = 4 * (len(levels) - 1)
+    context.body, context.pc, context.node, context.height = levels[-1]
+    return context
+
+def restore(interpreter: Interpreter, state: Dict[str, Any]) -> None:
+    """Replace the interpreter's execution state with a captured one"""
+
+    if state.get('version') != FORMAT_VERSION:
+        raise RuntimeError(f"Unsupported checkpoint version: {state.get('version')}")
+    if state['module'] != fingerprint(interpreter.compiled_module):
+        raise RuntimeError("Checkpoint was taken from a different module")
+
+    memory = bytearray(state['memory_size'])
+    for index, data in state['pages']:
+        page = base64.b64decode(data)
+        memory[index * PAGE_SIZE:index * PAGE_SIZE + len(page)] = page
+    # In place, code compiled by codegen holds references to both
+    interpreter.memory[:] = memory
+    interpreter.globals[:] = state['globals']
+
+    stack = state['stack']
+    interpreter.stack = stack + [0] * max(len(stack), len(interpreter.stack))
+    interpreter.sp = len(stack)
+    interpreter.call_stack = [restore_frame(interpreter, frame) for frame in state['frames']]
+    interpreter.current_context = interpreter.call_stack[-1] if interpreter.call_stack else None
+    interpreter.entry = (interpreter.module.funcs[state['entry']], state['base'])
+    # The remaining budget carries over, unless the checkpoint had none
+    if state['fuel'] is not None:
+        interpreter.fuel = state['fuel']
+    interpreter.fuel_used = state['fuel_used']
+    interpreter.set_checkpointing(interpreter.checkpoint_path, interpreter.checkpoint_every)
+    # Frames may grow from here, make sure each has its stack headroom
+    for context in interpreter.call_stack:
+        interpreter.ensure_capacity(context.stack_base + context.layout.max_height + 1)
+
+def save(state: Dict[str, Any], path: str) -> None:
+    """Write a checkpoint atomically, a crash never leaves a partial file"""
+
+    data = zlib.compress(json.dumps(state, separators=(',', ':')).encode())
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as output:
+        output.write(data)
+    os.replace(temporary, path)
+
+def load(path: str) -> Dict[str, Any]:
+
+    with open(path, 'rb') as source:
+        return json.loads(zlib.decompress(source.read()))
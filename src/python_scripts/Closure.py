@@ -0,0 +1,439 @@
+from Lexer import (
+    Module, Func,
+    Instruction, BinaryInstruction,
+    _i32_const, _i32_add, _i32_sub, _i32_mul, _i32_div_s,
+    _i32_ge_u, _i32_gt_s, _i32_lt_s, _i32_lt_u, _i32_clz,
+    _local_get, _local_set, _local_tee,
+    _global_get, _global_set,
+    _call, _return, _block, _loop, _br, _br_if, _if, _then, _else, _end,
+    _i32_load, _i32_store
+)
+from Interpreter import Interpreter, RuntimeError
+from Runtime import (
+    I32_MIN, I32_MAX, U32_MASK, wrap_i32, i32_div_s, i32_clz, parse_int,
+    host_log, HOST_FUNCTIONS,
+    immediate, label_of, block_parts, split_if, flatten,
+    local_index, global_index, function_index, find_function
+)
+from typing import List, Any, Optional, Callable, Tuple
+import struct
+import Log
+
+log = Log.get_logger("Closure")
+
+# Every instruction becomes a closure `f(L, S)` over the frame's locals list L
+# and operand stack S. A closure returns None to fall through, a relative
+# label depth for a taken branch (0 = innermost label) or RETURN.
+RETURN = -1
+
+_I32 = struct.Struct('<i')
+
+class CompiledFunction:
+    def __init__(self, func: Func, index: int):
+        self.func = func
+        self.index = index
+        self.name = func.name
+        self.nparams = len(func.params)
+        self.nlocals = len(func.locals)
+        self.nresults = len(func.results)
+        self.body: Optional[Callable] = None
+        self.closure_count = 0
+
+    def __repr__(self):
+        return f"CompiledFunction({self.name}, {self.closure_count} closures)"
+
+class ClosureCompiler:
+    """Compiles each instruction node once into a specialized closure"""
+
+    def __init__(self, interpreter: 'ClosureInterpreter'):
+        self.interpreter = interpreter
+        self.module = interpreter.module
+
+    def compile_module(self) -> List[CompiledFunction]:
+        # Create all targets first so calls (including recursive ones) can
+        # capture the callee before its body exists
+        self.targets = [CompiledFunction(func, i) for i, func in enumerate(self.module.funcs)]
+        for target in self.targets:
+            try:
+                target.body = self.compile_function(target)
+            except RuntimeError as e:
+                target.body = self.make_trap(e.message)
+        return self.targets
+
+    def compile_function(self, target: CompiledFunction) -> Callable:
+        self.func = target.func
+        self.target = target
+        self.labels: List[Tuple[Optional[str], int]] = []  # (name, stack height)
+        self.height = 0
+        return self.compile_seq(flatten(self.func.body))[0]
+
+    def make_trap(self, message: str) -> Callable:
+        def trap(L, S):
+            raise RuntimeError(message)
+        return trap
+
+    def adjust(self, pops: int, pushes: int) -> None:
+        self.height -= pops
+        if self.height < 0:
+            raise RuntimeError(f"Stack underflow while compiling {self.func.name}")
+        self.height += pushes
+
+    def compile_seq(self, instrs: List[Any]) -> Tuple[Callable, bool]:
+        """Compile a straight sequence, returns (closure, may_branch)"""
+        fns = []
+        may_branch = False
+        for instr in instrs:
+            fn, branches, terminal = self.compile_instruction(instr)
+            fns.append(fn)
+            may_branch = may_branch or branches
+            if terminal:
+                break   # dead code after br/return
+        self.target.closure_count += len(fns)
+
+        if not fns:
+            def empty(L, S):
+                return None
+            return empty, False
+        if len(fns) == 1:
+            return fns[0], may_branch
+        fns = tuple(fns)
+        if not may_branch:
+            def seq(L, S):
+                for f in fns:
+                    f(L, S)
+            return seq, False
+
+        def seq_branch(L, S):
+            for f in fns:
+                r = f(L, S)
+                if r is not None:
+                    return r
+        return seq_branch, True
+
+    def compile_instruction(self, instr: Instruction) -> Tuple[Callable, bool, bool]:
+        """Returns (closure, may_branch, terminal)"""
+        if isinstance(instr, _i32_const):
+            self.adjust(0, 1)
+            return self.make_const(parse_int(immediate(instr))), False, False
+        elif isinstance(instr, BinaryInstruction):
+            self.adjust(2, 1)
+            return self.make_binary(instr), False, False
+        elif isinstance(instr, _i32_clz):
+            self.adjust(1, 1)
+            def clz(L, S):
+                S[-1] = i32_clz(S[-1])
+            return clz, False, False
+        elif isinstance(instr, _local_get):
+            self.adjust(0, 1)
+            i = local_index(self.func, immediate(instr))
+            def local_get(L, S):
+                S.append(L[i])
+            return local_get, False, False
+        elif isinstance(instr, _local_set):
+            self.adjust(1, 0)
+            i = local_index(self.func, immediate(instr))
+            def local_set(L, S):
+                L[i] = S.pop()
+            return local_set, False, False
+        elif isinstance(instr, _local_tee):
+            self.adjust(1, 1)
+            i = local_index(self.func, immediate(instr))
+            def local_tee(L, S):
+                L[i] = S[-1]
+            return local_tee, False, False
+        elif isinstance(instr, _global_get):
+            self.adjust(0, 1)
+            return self.make_global_get(global_index(self.module, immediate(instr))), False, False
+        elif isinstance(instr, _global_set):
+            self.adjust(1, 0)
+            return self.make_global_set(global_index(self.module, immediate(instr))), False, False
+        elif isinstance(instr, _i32_load):
+            self.adjust(1, 1)
+            return self.make_load(), False, False
+        elif isinstance(instr, _i32_store):
+            self.adjust(2, 0)
+            return self.make_store(), False, False
+        elif isinstance(instr, _call):
+            return self.make_call(immediate(instr)), False, False
+        elif isinstance(instr, _return):
+            def ret(L, S):
+                return RETURN
+            return ret, True, True
+        elif isinstance(instr, _block):
+            return self.make_block(instr) + (False,)
+        elif isinstance(instr, _loop):
+            return self.make_loop(instr) + (False,)
+        elif isinstance(instr, _if):
+            return self.make_if(instr) + (False,)
+        elif isinstance(instr, _br):
+            return self.make_br(label_of(immediate(instr))), True, True
+        elif isinstance(instr, _br_if):
+            self.adjust(1, 0)
+            return self.make_br_if(label_of(immediate(instr))), True, False
+        elif isinstance(instr, (_then, _else, _end)):
+            def marker(L, S):
+                return None
+            return marker, False, False
+        raise RuntimeError(f"Unsupported instruction: {type(instr).__name__}")
+
+    def make_const(self, value: int) -> Callable:
+        def const(L, S):
+            S.append(value)
+        return const
+
+    def make_binary(self, instr: BinaryInstruction) -> Callable:
+        if isinstance(instr, _i32_add):
+            def add(L, S):
+                b = S.pop()
+                r = S[-1] + b
+                S[-1] = r if I32_MIN <= r <= I32_MAX else wrap_i32(r)
+            return add
+        if isinstance(instr, _i32_sub):
+            def sub(L, S):
+                b = S.pop()
+                r = S[-1] - b
+                S[-1] = r if I32_MIN <= r <= I32_MAX else wrap_i32(r)
+            return sub
+        if isinstance(instr, _i32_mul):
+            def mul(L, S):
+                b = S.pop()
+                r = S[-1] * b
+                S[-1] = r if I32_MIN <= r <= I32_MAX else wrap_i32(r)
+            return mul
+        if isinstance(instr, _i32_div_s):
+            def div_s(L, S):
+                b = S.pop()
+                S[-1] = i32_div_s(S[-1], b)
+            return div_s
+        if isinstance(instr, _i32_lt_s):
+            def lt_s(L, S):
+                b = S.pop()
+                S[-1] = 1 if S[-1] < b else 0
+            return lt_s
+        if isinstance(instr, _i32_gt_s):
+            def gt_s(L, S):
+                b = S.pop()
+                S[-1] = 1 if S[-1] > b else 0
+            return gt_s
+        if isinstance(instr, _i32_lt_u):
+            def lt_u(L, S):
+                b = S.pop() & U32_MASK
+                S[-1] = 1 if (S[-1] & U32_MASK) < b else 0
+            return lt_u
+        if isinstance(instr, _i32_ge_u):
+            def ge_u(L, S):
+                b = S.pop() & U32_MASK
+                S[-1] = 1 if (S[-1] & U32_MASK) >= b else 0
+            return ge_u
+        raise RuntimeError(f"Unsupported binary instruction: {type(instr).__name__}")
+
+    def make_global_get(self, i: int) -> Callable:
+        globals_ = self.interpreter.globals
+        def global_get(L, S):
+            S.append(globals_[i])
+        return global_get
+
+    def make_global_set(self, i: int) -> Callable:
+        globals_ = self.interpreter.globals
+        def global_set(L, S):
+            globals_[i] = S.pop()
+        return global_set
+
+    def make_load(self) -> Callable:
+        memory = self.interpreter.memory
+        unpack_from = _I32.unpack_from
+        def load(L, S):
+            address = S[-1]
+            if address < 0 or address + 4 > len(memory):
+                raise RuntimeError(f"Memory access out of bounds: {address}")
+            S[-1] = unpack_from(memory, address)[0]
+        return load
+
+    def make_store(self) -> Callable:
+        memory = self.interpreter.memory
+        pack_into = _I32.pack_into
+        def store(L, S):
+            value = S.pop()
+            address = S.pop()
+            if address < 0 or address + 4 > len(memory):
+                raise RuntimeError(f"Memory access out of bounds: {address}")
+            pack_into(memory, address, value)
+        return store
+
+    def make_call(self, name: Any) -> Callable:
+        index = function_index(self.module, name)
+        if index is None:
+            params, results = HOST_FUNCTIONS.get(name, (0, 0))
+            self.adjust(params, results)
+            if name == '$log':
+                use_colors = self.interpreter.use_colors
+                def call_log(L, S):
+                    host_log(S.pop(), use_colors)
+                return call_log
+            return self.make_trap(f"Undefined function: {name}")
+
+        callee = self.targets[index]
+        nparams = callee.nparams
+        nresults = callee.nresults
+        zeros = [0] * callee.nlocals
+        self.adjust(nparams, nresults)
+
+        def call(L, S):
+            if nparams:
+                frame = S[-nparams:]
+                del S[-nparams:]
+            else:
+                frame = []
+            frame += zeros
+            stack = []
+            callee.body(frame, stack)
+            if nresults == 1:
+                S.append(stack[-1])
+            elif nresults:
+                S.extend(stack[-nresults:])
+        return call
+
+    def push_label(self, name: Optional[str]) -> None:
+        self.labels.append((name, self.height))
+
+    def pop_label(self) -> None:
+        _, self.height = self.labels.pop()
+
+    def make_block(self, instr: _block) -> Tuple[Callable, bool]:
+        name, body_instrs, _ = block_parts(instr)
+        self.push_label(name)
+        body, may_branch = self.compile_seq(body_instrs)
+        self.pop_label()
+        if not may_branch:
+            return body, False
+
+        def block(L, S):
+            r = body(L, S)
+            if r is None or r == 0:
+                return None
+            return r if r < 0 else r - 1
+        return block, True
+
+    def make_loop(self, instr: _loop) -> Tuple[Callable, bool]:
+        name, body_instrs, _ = block_parts(instr)
+        self.push_label(name)
+        body, may_branch = self.compile_seq(body_instrs)
+        self.pop_label()
+        if not may_branch:
+            return body, False
+
+        def loop(L, S):
+            while True:
+                r = body(L, S)
+                if r != 0:
+                    if r is None:
+                        return None
+                    return r if r < 0 else r - 1
+        return loop, True
+
+    def make_if(self, instr: _if) -> Tuple[Callable, bool]:
+        cond_instrs, then_instrs, else_instrs = split_if(instr)
+        cond, cond_branch = self.compile_seq(cond_instrs)
+        self.adjust(1, 0)
+        self.push_label(getattr(instr, 'name', None))
+        then, then_branch = self.compile_seq(then_instrs)
+        self.height = self.labels[-1][1]
+        orelse, else_branch = self.compile_seq(else_instrs) if else_instrs else (None, False)
+        self.pop_label()
+
+        may_branch = then_branch or else_branch
+        if not cond_instrs:
+            if orelse is None:
+                def if_(L, S):
+                    if S.pop():
+                        r = then(L, S)
+                        if r is not None and r != 0:
+                            return r if r < 0 else r - 1
+            else:
+                def if_(L, S):
+                    r = then(L, S) if S.pop() else orelse(L, S)
+                    if r is not None and r != 0:
+                        return r if r < 0 else r - 1
+            return if_, may_branch
+
+        def folded_if(L, S):
+            cond(L, S)
+            if S.pop():
+                r = then(L, S)
+            elif orelse is not None:
+                r = orelse(L, S)
+            else:
+                return None
+            if r is not None and r != 0:
+                return r if r < 0 else r - 1
+        return folded_if, may_branch or cond_branch
+
+    def resolve_label(self, target) -> Tuple[int, int]:
+        """(relative depth, stack height) of a branch target"""
+        if isinstance(target, int):
+            if target == len(self.labels):
+                return RETURN, 0    # the function body itself
+            if target > len(self.labels):
+                raise RuntimeError(f"Undefined label: {target}")
+            return target, self.labels[-1 - target][1]
+        for depth, (name, height) in enumerate(reversed(self.labels)):
+            if name == target:
+                return depth, height
+        raise RuntimeError(f"Undefined label: {target}")
+
+    def make_br(self, target) -> Callable:
+        depth, height = self.resolve_label(target)
+        if depth != RETURN and self.height > height:
+            def br_unwind(L, S):
+                del S[height:]
+                return depth
+            return br_unwind
+
+        def br(L, S):
+            return depth
+        return br
+
+    def make_br_if(self, target) -> Callable:
+        depth, height = self.resolve_label(target)
+        if depth != RETURN and self.height > height:
+            def br_if_unwind(L, S):
+                if S.pop():
+                    del S[height:]
+                    return depth
+            return br_if_unwind
+
+        def br_if(L, S):
+            if S.pop():
+                return depth
+        return br_if
+
+class ClosureInterpreter(Interpreter):
+    """Executes functions as chains of pre-bound closures"""
+
+    def __init__(self, module: Module, verbose: bool = False, use_colors: bool = False):
+        super().__init__(module, verbose=verbose, use_colors=use_colors)
+        self.compiled: List[CompiledFunction] = ClosureCompiler(self).compile_module()
+        for target in self.compiled:
+            log.info("Compiled %s to %d closures", target.name, target.closure_count)
+
+    def execute_function(self, func_name: str, args: List[Any] = None) -> Any:
+        if isinstance(func_name, Func):
+            func_name = func_name.name
+        if args is None:
+            args = []
+        target = self.compiled[find_function(self.module, func_name)]
+        if len(args) != target.nparams:
+            raise RuntimeError(f"Function {target.name} expects {target.nparams} arguments, got {len(args)}")
+
+        frame = [wrap_i32(int(a)) for a in args] + [0] * target.nlocals
+        stack: List[int] = []
+        try:
+            target.body(frame, stack)
+        except IndexError:
+            raise RuntimeError(f"Stack underflow in {target.name}")
+
+        if target.nresults == 0 or not stack:
+            return None
+        if target.nresults == 1:
+            return stack[-1]
+        return tuple(stack[-target.nresults:])
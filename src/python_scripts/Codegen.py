@@ -0,0 +1,609 @@
+from Lexer import (
+    Module, Func,
+    Instruction, BinaryInstruction,
+    _i32_const, _i32_add, _i32_sub, _i32_mul, _i32_div_s,
+    _i32_ge_u, _i32_gt_s, _i32_lt_s, _i32_lt_u, _i32_clz,
+    _local_get, _local_set, _local_tee,
+    _global_get, _global_set,
+    _call, _return, _block, _loop, _br, _br_if, _if, _then, _else, _end,
+    _i32_load, _i32_store
+)
+from Interpreter import RuntimeError
+from Runtime import (
+    wrap_i32, i32_div_s, i32_clz, parse_int,
+    host_log, HOST_FUNCTIONS,
+    immediate, label_of, block_parts, split_if, flatten,
+    initial_globals, initial_memory,
+    local_index, global_index, function_index
+)
+from typing import List, Dict, Any, Optional, Callable, Set
+import keyword
+import linecache
+import re
+import struct
+
+# Translates validated Func bodies into Python source. Operand stack slots
+# become Python locals s0, s1, ..., wasm locals become Python locals too,
+# and structured control flow maps onto `while True:` loops with
+# break/continue, so neither a value stack nor a dispatch loop is left.
+# Guest calls are Python calls, each passing its nesting depth so the
+# Interpreter's call depth limit still holds.
+
+class CodegenError(Exception):
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(f"CodegenError: {message}")
+
+ARITHMETIC = {_i32_add: '+', _i32_sub: '-', _i32_mul: '*'}
+SIGNED_COMPARE = {_i32_lt_s: '<', _i32_gt_s: '>'}
+UNSIGNED_COMPARE = {_i32_lt_u: '<', _i32_ge_u: '>='}
+
+_I32 = struct.Struct('<i')
+
+def python_name(name: Optional[str], prefix: str, index: int) -> str:
+    """A valid, unique Python identifier for a wasm function/local"""
+    if not name:
+        return f"{prefix}{index}"
+    return f"{prefix}{index}_" + re.sub(r'[^0-9a-zA-Z_]', '_', name.lstrip('$'))
+
+class _Value:
+    """A symbolic operand stack entry: a side-effect free Python expression"""
+    __slots__ = ('expr', 'deps', 'cond')
+
+    def __init__(self, expr: str, deps: frozenset = frozenset(), cond: Optional[str] = None):
+        self.expr = expr
+        self.deps = deps    # Python locals (or 'G') the expression reads
+        self.cond = cond    # set for comparisons, usable directly in `if`
+
+    def condition(self) -> str:
+        return self.cond if self.cond is not None else self.expr
+
+class _Label:
+    def __init__(self, kind: str, name: Optional[str], height: int, label_id: int, python_loop: bool):
+        self.kind = kind
+        self.name = name
+        self.height = height
+        self.id = label_id
+        self.python_loop = python_loop      # realized as a `while True:`
+        self.exits_through: Set[int] = set()    # outer label ids a branch leaves through here
+
+class CodeGenerator:
+    """Generates one Python factory function holding all translatable Funcs"""
+
+    counts_depth = True     # functions take and check the call depth `_depth`
+
+    def __init__(self, module: Module):
+        self.module = module
+        self.function_names: List[str] = [python_name(func.name, 'f', i) for i, func in enumerate(module.funcs)]
+        self.generated: Dict[int, List[str]] = {}
+        self.failed: Dict[int, str] = {}
+        self.source: Optional[str] = None
+        self.factory: Optional[Callable] = None
+
+    # Module level
+
+    def generate_module(self) -> str:
+        for i, func in enumerate(self.module.funcs):
+            try:
+                self.generated[i] = self.generate_function(func, i)
+            except (CodegenError, RuntimeError) as e:
+                self.failed[i] = e.message
+
+        lines = ["# Generated by Uwasm CodeGenerator",
+                 "def _instantiate(memory, G, unpack_from, pack_into, wrap, div_s, clz, log, call_fallback, RuntimeError, max_depth):",
+                 "    mlen4 = len(memory) - 4"]
+        for i in range(len(self.module.funcs)):
+            lines.append("")
+            if i in self.generated:
+                lines.extend("    " + line for line in self.generated[i])
+            else:
+                # Untranslatable functions stay with the tree walker
+                args = ", ".join(f"a{j}" for j in range(len(self.module.funcs[i].params)))
+                lines.append(f"    def {self.function_names[i]}({args}{', ' if args else ''}_depth):")
+                lines.append(f"        return call_fallback({i}, [{args}], _depth)")
+        table = ", ".join(self.function_names[i] if i in self.generated else "None"
+                          for i in range(len(self.module.funcs)))
+        lines.append("")
+        lines.append(f"    return [{table}]")
+        self.source = "\n".join(lines) + "\n"
+        return self.source
+
+    def instantiate(self, memory: bytearray, globals_: List[int], call_fallback: Callable,
+                    max_depth: int, use_colors: bool = False) -> List[Optional[Callable]]:
+        if self.factory is None:
+            if self.source is None:
+                self.generate_module()
+            filename = f"<uwasm-codegen-{id(self)}>"
+            # Register the source so tracebacks through generated code show lines
+            linecache.cache[filename] = (len(self.source), None, self.source.splitlines(True), filename)
+            namespace: Dict[str, Any] = {}
+            exec(compile(self.source, filename, 'exec'), namespace)
+            self.factory = namespace['_instantiate']
+
+        def log(value):
+            host_log(value, use_colors)
+
+        return self.factory(memory, globals_, _I32.unpack_from, _I32.pack_into,
+                            wrap_i32, i32_div_s, i32_clz, log, call_fallback, RuntimeError, max_depth)
+
+    # Function level
+
+    def generate_function(self, func: Func, index: int) -> List[str]:
+        self.func = func
+        self.lines: List[str] = []
+        self.indent = 1
+        self.stack: List[_Value] = []
+        self.labels: List[_Label] = []
+        self.dead = False
+        self.next_label_id = 1
+        self.targeted: Set[int] = set()
+        self.written_globals: Set[str] = set()
+        self.local_vars = [python_name(name, 'l', i) for i, name in
+                           enumerate([p.name for p in func.params] + [l.name for l in func.locals])]
+
+        body = flatten(func.body)
+        self.find_targets(body, [])
+
+        self.gen_body(body)
+        if not self.dead:
+            self.gen_return()
+        return self.function_header(func, index) + self.lines
+
+    def function_header(self, func: Func, index: int) -> List[str]:
+        params = self.local_vars[:len(func.params)] + (["_depth"] if self.counts_depth else [])
+        header = [f"def {self.function_names[index]}({', '.join(params)}):",
+                  f"    # {func.name or f'func {index}'}"]
+        if self.counts_depth:
+            header.append("    if _depth > max_depth:")
+            header.append("        raise RuntimeError(f'Call stack exhausted: more than {max_depth} nested calls')")
+        if func.locals:
+            header.append("    " + " = ".join(self.local_vars[len(func.params):]) + " = 0")
+        header.append("    _br = 0")
+        return header
+
+    def global_ref(self, index: int) -> str:
+        """Python expression (and assignment target) for a wasm global"""
+        return f"G[{index}]"
+
+    def emit(self, line: str) -> None:
+        self.lines.append("    " * self.indent + line)
+
+    def find_targets(self, instrs: List[Any], labels: List[Any]) -> None:
+        """Mark the blocks/loops/ifs some branch jumps to, only those need a Python loop"""
+        for instr in instrs:
+            if isinstance(instr, (_block, _loop)):
+                name, body, _ = block_parts(instr)
+                self.find_targets(body, labels + [(name, instr)])
+            elif isinstance(instr, _if):
+                cond, then_body, else_body = split_if(instr)
+                self.find_targets(cond, labels)
+                inner = labels + [(getattr(instr, 'name', None), instr)]
+                self.find_targets(then_body, inner)
+                self.find_targets(else_body, inner)
+            elif isinstance(instr, (_br, _br_if)):
+                target = label_of(immediate(instr))
+                if isinstance(target, int):
+                    if target < len(labels):
+                        self.targeted.add(id(labels[-1 - target][1]))
+                else:
+                    for name, node in reversed(labels):
+                        if name == target:
+                            self.targeted.add(id(node))
+                            break
+
+    # Symbolic operand stack
+
+    def slot(self, k: int) -> _Value:
+        return _Value(f"s{k}", frozenset((f"s{k}",)))
+
+    def push(self, value: _Value) -> None:
+        self.stack.append(value)
+
+    def pop(self) -> _Value:
+        if not self.stack:
+            raise CodegenError(f"Stack underflow in {self.func.name}")
+        return self.stack.pop()
+
+    def write_slot(self, k: int, expr: str) -> None:
+        """Emit `s{k} = expr`, evaluating first the pending expressions
+        further down the stack that still read the old s{k}"""
+        name = f"s{k}"
+        for j, value in enumerate(self.stack):
+            if j != k and name in value.deps:
+                self.materialize(j)
+        self.emit(f"{name} = {expr}")
+
+    def materialize(self, k: int) -> None:
+        value = self.stack[k]
+        if value.expr != f"s{k}":
+            self.write_slot(k, value.expr)
+            self.stack[k] = self.slot(k)
+
+    def materialize_all(self) -> None:
+        for k in range(len(self.stack)):
+            self.materialize(k)
+
+    def materialize_readers(self, name: str) -> None:
+        """Evaluate pending expressions that read `name` before it is written"""
+        for k, value in enumerate(self.stack):
+            if name in value.deps:
+                self.materialize(k)
+
+    # Instructions
+
+    def gen_body(self, instrs: List[Any]) -> None:
+        for instr in instrs:
+            if self.dead:
+                break   # dead code after br/return
+            self.gen_instruction(instr)
+
+    def gen_block_body(self, instrs: List[Any]) -> None:
+        start = len(self.lines)
+        self.gen_body(instrs)
+        if len(self.lines) == start:
+            self.emit("pass")
+
+    def gen_instruction(self, instr: Instruction) -> None:
+        if isinstance(instr, _i32_const):
+            value = parse_int(immediate(instr))
+            self.push(_Value(str(value) if value >= 0 else f"({value})"))
+        elif isinstance(instr, BinaryInstruction):
+            self.gen_binary(instr)
+        elif isinstance(instr, _i32_clz):
+            a = self.pop()
+            k = len(self.stack)
+            self.write_slot(k, f"clz({a.expr})")
+            self.push(self.slot(k))
+        elif isinstance(instr, _local_get):
+            var = self.local_vars[local_index(self.func, immediate(instr))]
+            self.push(_Value(var, frozenset((var,))))
+        elif isinstance(instr, _local_set):
+            var = self.local_vars[local_index(self.func, immediate(instr))]
+            value = self.pop()
+            self.materialize_readers(var)
+            self.emit(f"{var} = {value.expr}")
+        elif isinstance(instr, _local_tee):
+            var = self.local_vars[local_index(self.func, immediate(instr))]
+            value = self.pop()
+            self.materialize_readers(var)
+            self.emit(f"{var} = {value.expr}")
+            self.push(_Value(var, frozenset((var,))))
+        elif isinstance(instr, _global_get):
+            i = global_index(self.module, immediate(instr))
+            self.push(_Value(self.global_ref(i), frozenset(('G',))))
+        elif isinstance(instr, _global_set):
+            i = global_index(self.module, immediate(instr))
+            value = self.pop()
+            self.materialize_readers('G')
+            self.written_globals.add(self.global_ref(i))
+            self.emit(f"{self.global_ref(i)} = {value.expr}")
+        elif isinstance(instr, _i32_load):
+            address = self.pop()
+            k = len(self.stack)
+            self.gen_bounds_check(address)
+            self.write_slot(k, "unpack_from(memory, _a)[0]")
+            self.push(self.slot(k))
+        elif isinstance(instr, _i32_store):
+            value = self.pop()
+            address = self.pop()
+            self.gen_bounds_check(address)
+            self.emit(f"pack_into(memory, _a, {value.expr})")
+        elif isinstance(instr, _call):
+            self.gen_call(immediate(instr))
+        elif isinstance(instr, _return):
+            self.gen_return()
+        elif isinstance(instr, _block):
+            self.gen_block(instr)
+        elif isinstance(instr, _loop):
+            self.gen_loop(instr)
+        elif isinstance(instr, _if):
+            self.gen_if(instr)
+        elif isinstance(instr, _br):
+            self.gen_branch(self.resolve_label(label_of(immediate(instr))))
+        elif isinstance(instr, _br_if):
+            label = self.resolve_label(label_of(immediate(instr)))
+            cond = self.pop()
+            self.emit(f"if {cond.condition()}:")
+            self.indent += 1
+            self.gen_branch(label)
+            self.indent -= 1
+            self.dead = False
+        elif isinstance(instr, (_then, _else, _end)):
+            pass
+        else:
+            raise CodegenError(f"Unsupported instruction: {type(instr).__name__}")
+
+    def gen_binary(self, instr: BinaryInstruction) -> None:
+        b = self.pop()
+        a = self.pop()
+        k = len(self.stack)
+        kind = type(instr)
+        if kind in ARITHMETIC:
+            self.write_slot(k, f"{a.expr} {ARITHMETIC[kind]} {b.expr}")
+            self.emit(f"if not -2147483648 <= s{k} <= 2147483647: s{k} = wrap(s{k})")
+            self.push(self.slot(k))
+        elif kind is _i32_div_s:
+            self.write_slot(k, f"div_s({a.expr}, {b.expr})")
+            self.push(self.slot(k))
+        elif kind in SIGNED_COMPARE:
+            cond = f"{a.expr} {SIGNED_COMPARE[kind]} {b.expr}"
+            self.push(_Value(f"(1 if {cond} else 0)", a.deps | b.deps, cond))
+        elif kind in UNSIGNED_COMPARE:
+            cond = f"({a.expr} & 4294967295) {UNSIGNED_COMPARE[kind]} ({b.expr} & 4294967295)"
+            self.push(_Value(f"(1 if {cond} else 0)", a.deps | b.deps, cond))
+        else:
+            raise CodegenError(f"Unsupported binary instruction: {kind.__name__}")
+
+    def gen_bounds_check(self, address: _Value) -> None:
+        self.emit(f"_a = {address.expr}")
+        self.emit("if _a < 0 or _a > mlen4: raise RuntimeError(f'Memory access out of bounds: {_a}')")
+
+    def gen_call(self, target: Any) -> None:
+        index = function_index(self.module, target)
+        if index is None:
+            if target not in HOST_FUNCTIONS:
+                self.emit(f"raise RuntimeError('Undefined function: {target}')")
+                self.dead = True
+                return
+            value = self.pop()
+            self.materialize_all()
+            self.emit(f"log({value.expr})")
+            return
+
+        callee = self.module.funcs[index]
+        args = [self.pop() for _ in callee.params][::-1]
+        self.materialize_all()
+        # A callee defined later than its caller resolves at call time
+        call = f"{self.function_names[index]}(" + ", ".join([arg.expr for arg in args] +
+                                                           (["_depth + 1"] if self.counts_depth else [])) + ")"
+        k = len(self.stack)
+        nresults = len(callee.results)
+        if nresults == 0:
+            self.emit(call)
+        elif nresults == 1:
+            self.write_slot(k, call)
+            self.push(self.slot(k))
+        else:
+            slots = ", ".join(f"s{k + j}" for j in range(nresults))
+            self.emit(f"{slots} = {call}")
+            for j in range(nresults):
+                self.push(self.slot(k + j))
+
+    def gen_return(self) -> None:
+        nresults = len(self.func.results)
+        if nresults == 0 or not self.stack:
+            self.emit("return None")
+        elif nresults == 1:
+            self.emit(f"return {self.stack[-1].expr}")
+        else:
+            self.emit("return (" + ", ".join(v.expr for v in self.stack[-nresults:]) + ",)")
+        self.dead = True
+
+    # Structured control flow
+
+    def new_label(self, kind: str, name: Optional[str], node: Any) -> _Label:
+        label = _Label(kind, name, len(self.stack), self.next_label_id, id(node) in self.targeted)
+        self.next_label_id += 1
+        return label
+
+    def resolve_label(self, target) -> Optional[_Label]:
+        """None stands for the function body itself (a return)"""
+        if isinstance(target, int):
+            if target == len(self.labels):
+                return None
+            if target > len(self.labels):
+                raise CodegenError(f"Undefined label: {target}")
+            return self.labels[-1 - target]
+        for label in reversed(self.labels):
+            if label.name == target:
+                return label
+        raise CodegenError(f"Undefined label: {target}")
+
+    def gen_branch(self, target: Optional[_Label]) -> None:
+        if target is None:
+            self.gen_return()
+            return
+        innermost = next(label for label in reversed(self.labels) if label.python_loop)
+        if innermost is target:
+            self.emit("continue" if target.kind == 'loop' else "break")
+        else:
+            self.emit(f"_br = {target.id}")
+            self.emit("break")
+            innermost.exits_through.add(target.id)
+        self.dead = True
+
+    def open_label(self, label: _Label) -> None:
+        self.labels.append(label)
+        if label.python_loop:
+            self.emit("while True:")
+            self.indent += 1
+
+    def close_label(self, label: _Label, falls_through: bool) -> None:
+        """Leave a construct; falls_through says whether the end was reached"""
+        if label.python_loop:
+            if falls_through:
+                self.emit("break")
+            self.indent -= 1
+        self.labels.pop()
+        del self.stack[label.height:]
+        if label.python_loop and label.exits_through:
+            self.gen_exit_dispatch(label)
+
+    def gen_exit_dispatch(self, label: _Label) -> None:
+        """Continue a multi-level branch that broke out of `label`'s loop"""
+        outer = next((l for l in reversed(self.labels) if l.python_loop), None)
+        for target_id in sorted(label.exits_through):
+            self.emit(f"if _br == {target_id}:")
+            if outer is not None and outer.id == target_id:
+                self.emit("    _br = 0")
+                self.emit("    continue" if outer.kind == 'loop' else "    break")
+            else:
+                self.emit("    break")
+                outer.exits_through.add(target_id)
+
+    def gen_block(self, instr: _block) -> None:
+        name, body, _ = block_parts(instr)
+        self.materialize_all()
+        label = self.new_label('block', name, instr)
+        self.open_label(label)
+        self.gen_block_body(body)
+        falls_through = not self.dead
+        self.close_label(label, falls_through)
+        self.dead = not falls_through and not label.python_loop
+
+    def gen_loop(self, instr: _loop) -> None:
+        name, body, _ = block_parts(instr)
+        self.materialize_all()
+        label = self.new_label('loop', name, instr)
+        self.open_label(label)
+        self.gen_block_body(body)
+        falls_through = not self.dead
+        self.close_label(label, falls_through)
+        self.dead = not falls_through
+
+    def gen_if(self, instr: _if) -> None:
+        cond_instrs, then_instrs, else_instrs = split_if(instr)
+        self.gen_body(cond_instrs)
+        cond = self.pop()
+        self.materialize_all()
+        label = self.new_label('if', getattr(instr, 'name', None), instr)
+        self.open_label(label)
+        entry = list(self.stack)
+
+        self.emit(f"if {cond.condition()}:")
+        self.indent += 1
+        self.gen_block_body(then_instrs)
+        then_falls = not self.dead
+        self.indent -= 1
+        self.dead = False
+        self.stack = list(entry)
+
+        else_falls = True
+        if else_instrs:
+            self.emit("else:")
+            self.indent += 1
+            self.gen_block_body(else_instrs)
+            else_falls = not self.dead
+            self.indent -= 1
+            self.dead = False
+            self.stack = list(entry)
+
+        self.close_label(label, True)
+        self.dead = not (then_falls or else_falls or label.python_loop)
+
+# Ahead-of-time transpilation
+
+def export_names(module: Module) -> Dict[int, List[str]]:
+    """Function index -> export names, from both inline and (export ...) forms"""
+    names: Dict[int, List[str]] = {}
+    for i, func in enumerate(module.funcs):
+        for name in func.export_names:
+            names.setdefault(i, []).append(name.strip('"'))
+    for exp in module.exports:
+        if exp.isFunc and exp.exp_func is not None and exp.exp_func.name is not None:
+            index = function_index(module, exp.exp_func.name)
+            name = str(getattr(exp.value, 'value', exp.value)).strip('"')
+            if index is not None and name not in names.get(index, []):
+                names.setdefault(index, []).append(name)
+    return names
+
+def identifier(name: str) -> str:
+    """An export name as a public Python identifier"""
+    name = re.sub(r'[^0-9a-zA-Z_]', '_', name)
+    if not name or name[0].isdigit():
+        name = f"_{name}"
+    return name + "_" if keyword.iskeyword(name) or name in TRANSPILED_NAMES else name
+
+TRANSPILED_PRELUDE = '''import struct
+
+class RuntimeError(Exception):  # Custom, raised when the program traps
+    pass
+
+_I32 = struct.Struct('<i')
+unpack_from = _I32.unpack_from
+pack_into = _I32.pack_into
+
+def wrap(value):
+    return ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+def div_s(a, b):
+    if b == 0:
+        raise RuntimeError("Division by zero")
+    if a == -0x80000000 and b == -1:
+        raise RuntimeError("Integer overflow")
+    q = abs(a) // abs(b)
+    return -q if (a < 0) != (b < 0) else q
+
+def clz(a):
+    return 32 - (a & 0xFFFFFFFF).bit_length()
+
+def log(value):
+    print(f"INFO: \\nLog value : {value}")
+'''
+
+# Module attributes the transpiled code itself relies on
+TRANSPILED_NAMES = {'struct', 'RuntimeError', 'unpack_from', 'pack_into', 'wrap', 'div_s',
+                    'clz', 'log', 'memory', 'mlen4'}
+
+class ModuleTranspiler(CodeGenerator):
+    """Lowers a whole Module into a standalone, importable Python module.
+
+    Exported functions become public module-level functions named after
+    their exports, the remaining ones are `_`-prefixed. Memory is a module
+    level bytearray and globals are module attributes, so the result runs
+    without Lexer, Parser, Validator or the Interpreter.
+    """
+
+    counts_depth = False    # plain Python calls, bounded by the recursion limit
+
+    def __init__(self, module: Module, source_name: str = "<module>"):
+        super().__init__(module)
+        self.source_name = source_name
+        self.exports = export_names(module)
+        for i in range(len(module.funcs)):
+            if i in self.exports:
+                self.function_names[i] = identifier(self.exports[i][0])
+            else:
+                self.function_names[i] = "_" + self.function_names[i]
+        self.global_names = [python_name(glob.name, 'g', i) for i, glob in enumerate(module.globs)]
+
+    def global_ref(self, index: int) -> str:
+        return self.global_names[index]
+
+    def function_header(self, func: Func, index: int) -> List[str]:
+        header = super().function_header(func, index)
+        if self.written_globals:
+            header.insert(2, "    global " + ", ".join(sorted(self.written_globals)))
+        return header
+
+    def transpile(self) -> str:
+        functions = []
+        for i, func in enumerate(self.module.funcs):
+            try:
+                functions.append(self.generate_function(func, i))
+            except (CodegenError, RuntimeError) as e:
+                self.failed[i] = e.message
+        if self.failed:
+            raise CodegenError("; ".join(f"{self.module.funcs[i].name}: {message}"
+                                         for i, message in self.failed.items()))
+
+        lines = [f"# Generated by Uwasm from {self.source_name}, do not edit.",
+                 TRANSPILED_PRELUDE,
+                 f"memory = bytearray({len(initial_memory(self.module))})",
+                 "mlen4 = len(memory) - 4"]
+        for name, value in zip(self.global_names, initial_globals(self.module)):
+            lines.append(f"{name} = {value}")
+        for function in functions:
+            lines.append("")
+            lines.extend(function)
+
+        public = []
+        for i, names in sorted(self.exports.items()):
+            public.extend(identifier(name) for name in names)
+            for alias in names[1:]:
+                lines.append(f"{identifier(alias)} = {self.function_names[i]}")
+        lines.append("")
+        lines.append("__all__ = [" + ", ".join(repr(name) for name in public) + "]")
+        self.source = "\n".join(lines) + "\n"
+        return self.source
@@ -0,0 +1,140 @@
+from Lexer import (
+    Module, Func, Instruction, BinaryInstruction,
+    _i32_const, _i32_clz,
+    _local_get, _local_set, _local_tee,
+    _block, _loop, _br, _br_if, _return, _if
+)
+from Runtime import RuntimeError, BINARY_OPS, i32_clz, parse_int, immediate
+from Passes import Pass, make, make_block, local_key, assigned_locals
+from typing import List, Dict, Optional
+
+# Constant folding and propagation over canonical IR. Arithmetic and
+# comparisons whose operands are i32.const instructions right before them
+# are evaluated with the engines' own i32 helpers, so results wrap exactly
+# like at run time. Divisions that would trap are left alone. Constants
+# flow through locals in straight-line code: a local.get of a local last
+# set to a constant becomes that constant. Locals start at zero, params
+# are unknown. br_if and if with a constant condition become a br, nothing,
+# or a block holding the taken arm (the label stays the same).
+
+class ConstantFolding(Pass):
+    """Fold constant expressions and branches, propagate constants through locals"""
+
+    name = "constant-folding"
+
+    def run_function(self, func: Func, module: Module) -> int:
+        self.func = func
+        changes = sum(self.counts.values())
+        nparams = len(func.params)
+        # Known constant locals, by index
+        env = {nparams + i: 0 for i in range(len(func.locals))}
+        func.body = self.fold_body(func.body, env)
+        return sum(self.counts.values()) - changes
+
+    def fold_body(self, body: List[Instruction], env: Dict[int, int]) -> List[Instruction]:
+        """Fold a body entered with the constant locals `env`, which is
+        updated to the state on fall-through"""
+
+        out: List[Instruction] = []
+        for i, instr in enumerate(body):
+            if isinstance(instr, BinaryInstruction) and type(instr) in BINARY_OPS:
+                operands = self.constants(out, 2)
+                value = self.evaluate(instr, operands) if operands is not None else None
+                if value is not None:
+                    del out[-2:]
+                    out.append(self.constant(value))
+                    self.count("folded")
+                    continue
+            elif isinstance(instr, _i32_clz):
+                operands = self.constants(out, 1)
+                if operands is not None:
+                    out[-1] = self.constant(i32_clz(operands[0]))
+                    self.count("folded")
+                    continue
+            elif isinstance(instr, _local_get):
+                key = local_key(self.func, instr)
+                if key in env:
+                    out.append(self.constant(env[key]))
+                    self.count("propagated")
+                    continue
+            elif isinstance(instr, (_local_set, _local_tee)):
+                key = local_key(self.func, instr)
+                operands = self.constants(out, 1)
+                if operands is None:
+                    env.pop(key, None)
+                elif key is not None:
+                    env[key] = operands[0]
+                    if isinstance(instr, _local_tee):
+                        # Store, then push the constant itself so that the
+                        # instructions after it can fold it
+                        out.append(make(_local_set, *instr.operands))
+                        out.append(self.constant(operands[0]))
+                        continue
+            elif isinstance(instr, _br_if):
+                condition = self.constants(out, 1)
+                if condition is not None:
+                    del out[-1]
+                    self.count("branches folded")
+                    if condition[0] == 0:
+                        continue
+                    instr = make(_br, *instr.operands)
+            elif isinstance(instr, _if):
+                condition = self.constants(out, 1)
+                if condition is not None:
+                    del out[-1]
+                    self.count("branches folded")
+                    arm = instr.operands['then'] if condition[0] != 0 else instr.operands['else']
+                    instr = make_block(_block, instr.name, arm)
+                self.fold_arms(instr, env)
+                out.append(instr)
+                continue
+            elif isinstance(instr, (_block, _loop)):
+                self.fold_arms(instr, env)
+                out.append(instr)
+                continue
+            out.append(instr)
+            if isinstance(instr, (_br, _return)):
+                # The rest of the body is unreachable, keep it as it is
+                out.extend(body[i + 1:])
+                break
+        return out
+
+    def fold_arms(self, instr: Instruction, env: Dict[int, int]) -> None:
+        """Fold the bodies of a block, loop or if. Locals they assign are
+        unknown afterwards, branches may leave from anywhere in them."""
+
+        if isinstance(instr, _if):
+            assigned = assigned_locals(instr.operands['then'], self.func) | assigned_locals(instr.operands['else'], self.func)
+            instr.operands['then'] = self.fold_body(instr.operands['then'], dict(env))
+            instr.operands['else'] = self.fold_body(instr.operands['else'], dict(env))
+        else:
+            assigned = assigned_locals(instr.operands, self.func)
+            if isinstance(instr, _loop):
+                # Values may come around the back-edge
+                for key in assigned:
+                    env.pop(key, None)
+            instr.operands = self.fold_body(instr.operands, dict(env))
+        for key in assigned:
+            env.pop(key, None)
+
+    def constants(self, out: List[Instruction], n: int) -> Optional[List[int]]:
+        """Values of the last `n` instructions if they are all constants"""
+
+        if len(out) < n or not all(isinstance(instr, _i32_const) for instr in out[len(out) - n:]):
+            return None
+        try:
+            return [parse_int(immediate(instr)) for instr in out[len(out) - n:]]
+        except (RuntimeError, ValueError):
+            return None
+
+    def evaluate(self, instr: BinaryInstruction, operands: List[int]) -> Optional[int]:
+        """The folded value, None if evaluating it traps (division by zero,
+        overflow), the trap is left to run time"""
+
+        try:
+            return BINARY_OPS[type(instr)](*operands)
+        except RuntimeError:
+            return None
+
+    def constant(self, value: int) -> Instruction:
+        return make(_i32_const, str(value))
@@ -0,0 +1,136 @@
+from Lexer import (
+    Module, Func, Instruction,
+    _local_get, _local_set, _local_tee,
+    _br, _br_if, _return, _block, _loop, _if
+)
+from Runtime import immediate
+from Passes import Pass, arms, walk, local_key, pure_value_start
+from typing import List, Set, Optional
+import Log
+
+log = Log.get_logger("DeadCode")
+
+# Dead code and dead store elimination over canonical IR:
+#   - instructions after a br or return in the same body never run
+#   - a local.set is dead if no local.get reads the local afterwards: the
+#     local is never read at all, it is overwritten before any read in
+#     straight-line code, or the function ends first. The store goes
+#     together with the instructions computing its value, which is only
+#     possible when they have no side effects (there is no drop).
+#   - a local.tee of a local that is never read is just the value
+#   - `local.get $x local.set $x` and an if with two empty arms after a
+#     pure condition do nothing
+# Locals without any access left are removed from Func.locals, which
+# shrinks every frame of the function.
+
+CONTROL = (_block, _loop, _if, _br, _br_if, _return)
+
+class DeadCodeElimination(Pass):
+    """Remove unreachable code, dead stores and unused locals"""
+
+    name = "dead-code"
+
+    def run_function(self, func: Func, module: Module) -> int:
+        self.func = func
+        removed = 0
+        # Each round can make more stores dead, e.g. the last read of a local
+        # was part of a dead store's value
+        while True:
+            self.reads = {local_key(func, instr) for instr in walk(func.body) if isinstance(instr, _local_get)}
+            changes = self.remove_unreachable(func.body) + self.sweep(func.body, True)
+            if not changes:
+                break
+            removed += changes
+        locals_removed = self.remove_unused_locals(func)
+        if removed or locals_removed:
+            log.info("%s: removed %d instructions and %d locals", func.name, removed, locals_removed)
+        return removed + locals_removed
+
+    def remove_unreachable(self, body: List[Instruction]) -> int:
+
+        removed = 0
+        for i, instr in enumerate(body):
+            for arm in arms(instr):
+                removed += self.remove_unreachable(arm)
+            if isinstance(instr, (_br, _return)) and i + 1 < len(body):
+                unreachable = sum(1 for _ in walk(body[i + 1:]))
+                del body[i + 1:]
+                self.count("unreachable", unreachable)
+                return removed + unreachable
+        return removed
+
+    def sweep(self, body: List[Instruction], top_level: bool) -> int:
+        """Remove dead stores and no-op pairs from a body in place, from the
+        end so that removals never shift the instructions still to visit"""
+
+        removed = 0
+        i = len(body) - 1
+        while i >= 0:
+            instr = body[i]
+            for arm in arms(instr):
+                removed += self.sweep(arm, False)
+            start: Optional[int] = None
+            if isinstance(instr, _local_set):
+                key = local_key(self.func, instr)
+                if key is None:
+                    pass
+                elif i > 0 and isinstance(body[i - 1], _local_get) and local_key(self.func, body[i - 1]) == key:
+                    start = i - 1
+                    self.count("self-assignments")
+                elif key not in self.reads or self.overwritten(body, i, key, top_level):
+                    start = pure_value_start(body, i)
+                    if start is not None:
+                        self.count("dead stores")
+            elif isinstance(instr, _local_tee):
+                key = local_key(self.func, instr)
+                if key is not None and key not in self.reads:
+                    start = i
+                    self.count("dead stores")
+            elif isinstance(instr, _if) and not instr.operands['then'] and not instr.operands['else']:
+                start = pure_value_start(body, i)
+                if start is not None:
+                    self.count("empty ifs")
+            if start is None:
+                i -= 1
+                continue
+            removed += i + 1 - start
+            del body[start:i + 1]
+            i = start - 1
+        return removed
+
+    def overwritten(self, body: List[Instruction], i: int, key: int, top_level: bool) -> bool:
+        """Whether the local stored at body[i] is written again before it is
+        read, or, in the function body itself, not read again at all"""
+
+        for instr in body[i + 1:]:
+            if isinstance(instr, _local_get) and local_key(self.func, instr) == key:
+                return False
+            if isinstance(instr, (_local_set, _local_tee)) and local_key(self.func, instr) == key:
+                return True
+            if isinstance(instr, CONTROL):
+                break
+        else:
+            return top_level
+        # Past control flow, only a function body that never reads the local
+        # again is certain: no loop can bring execution back to it
+        return top_level and not any(isinstance(instr, _local_get) and local_key(self.func, instr) == key
+                                     for instr in walk(body[i + 1:]))
+
+    def remove_unused_locals(self, func: Func) -> int:
+        """Drop locals without any access. Accesses by index would shift,
+        so only functions that access all their locals by name qualify."""
+
+        accesses = [instr for instr in walk(func.body) if isinstance(instr, (_local_get, _local_set, _local_tee))]
+        if not all(self.by_name(instr) for instr in accesses):
+            return 0
+        used: Set[Optional[int]] = {local_key(func, instr) for instr in accesses}
+        nparams = len(func.params)
+        kept = [local for i, local in enumerate(func.locals) if nparams + i in used or not local.name]
+        removed = len(func.locals) - len(kept)
+        func.locals = kept
+        self.count("locals", removed)
+        return removed
+
+    def by_name(self, instr: Instruction) -> bool:
+        value = immediate(instr)
+        return isinstance(value, str) and value.startswith('$')
@@ -0,0 +1,203 @@
+from Lexer import (
+    Module, Func, Instruction,
+    _i32_const, _local_get, _local_set, _local_tee,
+    _call, _return, _br, _br_if, _block, _loop, _if
+)
+from Runtime import RuntimeError, immediate, label_of, function_index
+from Passes import Pass, make, make_block, make_if, arms, walk, local_key, add_local
+from typing import List, Dict, Set, Optional
+import Log
+
+log = Log.get_logger("Inlining")
+
+# Inlining over canonical IR. A call of a small function, or of a function
+# called from one place only, is replaced by the callee's body:
+#
+#   local.set $f_b_1          ;; arguments, last one on top
+#   local.set $f_a_1
+#   i32.const 0               ;; callee locals start at zero every time
+#   local.set $f_t_1
+#   block $inline_1
+#     ...callee body, its locals renamed to the fresh caller locals,
+#     `return` becomes `local.set $f_result_1 br $inline_1`
+#     local.set $f_result_1   ;; falling off the end
+#   end
+#   local.get $f_result_1
+#
+# A br resets the operand stack to the height of its label, so the result
+# goes through a local. Functions on a cycle of the call graph are never
+# inlined, inlined bodies are inlined into again up to `max_depth` rounds.
+
+class Inlining(Pass):
+    """Inline small and single-call-site functions"""
+
+    name = "inline"
+
+    def __init__(self, max_size: int = 20, single_site_size: int = 100, max_depth: int = 2,
+                 max_caller_size: int = 1000):
+        super().__init__()
+        self.max_size = max_size                    # instructions of any inlined callee
+        self.single_site_size = single_site_size    # of a callee with one call site
+        self.max_depth = max_depth
+        self.max_caller_size = max_caller_size
+        self.sites = 0
+
+    def run(self, module: Module) -> int:
+        self.module = module
+        self.recursive = self.recursive_functions(module)
+        self.call_sites = self.count_call_sites(module)
+        return super().run(module)
+
+    def run_function(self, func: Func, module: Module) -> int:
+        inlined = 0
+        for _ in range(self.max_depth):
+            self.caller = func
+            self.size = sum(1 for _ in walk(func.body))
+            n = self.inline_body(func.body)
+            if not n:
+                break
+            inlined += n
+        if inlined:
+            log.info("%s: inlined %d calls", func.name, inlined)
+        return inlined
+
+    def callee(self, instr: _call) -> Optional[Func]:
+        try:
+            index = function_index(self.module, immediate(instr))
+        except (RuntimeError, ValueError):
+            return None
+        return self.module.funcs[index] if index is not None else None
+
+    def count_call_sites(self, module: Module) -> Dict[int, int]:
+
+        sites: Dict[int, int] = {}
+        for func in module.funcs:
+            for instr in walk(func.body):
+                if isinstance(instr, _call):
+                    callee = self.callee(instr)
+                    if callee is not None:
+                        sites[id(callee)] = sites.get(id(callee), 0) + 1
+        return sites
+
+    def recursive_functions(self, module: Module) -> Set[int]:
+        """Functions that can reach themselves through calls"""
+
+        self.module = module
+        calls = {id(func): {id(callee) for callee in (self.callee(instr) for instr in walk(func.body)
+                                                      if isinstance(instr, _call)) if callee is not None}
+                 for func in module.funcs}
+        recursive = set()
+        for func in module.funcs:
+            seen: Set[int] = set()
+            pending = list(calls[id(func)])
+            while pending:
+                target = pending.pop()
+                if target == id(func):
+                    recursive.add(id(func))
+                    break
+                if target not in seen:
+                    seen.add(target)
+                    pending.extend(calls.get(target, ()))
+        return recursive
+
+    def inlinable(self, callee: Func) -> bool:
+
+        if id(callee) in self.recursive or len(callee.results) > 1:
+            return False
+        size = sum(1 for _ in walk(callee.body))
+        limit = self.single_site_size if self.call_sites.get(id(callee), 0) == 1 else self.max_size
+        if size > limit or self.size + size > self.max_caller_size:
+            return False
+        # Branches to the function's own label return, they cannot be
+        # redirected to the block around the inlined body
+        return not self.escapes(callee.body, [])
+
+    def escapes(self, body: List[Instruction], labels: List[Optional[str]]) -> bool:
+        """Whether a branch in `body` targets a label outside of it"""
+
+        for instr in body:
+            if isinstance(instr, (_br, _br_if)):
+                try:
+                    target = label_of(immediate(instr))
+                except (RuntimeError, ValueError):
+                    return True
+                if isinstance(target, int) and target >= len(labels):
+                    return True
+                if not isinstance(target, int) and target not in labels:
+                    return True
+            for arm in arms(instr):
+                if self.escapes(arm, labels + [instr.name]):
+                    return True
+        return False
+
+    def inline_body(self, body: List[Instruction]) -> int:
+        """Inline the qualifying calls of a body in place"""
+
+        inlined = 0
+        i = 0
+        while i < len(body):
+            instr = body[i]
+            for arm in arms(instr):
+                inlined += self.inline_body(arm)
+            callee = self.callee(instr) if isinstance(instr, _call) else None
+            if callee is None or not self.inlinable(callee):
+                i += 1
+                continue
+            code = self.expand(callee)
+            body[i:i + 1] = code
+            self.size += len(code)
+            self.count("inlined calls")
+            inlined += 1
+            i += len(code)
+        return inlined
+
+    def expand(self, callee: Func) -> List[Instruction]:
+        """The instructions replacing one call of `callee`"""
+
+        self.sites += 1
+        site = self.sites
+        prefix = (callee.name or "$func").lstrip('$')
+        variables = list(callee.params) + list(callee.locals)
+        names = [add_local(self.caller, f"${prefix}_{var.name.lstrip('$') if var.name else i}_{site}")
+                 for i, var in enumerate(variables)]
+        result = add_local(self.caller, f"${prefix}_result_{site}") if callee.results else None
+        label = f"$inline_{site}"
+
+        code: List[Instruction] = []
+        for name in reversed(names[:len(callee.params)]):
+            code.append(make(_local_set, name))
+        for name in names[len(callee.params):]:
+            code.append(make(_i32_const, '0'))
+            code.append(make(_local_set, name))
+        inner = self.copy(callee.body, callee, names, label, result)
+        if result is not None:
+            inner.append(make(_local_set, result))
+        code.append(make_block(_block, label, inner))
+        if result is not None:
+            code.append(make(_local_get, result))
+        return code
+
+    def copy(self, body: List[Instruction], callee: Func, names: List[str], label: str,
+             result: Optional[str]) -> List[Instruction]:
+        """A fresh copy of a callee body for one call site: linking quickens
+        nodes in place, so call sites cannot share them"""
+
+        code: List[Instruction] = []
+        for instr in body:
+            if isinstance(instr, _if):
+                code.append(make_if(instr.name,
+                                    self.copy(instr.operands['then'], callee, names, label, result),
+                                    self.copy(instr.operands['else'], callee, names, label, result)))
+            elif isinstance(instr, (_block, _loop)):
+                code.append(make_block(type(instr), instr.name,
+                                       self.copy(instr.operands, callee, names, label, result)))
+            elif isinstance(instr, (_local_get, _local_set, _local_tee)):
+                key = local_key(callee, instr)
+                code.append(make(type(instr), names[key]) if key is not None else make(type(instr), *instr.operands))
+            elif isinstance(instr, _return):
+                if result is not None:
+                    code.append(make(_local_set, result))
+                code.append(make(_br, label))
+            else:
+                code.append(make(type(instr), *instr.operands))
+        return code
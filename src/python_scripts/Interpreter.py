@@ -8,90 +8,518 @@ from Lexer import (
     _call, _return, _nop, _block, _loop, _br, _br_if, _if,  _else, _end,
     _i32_load, _i32_store
 )
-from typing import List, Dict, Any, Optional, Union
+from Runtime import (
+    RuntimeError, OutOfFuel, DeadlineExceeded, ExecutionSuspended, COLORS, parse_int, label_of, immediate, block_parts, split_if, flatten,
+    local_index, global_index, function_index, initial_globals, wrap_i32, i32_clz, BINARY_OPS
+)
+from typing import List, Dict, Any, Optional, Tuple, Union
 import sys
+import time
+import Log
+
+log = Log.get_logger("Interpreter")
+
+# Quickened instructions. CompiledModule.link() resolves the operands of every
+# instruction when the module is compiled and swaps the node's class
+# for one of these, with the resolved operand cached on the node. Execution
+# dispatches on the exact type and skips the decoding, name lookups and
+# isinstance chain. Instructions that fail to resolve stay generic, their
+# handler raises the error when (and if) they run, and quickens on success.
+
+class _i32_const_quick(_i32_const):
+    """Cached: value"""
+
+class _local_get_quick(_local_get):
+    """Cached: index into ExecutionContext.locals"""
+
+class _local_set_quick(_local_set):
+    """Cached: index into ExecutionContext.locals"""
+
+class _local_tee_quick(_local_tee):
+    """Cached: index into ExecutionContext.locals"""
+
+class _global_get_quick(_global_get):
+    """Cached: index into Interpreter.globals"""
+
+class _global_set_quick(_global_set):
+    """Cached: index into Interpreter.globals"""
+
+class _call_quick(_call):
+    """Cached: target Func, nparams and table, the function table the target
+    was resolved in (monomorphic inline cache)"""
+
+class _call_log_quick(_call):
+    """Call of the implicit $log host function"""
+
+class _block_quick(_block):
+    """Cached: label, body (flattened)"""
+
+class _loop_quick(_loop):
+    """Cached: label, body (flattened), cost (fuel per iteration)"""
+
+class _if_quick(_if):
+    """Cached: label, then_body, else_body (flattened)"""
+
+class _br_quick(_br):
+    """Cached: depth, the relative label depth of the target"""
 
-COLORS = {
-    'ERROR_COLOR': '\033[1;31m',
-    'WARNING_COLOR': '\033[1;33m',
-    'SUCCESS_COLOR': '\033[1;32m',
-    'INFO_COLOR': '\033[1;34m',
-    'DEBUG_COLOR': '\033[36m',
-    'HIGHLIGHT_COLOR': '\033[7;37m',
-    'RESET_COLOR': '\033[0m',
-}
+class _br_if_quick(_br_if):
+    """Cached: depth, the relative label depth of the target"""
 
-class RuntimeError(Exception):  # Custom
+# Default limit of nested guest calls, independent of Python's recursion limit
+MAX_CALL_DEPTH = 10000
+
+# Compiled code (codegen, the register tier) makes guest calls as Python
+# calls, which can also run out of Python's recursion limit first
+PYTHON_RECURSION_EXHAUSTED = "Call stack exhausted: nested calls reached Python's recursion limit"
+
+# Initial operand stack slots, the stack doubles when a call needs more
+INITIAL_STACK_SIZE = 1024
+
+class FrameLayout:
+    """Static shape of a function's frame, computed by CompiledModule.link()"""
+    
+    __slots__ = ('body', 'nparams', 'nlocals', 'zeros', 'nresults', 'max_height', 'underflows', 'cost')
     
-    def __init__(self, message, line_number=None):
-        self.message = message
-        self.line_number = line_number
-        super().__init__(f"RuntimeError: {message}" + (f" at line {line_number}" if line_number else ""))
+    def __init__(self, func: Func, body: List[Instruction]):
+        self.body = body    # in execution order
+        self.nparams = len(func.params)
+        self.nlocals = len(func.locals)
+        self.zeros = (0,) * self.nlocals
+        self.nresults = len(func.results)
+        self.max_height = 0    # operand stack slots the body needs at most
+        self.underflows = False    # some instruction can pop below the frame's operands
+        self.cost = 0          # fuel charged per call, see body_cost()
 
 class ExecutionContext:
-    def __init__(self, func: Func, caller_context=None):
-        self.func = func
-        self.locals: Dict[str, Any] = {}
-        self.return_value = None
-        self.caller_context = caller_context
+    """Frame of a tree-walked call on Interpreter.call_stack. Frames are
+    recycled through Interpreter.frame_pool, see call_function()."""
+    
+    __slots__ = ('func', 'layout', 'fp', 'stack_base', 'body', 'pc', 'node', 'height', 'labels', 'nlabels')
+    
+    def __init__(self):
+        self.func: Optional[Func] = None
+        self.layout: Optional[FrameLayout] = None
+        # Params and locals are Interpreter.stack[fp:stack_base], the
+        # operand stack of the call starts at stack_base
+        self.fp = 0
+        self.stack_base = 0
+        # Innermost label: the instructions being executed, the resume index,
+        # the block/loop/if node (None for the function body) and the
+        # operand stack height at its entry
+        self.body: List[Instruction] = []
         self.pc = 0
-        self.loops: Dict[str, Any] = {}
-        self.ifs: Dict[str, Any] = {}
-        
- 
+        self.node: Optional[Instruction] = None
+        self.height = 0
+        # Enclosing labels, saved as 4 slots each in labels[:nlabels]. The
+        # list is kept when the frame is recycled.
+        self.labels: List[Any] = []
+        self.nlabels = 0
         
     def __repr__(self):
-        return f"ExecutionContext(func={self.func.name}, locals={self.locals})"
+        return f"ExecutionContext(func={self.func.name if self.func else None}, fp={self.fp}, pc={self.pc})"
 
-class Interpreter:
-    def __init__(self, module: Module, verbose: bool = False, use_colors: bool = False):
+def quicken(instr: Instruction, quick_class: type, **cache: Any) -> None:
+    """Rewrite an instruction in place into its specialized variant"""
+    
+    instr.__dict__.update(cache)
+    instr.__class__ = quick_class
+
+def quicken_call(instr: _call, module: Module, functions: Dict[str, Func]) -> None:
+    """Quicken a call, `functions` is the table the target is cached for"""
+    
+    name = immediate(instr)
+    index = function_index(module, name)
+    if index is not None:
+        target_func = module.funcs[index]
+        quicken(instr, _call_quick, target=target_func, nparams=len(target_func.params), table=functions)
+    elif name == "$log":
+        quicken(instr, _call_log_quick)
+    else:
+        raise RuntimeError(f"Undefined function: {name}")
+
+def prepare_body(instructions: List[Instruction]) -> List[Instruction]:
+    """Execution order of a flattened body, folded if conditions included"""
+    
+    body = []
+    for instr in instructions:
+        if isinstance(instr, _if):
+            condition, _, _ = split_if(instr)
+            body.extend(prepare_body(condition))
+        body.append(instr)
+    return body
+
+def stack_effect(instr: Instruction) -> Tuple[int, int]:
+    """(pops, pushes) of a linked instruction that is not a block, loop or
+    if. Instructions that stay generic count as a push."""
+    
+    if isinstance(instr, (_i32_const, _local_get, _global_get)):
+        return 0, 1
+    if isinstance(instr, BinaryInstruction):
+        return 2, 1
+    if isinstance(instr, (_local_set, _global_set, _br_if, _call_log_quick)):
+        return 1, 0
+    if isinstance(instr, _i32_store):
+        return 2, 0
+    if isinstance(instr, (_i32_load, _i32_clz, _local_tee)):
+        return 1, 1
+    if isinstance(instr, (_br, _return, _nop)):
+        return 0, 0
+    if isinstance(instr, _call_quick):
+        return instr.nparams, len(instr.target.results)
+    return 0, 1
+
+def max_stack_height(body: List[Instruction], height: int) -> Tuple[int, int, bool]:
+    """Peak and final operand stack height of a linked body entered at
+    `height`, and whether an instruction in it pops below the frame's
+    operand stack (height 0), where the checked tree walker traps.
+    Overestimates the heights rather than underestimates them. Code after
+    a br or return is not counted, it never runs."""
+    
+    peak = height
+    underflows = False
+    for instr in body:
+        if isinstance(instr, (_block_quick, _loop_quick)):
+            inner, height, inner_underflows = max_stack_height(instr.body, height)
+            peak = max(peak, inner)
+            underflows = underflows or inner_underflows
+            continue
+        if isinstance(instr, _if_quick):
+            underflows = underflows or height < 1
+            then_peak, then_height, then_underflows = max_stack_height(instr.then_body, height - 1)
+            else_peak, else_height, else_underflows = max_stack_height(instr.else_body, height - 1)
+            peak = max(peak, then_peak, else_peak)
+            height = max(then_height, else_height)
+            underflows = underflows or then_underflows or else_underflows
+            continue
+        pops, pushes = stack_effect(instr)
+        underflows = underflows or height < pops
+        height += pushes - pops
+        peak = max(peak, height)
+        if isinstance(instr, (_br, _return)):
+            break
+    return peak, height, underflows
+
+def body_cost(body: List[Instruction]) -> int:
+    """Fuel for one pass over a linked body: one unit per instruction,
+    including nested blocks, the longer arm of an if and the first
+    iteration of a nested loop. Sets the cost of every nested loop, which
+    is charged again at each of its back-edges."""
+    
+    cost = 0
+    for instr in body:
+        cost += 1
+        if isinstance(instr, _loop_quick):
+            instr.cost = body_cost(instr.body)
+            cost += instr.cost
+        elif isinstance(instr, _block_quick):
+            cost += body_cost(instr.body)
+        elif isinstance(instr, _if_quick):
+            cost += max(body_cost(instr.then_body), body_cost(instr.else_body))
+    return cost
+
+class CompiledModule:
+    """A Module resolved once for execution: the linked function bodies,
+    their frame layouts and the initial memory size and globals. It holds
+    no execution state and is shared by every Instance created from it."""
+    
+    def __init__(self, module: Module):
         self.module = module
-        self.verbose = verbose
-        self.use_colors = use_colors
+        self.functions: Dict[str, Func] = {func.name: func for func in module.funcs if func.name}
         
-        # Runtime state
-        self.stack: List[Any] = []
-        self.globals: Dict[str, Any] = {}
-        self.memory: bytearray = bytearray()
+        # 1 page = 64KB
+        self.memory_size = 0
+        for mem in module.mems:
+            if mem.value and hasattr(mem.value, 'value'):
+                self.memory_size = int(mem.value.value) * 65536
+        log.info("Memory of %d bytes", self.memory_size)
+        
+        # One slot per global, global.get/global.set are linked to the index
+        self.globals: Tuple[Any, ...] = tuple(initial_globals(module))
+        for glob, value in zip(module.globs, self.globals):
+            log.info("Global %s = %s", glob.name, value)
+        
+        # Frame layouts, by id(Func)
+        self.layouts: Dict[int, FrameLayout] = {}
+        self.link()
+        self.code_generator: Optional[Any] = None
+    
+    def link(self) -> None:
+        """Resolve every function once before execution: locals and globals
+        to indices, calls to their Func, branches to label depths and
+        immediates to ints. Unresolvable instructions stay generic."""
+        
+        for func in self.module.funcs:
+            body = prepare_body(flatten(func.body))
+            self.layouts[id(func)] = FrameLayout(func, body)
+            self.link_body(body, func, [])
+        for layout in self.layouts.values():
+            layout.max_height, _, layout.underflows = max_stack_height(layout.body, 0)
+            layout.cost = body_cost(layout.body)
+    
+    def link_body(self, body: List[Instruction], func: Func, labels: List[Any]) -> None:
+        
+        for instr in body:
+            try:
+                self.link_instruction(instr, func, labels)
+            except (RuntimeError, ValueError) as e:
+                log.debug("%s in %s left unlinked: %s", type(instr).__name__, func.name, e)
+    
+    def link_instruction(self, instr: Instruction, func: Func, labels: List[Any]) -> None:
+        """Quicken one instruction, `labels` are the enclosing label names"""
+        
+        if isinstance(instr, _i32_const):
+            quicken(instr, _i32_const_quick, value=parse_int(immediate(instr)))
+        elif isinstance(instr, _local_get):
+            quicken(instr, _local_get_quick, index=local_index(func, immediate(instr)))
+        elif isinstance(instr, _local_set):
+            quicken(instr, _local_set_quick, index=local_index(func, immediate(instr)))
+        elif isinstance(instr, _local_tee):
+            quicken(instr, _local_tee_quick, index=local_index(func, immediate(instr)))
+        elif isinstance(instr, _global_get):
+            quicken(instr, _global_get_quick, index=global_index(self.module, immediate(instr)))
+        elif isinstance(instr, _global_set):
+            quicken(instr, _global_set_quick, index=global_index(self.module, immediate(instr)))
+        elif isinstance(instr, _call):
+            quicken_call(instr, self.module, self.functions)
+        elif isinstance(instr, (_block, _loop)):
+            label, body, _ = block_parts(instr)
+            body = prepare_body(body)
+            quicken(instr, _loop_quick if isinstance(instr, _loop) else _block_quick, label=label, body=body)
+            self.link_body(body, func, labels + [label])
+        elif isinstance(instr, _if):
+            _, then_body, else_body = split_if(instr)
+            label = getattr(instr, 'name', None)
+            then_body, else_body = prepare_body(then_body), prepare_body(else_body)
+            quicken(instr, _if_quick, label=label, then_body=then_body, else_body=else_body)
+            self.link_body(then_body, func, labels + [label])
+            self.link_body(else_body, func, labels + [label])
+        elif isinstance(instr, (_br, _br_if)):
+            target = label_of(immediate(instr))
+            if isinstance(target, int):
+                depth = target
+            elif target in labels:
+                depth = labels[::-1].index(target)
+            else:
+                depth = len(labels) + 1    # not found
+            if depth > len(labels):
+                raise RuntimeError(f"Undefined label: {target}")
+            quicken(instr, _br_if_quick if isinstance(instr, _br_if) else _br_quick, depth=depth)
+    
+    def generate_code(self) -> Any:
+        """The module translated to Python source, see Codegen.py"""
+        
+        if self.code_generator is None:
+            # Imported here, Codegen depends on this module
+            from Codegen import CodeGenerator
+            self.code_generator = CodeGenerator(self.module)
+            self.code_generator.generate_module()
+        return self.code_generator
+
+class Instance:
+    """Mutable state of one instantiation of a CompiledModule: the operand
+    stack, the call stack, globals and memory. The code and its metadata
+    stay in the CompiledModule, so creating an Instance only allocates."""
+    
+    def __init__(self, compiled: CompiledModule):
+        self.compiled_module = compiled
+        self.module = compiled.module
+        self.functions = compiled.functions
+        self.layouts = compiled.layouts
+        
+        # Runtime state, stack[:sp] is in use
+        self.stack: List[Any] = [0] * INITIAL_STACK_SIZE
+        self.sp = 0
         self.call_stack: List[ExecutionContext] = []
         self.current_context: Optional[ExecutionContext] = None
+        self.frame_pool: List[ExecutionContext] = []
+        self.initialize_memory()
+        self.initialize_globals()
+    
+    def initialize_memory(self):
         
-        # Function lookup table
-        self.functions: Dict[str, Func] = {}
+        self.memory: bytearray = bytearray(self.compiled_module.memory_size)
+    
+    def initialize_globals(self):
         
-        # print(f"Init Interpreter : {module.funcs}")
-        for func in module.funcs:
-            if func.name:
-                self.functions[func.name] = func
+        self.globals: List[Any] = list(self.compiled_module.globals)
+
+class Interpreter(Instance):
+    """Tree-walking interpreter. It is an Instance, the code it executes is
+    shared through its CompiledModule: pass a CompiledModule to create
+    another instance of the same module without compiling it again."""
+    
+    def __init__(self, module: Union[Module, CompiledModule], verbose: bool = False, use_colors: bool = False,
+                 codegen: bool = False, max_call_depth: int = MAX_CALL_DEPTH, trusted: bool = False,
+                 fuel: Optional[int] = None, timeout: Optional[float] = None):
+        Instance.__init__(self, module if isinstance(module, CompiledModule) else CompiledModule(module))
+        # Per-instruction tracing, only worth its cost when it is logged
+        self.verbose = verbose and log.isEnabledFor(Log.DEBUG)
+        self.use_colors = use_colors
+        self.max_call_depth = max_call_depth
+        # Nested calls running in compiled code, which are not on call_stack
+        self.compiled_depth = 0
+        # Entry function and stack height of the running execute_function
+        self.entry: Optional[Tuple[Func, int]] = None
+        self.fuel_used = 0
+        self.checkpoint_path: Optional[str] = None
+        self.set_limits(fuel, timeout)
+        self.set_checkpointing(None)
         
-        self.initialize_memory()
+        # Handlers by exact node type: the quickened instructions and the
+        # ones that need no resolution
+        self.quick_handlers = {
+            _i32_const_quick: self.execute_i32_const_quick,
+            _local_get_quick: self.execute_local_get_quick,
+            _local_set_quick: self.execute_local_set_quick,
+            _local_tee_quick: self.execute_local_tee_quick,
+            _global_get_quick: self.execute_global_get_quick,
+            _global_set_quick: self.execute_global_set_quick,
+            _call_quick: self.execute_call_quick,
+            _call_log_quick: self.execute_call_log_quick,
+            _block_quick: self.enter_block,
+            _loop_quick: self.enter_loop,
+            _if_quick: self.enter_if,
+            _br_quick: self.execute_br_quick,
+            _br_if_quick: self.execute_br_if_quick,
+            _i32_clz: self.execute_i32_clz,
+            _i32_load: self.execute_i32_load,
+            _i32_store: self.execute_i32_store,
+            _return: self.execute_return,
+        }
+        for binary in (_i32_add, _i32_sub, _i32_mul, _i32_div_s, _i32_ge_u, _i32_gt_s, _i32_lt_s, _i32_lt_u):
+            self.quick_handlers[binary] = self.execute_binary_instruction
         
-        self.initialize_globals()
+        # A trusted module passed the Validator, and link() found no
+        # instruction popping below its frame's operands, so its operand
+        # stack cannot underflow: quickened nodes go to handlers without the
+        # stack check, and there is no per-instruction error wrapping. Traps
+        # (memory bounds, division by zero, ...) still raise.
+        self.trusted = trusted
+        if trusted:
+            for func in self.module.funcs:
+                if self.layouts[id(func)].underflows:
+                    raise RuntimeError(f"Cannot run {func.name} unchecked: its operand stack can underflow")
+            self.quick_handlers.update({
+                _local_set_quick: self.execute_local_set_trusted,
+                _local_tee_quick: self.execute_local_tee_trusted,
+                _global_set_quick: self.execute_global_set_trusted,
+                _call_quick: self.execute_call_trusted,
+                _call_log_quick: self.execute_call_log_trusted,
+                _if_quick: self.enter_if_trusted,
+                _br_if_quick: self.execute_br_if_trusted,
+                _i32_clz: self.execute_i32_clz_trusted,
+                _i32_load: self.execute_i32_load_trusted,
+                _i32_store: self.execute_i32_store_trusted,
+            })
+            for binary in BINARY_OPS:
+                self.quick_handlers[binary] = self.execute_binary_trusted
+            self.execute_instruction = self.execute_unchecked
+        
+        # Functions translated to Python source, see Codegen.py
+        self.codegen_functions: Dict[Func, Any] = {}
+        self.codegen_source: Optional[str] = None
+        if codegen:
+            self.initialize_codegen()
+    
+    def set_limits(self, fuel: Optional[int] = None, timeout: Optional[float] = None) -> None:
+        """Bound the tree-walked execution: `fuel` units in total (about one
+        per instruction, see body_cost) and `timeout` seconds per call of
+        execute_function. Both are checked at loop back-edges and calls
+        only, exhausting them raises OutOfFuel or DeadlineExceeded. Code
+        compiled by codegen is not metered, metered calls stay interpreted."""
+        
+        self.fuel = fuel
+        self.timeout = timeout
+        self.deadline: Optional[float] = None
+        self.update_metering()
+    
+    def set_checkpointing(self, path: Optional[str], every: Optional[int] = None) -> None:
+        """Write checkpoints of the tree-walked execution to `path`, every
+        `every` fuel units and on request_checkpoint(), at the next loop
+        back-edge or call. resume() continues from the file, see
+        Checkpoint.py."""
+        
+        self.checkpoint_path = path
+        self.checkpoint_every = every
+        self.next_checkpoint = self.fuel_used + every if every else None
+        self.checkpoint_requested = False
+        self.stop_requested = False
+        self.update_metering()
+    
+    def update_metering(self) -> None:
+        
+        self.metered = self.fuel is not None or self.timeout is not None or self.checkpoint_path is not None
+    
+    def request_checkpoint(self, stop: bool = False) -> None:
+        """Checkpoint at the next back-edge or call, then raise
+        ExecutionSuspended if `stop`. Safe to call from a signal handler."""
+        
+        self.checkpoint_requested = True
+        self.stop_requested = self.stop_requested or stop
+    
+    def charge(self, cost: int) -> None:
+        """Consume the fuel of a loop iteration or call, check the deadline
+        and take a checkpoint when one is due"""
+        
+        self.fuel_used += cost
+        if self.fuel is not None:
+            self.fuel -= cost
+            if self.fuel < 0:
+                self.fuel = 0
+                raise OutOfFuel("Out of fuel")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise DeadlineExceeded(f"Deadline of {self.timeout}s exceeded")
+        if self.checkpoint_path is not None and (
+                self.checkpoint_requested or (self.next_checkpoint is not None and self.fuel_used >= self.next_checkpoint)):
+            self.write_checkpoint()
+    
+    def write_checkpoint(self) -> None:
+        
+        # Imported here, Checkpoint depends on this module
+        from Checkpoint import capture, save
+        
+        save(capture(self), self.checkpoint_path)
+        log.info("Checkpoint after %d fuel units written to %s", self.fuel_used, self.checkpoint_path)
+        self.checkpoint_requested = False
+        if self.checkpoint_every:
+            self.next_checkpoint = self.fuel_used + self.checkpoint_every
+        if self.stop_requested:
+            self.stop_requested = False
+            raise ExecutionSuspended(f"Suspended, checkpoint written to {self.checkpoint_path}")
+    
+    def resume(self, path: str) -> Any:
+        """Continue an execution from a checkpoint, written by this or any
+        other process running the same module. Returns what the original
+        execute_function call would have."""
+        
+        from Checkpoint import load, restore
+        
+        restore(self, load(path))
+        func, height = self.entry
+        if self.timeout is not None:
+            self.deadline = time.monotonic() + self.timeout
+        try:
+            self.run_frames(0)
+        except Exception:
+            self.unwind(height, 0)
+            raise
+        return self.pop_result(func, height)
     
     def _colorize(self, text: str, color_key: str) -> str:
         if self.use_colors and color_key in COLORS:
             return f"{COLORS[color_key]}{text}{COLORS['RESET_COLOR']}"
         return text
     
-    def initialize_memory(self):
+    def operand_stack(self) -> List[Any]:
+        """The values currently on the operand stack"""
         
-        for mem in self.module.mems:
-            if mem.value and hasattr(mem.value, 'value'):
-                # Convert pages to bytes (1 page = 64KB)
-                pages = int(mem.value.value)
-                self.memory = bytearray(pages * 65536)
-                if self.verbose:
-                    print(self._colorize(f"INFO: ", 'INFO_COLOR') + 
-                          f"Initialized memory with {pages} pages ({len(self.memory)} bytes)")
+        return self.stack[:self.sp]
     
-    def initialize_globals(self):
+    def ensure_capacity(self, size: int) -> None:
         
-        for glob in self.module.globs:
-            if glob.name and glob.value:
-                self.globals[glob.name] = int(glob.value)
-                if self.verbose:
-                    print(self._colorize(f"INFO: ", 'INFO_COLOR') + 
-                          f"Initialized global {glob.name} = {glob.value}")
+        if size > len(self.stack):
+            self.stack.extend([0] * max(size - len(self.stack), len(self.stack)))
     
     def execute(self) -> Optional[Any]:
         """Main execution entry point"""
@@ -103,14 +531,14 @@ class Interpreter:
             elif self.module.funcs:
                 return self.execute_function(self.module.funcs[0])
             else:
-                print(self._colorize("WARNING: ", 'WARNING_COLOR') + "No functions to execute")
+                log.warning("No functions to execute")
                 return None
                 
         except RuntimeError as e:
-            print(self._colorize("RUNTIME ERROR: ", 'ERROR_COLOR') + str(e))
+            log.error("Runtime error: %s", e)
             return None
         except Exception as e:
-            print(self._colorize("INTERNAL ERROR: ", 'ERROR_COLOR') + str(e))
+            log.error("Internal error: %s", e)
             return None
     
     def find_exported_function(self) -> Optional[Func]:
@@ -123,103 +551,227 @@ class Interpreter:
         raise RuntimeError(f"Nothing returned in find_exported_function()")
         return None
     
+    def initialize_codegen(self):
+        
+        # The source is generated and compiled once per CompiledModule,
+        # each instance binds it to its own memory and globals
+        generator = self.compiled_module.generate_code()
+        self.codegen_source = generator.source
+        
+        def call_fallback(index, args, depth):
+            # The compiled callers of this call are not on call_stack
+            outer = self.compiled_depth
+            self.compiled_depth = depth - 1 - len(self.call_stack)
+            try:
+                return self.execute_function(self.module.funcs[index].name, args)
+            finally:
+                self.compiled_depth = outer
+        
+        compiled = generator.instantiate(self.memory, self.globals, call_fallback, self.max_call_depth, self.use_colors)
+        for func, function in zip(self.module.funcs, compiled):
+            if function is not None:
+                self.codegen_functions[func] = function
+        
+        log.info("Generated Python source for %d of %d functions", len(self.codegen_functions), len(self.module.funcs))
+        for index, message in generator.failed.items():
+            log.info("Function %s stays interpreted: %s", self.module.funcs[index].name, message)
+    
     def execute_function(self, func_name: str, args: List[Any] = None) -> Any:
         
         if args is None:
             args = []
+        if isinstance(func_name, Func):
+            func_name = func_name.name
+        args = [wrap_i32(int(a)) for a in args]
         
         func = Func()
         for f in self.module.funcs:
             if f.name == func_name:
                 func = f
-                
-        print("execute_function args: " + str(args))
-        print("execute_function name: " + str(func.name))
-        print("execute_function export_names: " + str(func.export_names))
-        print("execute_function params: " + str(func.params))
         
-        print("execute_function results: " + str(func.results))
-        print("execute_function locals: " + str(func.locals))
-        print("execute_function body: " + str(func.body[0] if func.body else "None "))
+        return self.invoke(func, args)
+    
+    def invoke(self, func: Func, args: List[Any]) -> Any:
+        """Call an already resolved function and run it to completion"""
+        
+        layout = self.layouts.get(id(func))
+        if layout is None:
+            raise RuntimeError(f"Undefined function: {func.name}")
+        if len(args) != layout.nparams:
+            raise RuntimeError(f"Function {func.name} expects {layout.nparams} arguments, got {len(args)}")
         
-        # Validate arguments
-        if len(args) != len(func.params):
-            raise RuntimeError(f"Function {func.name} expects {len(func.params)} arguments, got {len(args)}")
+        height = self.sp
+        depth = len(self.call_stack)
+        if not depth:
+            self.entry = (func, height)
+            if self.timeout is not None:
+                self.deadline = time.monotonic() + self.timeout
+        self.ensure_capacity(height + len(args) + 1)
+        self.stack[height:height + len(args)] = args
+        self.sp = height + len(args)
+        try:
+            if self.call_function(func) is not None:
+                self.run_frames(depth)
+        except Exception:
+            self.unwind(height, depth)
+            raise
+        return self.pop_result(func, height)
+    
+    def unwind(self, height: int, depth: int) -> None:
+        """Drop the frames and operands of a call that raised"""
+        
+        while len(self.call_stack) > depth:
+            self.frame_pool.append(self.call_stack.pop())
+        self.sp = height
+        self.current_context = self.call_stack[-1] if self.call_stack else None
+    
+    def pop_result(self, func: Func, height: int) -> Any:
+        
+        result = self.stack[self.sp - 1] if self.sp > height else None
+        self.sp = height
+        if self.verbose:
+            log.debug("Function %s returned %s", func.name, result)
+        return result
+    
+    def call_function(self, func: Func) -> Optional[ExecutionContext]:
+        """Push the frame of a call whose arguments are on top of the operand
+        stack. A call that completes right away (e.g. a function compiled
+        by codegen) pushes its result and returns None."""
+        
+        layout = self.layouts[id(func)]
+        fp = self.sp - layout.nparams
+        
+        compiled = self.codegen_functions.get(func)
+        if compiled is not None and not self.metered:
+            try:
+                result = compiled(*self.stack[fp:self.sp], len(self.call_stack) + self.compiled_depth + 1)
+            except RecursionError:
+                raise RuntimeError(PYTHON_RECURSION_EXHAUSTED) from None
+            self.sp = fp
+            if result is not None:
+                self.stack[fp] = result
+                self.sp = fp + 1
+            return None
+        
+        if len(self.call_stack) + self.compiled_depth >= self.max_call_depth:
+            raise RuntimeError(f"Call stack exhausted: more than {self.max_call_depth} nested calls")
+        
+        # The arguments become the first locals in place, the declared
+        # locals follow initialized to 0
+        stack_base = self.sp + layout.nlocals
+        if stack_base + layout.max_height + 1 > len(self.stack):
+            self.ensure_capacity(stack_base + layout.max_height + 1)
+        self.stack[self.sp:stack_base] = layout.zeros
+        
+        context = self.frame_pool.pop() if self.frame_pool else ExecutionContext()
+        context.func = func
+        context.layout = layout
+        context.fp = fp
+        context.stack_base = stack_base
+        context.body = layout.body
+        context.pc = 0
+        context.node = None
+        context.height = stack_base
+        context.nlabels = 0
+        self.sp = stack_base
+        
+        if self.verbose:
+            log.debug("Executing function %s with args %s", func.name, self.stack[fp:fp + layout.nparams])
         
-        # Create execution context
-        context = ExecutionContext(func)
         self.call_stack.append(context)
         self.current_context = context
+        if self.metered:
+            # After the push, a checkpoint taken here resumes in the callee
+            self.charge(layout.cost)
+        return context
+    
+    def return_from(self, context: ExecutionContext) -> None:
+        """Pop a finished frame, its results replace its locals and operands"""
         
-        # Initialize parameters as locals
-        for i, param in enumerate(func.params):
-            # print(f"param : {param}")
-            if param.name is not None:
-                # print(f"param.name : {param.name}")
-                context.locals[param.name] = args[i] 
-            else:
-                
-                context.locals[i] = args[i]
-            # context.locals[param.name] = args[i]
-        # Initialize Default i32 value (0)
-        # # param & local together
-        # for param in func.params:
-        #     self.locals[param.name] = 0  
-        for i, local in enumerate(func.locals):
-            # print(f"local : {local}")
-            if local.name is not None:
-                # print(f"local.name : {local.name}")
-                context.locals[local.name] = 0 
-            else:
-                context.locals[len(func.params) + i] = 0 
-                
-        # print(f"locals : {context.locals}")
-            
-        if self.verbose:
-            print(self._colorize(f"DEBUG: ", 'DEBUG_COLOR') + 
-                  f"Executing function {func.name} with args {args}")
+        stack = self.stack
+        sp = self.sp
+        fp = context.fp
+        nresults = min(context.layout.nresults, sp - context.stack_base)
+        if nresults == 1:
+            stack[fp] = stack[sp - 1]
+        elif nresults > 1:
+            stack[fp:fp + nresults] = stack[sp - nresults:sp]
+        self.sp = fp + max(nresults, 0)
         
-        # Execute  body
-        try:
-            result = self.execute_instructions(func.body, context)
-            print("Result in execute_function : " + str(result))
-            self.call_stack.pop()
-            if self.call_stack:
-                self.current_context = self.call_stack[-1]
+        self.call_stack.pop()
+        self.frame_pool.append(context)
+        self.current_context = self.call_stack[-1] if self.call_stack else None
+    
+    def push_label(self, context: ExecutionContext, body: List[Instruction], node: Instruction) -> None:
+        """Enter a block/loop/if body, saving the current label"""
+        
+        labels = context.labels
+        n = context.nlabels
+        if len(labels) < n + 4:
+            labels.extend((None, None, None, None))
+        labels[n] = context.body
+        labels[n + 1] = context.pc
+        labels[n + 2] = context.node
+        labels[n + 3] = context.height
+        context.nlabels = n + 4
+        context.body = body
+        context.pc = 0
+        context.node = node
+        context.height = self.sp
+    
+    def restore_label(self, context: ExecutionContext, n: int) -> None:
+        """Make the label saved at labels[n] current, dropping the ones above"""
+        
+        labels = context.labels
+        context.body = labels[n]
+        context.pc = labels[n + 1]
+        context.node = labels[n + 2]
+        context.height = labels[n + 3]
+        context.nlabels = n
+    
+    def run_frames(self, depth: int) -> None:
+        """Execute frames until the call stack is back to `depth` frames.
+        Calls push a frame and returns pop one, so guest recursion does
+        not recurse in Python."""
+        
+        call_stack = self.call_stack
+        execute_instruction = self.execute_instruction
+        while len(call_stack) > depth:
+            context = call_stack[-1]
+            pc = context.pc
+            body = context.body
+            if pc < len(body):
+                context.pc = pc + 1
+                instr = body[pc]
+                if self.verbose:
+                    log.debug("Executing: %s, Stack: %s", type(instr).__name__, self.operand_stack())
+                execute_instruction(instr, context)
+            elif context.nlabels:
+                # Falls through the end of a block/loop/if
+                self.restore_label(context, context.nlabels - 4)
             else:
-                self.current_context = None
-            return result
-        except Exception as e:
-            self.call_stack.pop()
-            raise e
-    
-    def execute_instructions(self, instructions: List[Instruction], context: ExecutionContext) -> Any:
-        
-        for instr in instructions:
-            if self.verbose:
-                print(self._colorize(f"DEBUG: ", 'DEBUG_COLOR') + 
-                      f"Executing: {type(instr).__name__}, Stack: {self.stack}")
-            
-            result = self.execute_instruction(instr, context)
-            print("Result in execute_instructions : " + str(result))
-            if result is not None:  # Return value from function
-                return result
-
-        # raise RuntimeError(f"Nothing returned in execute_instructions()")
-        return None
+                self.return_from(context)
     
     def execute_instruction(self, instr: Instruction, context: ExecutionContext) -> Any:
         
         try:
+            handler = self.quick_handlers.get(type(instr))
+            if handler is not None:
+                return handler(instr, context)
             if isinstance(instr, _i32_const):
                 return self.execute_i32_const(instr)
             elif isinstance(instr, BinaryInstruction):
                 return self.execute_binary_instruction(instr)
             elif isinstance(instr, _local_get):
-                print("local.get in execute_instruction")
                 return self.execute_local_get(instr, context)
             elif isinstance(instr, _local_set):
                 return self.execute_local_set(instr, context)
+            elif isinstance(instr, _local_tee):
+                return self.execute_local_tee(instr, context)
+            elif isinstance(instr, _global_get):
+                return self.execute_global_get(instr, context)
+            elif isinstance(instr, _global_set):
+                return self.execute_global_set(instr, context)
             elif isinstance(instr, _call):
                 return self.execute_call(instr, context)
             elif isinstance(instr, _return):
@@ -228,6 +780,8 @@ class Interpreter:
                 return self.execute_nop()
             elif isinstance(instr, ControlFlowInstruction):
                 return self.execute_control_flow(instr, context)
+            elif isinstance(instr, _i32_clz):
+                return self.execute_i32_clz(instr)
             elif isinstance(instr, _i32_load):
                 return self.execute_i32_load(instr)
             elif isinstance(instr, _i32_store):
@@ -240,139 +794,160 @@ class Interpreter:
         except Exception as e:
             raise RuntimeError(f"Error executing {type(instr).__name__}: {str(e)}")
     
+    def execute_unchecked(self, instr: Instruction, context: ExecutionContext) -> Any:
+        """execute_instruction() for trusted modules, without the error wrapping"""
+        
+        handler = self.quick_handlers.get(type(instr))
+        if handler is not None:
+            return handler(instr, context)
+        # Generic instructions resolve and quicken themselves
+        return Interpreter.execute_instruction(self, instr, context)
+    
     def execute_i32_const(self, instr: _i32_const) -> None:
         
-        if hasattr(instr, 'operands') and instr.operands:
-            value = int(instr.operands[0])
-            self.stack.append(value)
-            if self.verbose:
-                print(self._colorize(f"DEBUG: ", 'DEBUG_COLOR') + f"Pushed constant: {value}")
+        quicken(instr, _i32_const_quick, value=parse_int(immediate(instr)))
+        self.execute_i32_const_quick(instr, self.current_context)
+    
+    def execute_i32_const_quick(self, instr: _i32_const_quick, context: ExecutionContext) -> None:
+        
+        sp = self.sp
+        self.stack[sp] = instr.value
+        self.sp = sp + 1
+        if self.verbose:
+            log.debug("Pushed constant: %s", instr.value)
     
-    def execute_binary_instruction(self, instr: BinaryInstruction) -> None:
+    def execute_binary_instruction(self, instr: BinaryInstruction, context: Optional[ExecutionContext] = None) -> None:
         
         self.check_stack_size(2, instr)
         
-        b = self.stack.pop()
-        a = self.stack.pop()
-        
-        print(str(type(instr)))
-        print(f"instr : {instr} in execute_binary_instruction")
-        
-        print(f"a : {a}, b : {b} in execute_binary_instruction")
-        if isinstance(instr, _i32_add):
-            result = a + b
-        elif isinstance(instr, _i32_sub):
-            result = a - b
-        elif isinstance(instr, _i32_mul):
-            result = a * b
-        elif isinstance(instr, _i32_div_s):
-            if b == 0:
-                raise RuntimeError("Division by zero")
-            result = a // b
-        elif isinstance(instr, _i32_ge_u):
-            result = 1 if a >= b else 0
-        elif isinstance(instr, _i32_gt_s):
-            result = 1 if a > b else 0
-        elif isinstance(instr, _i32_lt_s):
-            result = 1 if a < b else 0
-        elif isinstance(instr, _i32_lt_u):
-            result = 1 if a < b else 0
-        else:
+        stack = self.stack
+        sp = self.sp - 1
+        b = stack[sp]
+        a = stack[sp - 1]
+
+        # The i32 semantics every engine shares: wrapping arithmetic,
+        # truncating division, unsigned compares on the two's complement
+        op = BINARY_OPS.get(type(instr))
+        if op is None:
             raise RuntimeError(f"Unsupported binary instruction: {type(instr).__name__}")
+        result = op(a, b)
         
-        self.stack.append(result)
+        stack[sp - 1] = result
+        self.sp = sp
         if self.verbose:
-            print(self._colorize(f"DEBUG: ", 'DEBUG_COLOR') + f"{type(instr).__name__}: {a} op {b} = {result}")
+            log.debug("%s: %s op %s = %s", type(instr).__name__, a, b, result)
+    
+    def execute_i32_clz(self, instr: _i32_clz, context: Optional[ExecutionContext] = None) -> None:
+        
+        self.check_stack_size(1, instr)
+        a = self.stack[self.sp - 1]
+        result = self.stack[self.sp - 1] = i32_clz(a)
+        if self.verbose:
+            log.debug("i32.clz: %s = %s", a, result)
     
     def execute_local_get(self, instr: _local_get, context: ExecutionContext) -> None:
         
-        print(f"instr : {instr} with operands : {instr.operands} in execute_local_get : ")
-        if hasattr(instr, 'operands') and instr.operands:
-            local_name = instr.operands[0]
-            print(f"type(local_name) : {type(local_name)}")
-            if local_name.startswith("$") and local_name in context.locals:
-                value = context.locals[local_name]
-                self.stack.append(value)
-                if self.verbose:
-                    print(self._colorize(f"DEBUG: ", 'DEBUG_COLOR') + f"Pushed local {local_name}: {value}")
-            elif int(local_name) < len(context.locals):
-                print(context.locals)
-                print(list(context.locals))
-                value = context.locals[list(context.locals)[int(local_name)]]
-                self.stack.append(value)
-                if self.verbose:
-                    print(self._colorize(f"DEBUG: ", 'DEBUG_COLOR') + f"Pushed local {local_name}: {value}")
-            
-            else:
-                raise RuntimeError(f"Undefined local variable: {local_name}")
+        quicken(instr, _local_get_quick, index=local_index(context.func, immediate(instr)))
+        self.execute_local_get_quick(instr, context)
+    
+    def execute_local_get_quick(self, instr: _local_get_quick, context: ExecutionContext) -> None:
+        
+        sp = self.sp
+        value = self.stack[sp] = self.stack[context.fp + instr.index]
+        self.sp = sp + 1
+        if self.verbose:
+            log.debug("Pushed local %d: %s", instr.index, value)
     
     def execute_local_set(self, instr: _local_set, context: ExecutionContext) -> None:
         
+        quicken(instr, _local_set_quick, index=local_index(context.func, immediate(instr)))
+        self.execute_local_set_quick(instr, context)
+    
+    def execute_local_set_quick(self, instr: _local_set_quick, context: ExecutionContext) -> None:
+        
         self.check_stack_size(1, instr)
+        sp = self.sp - 1
+        value = self.stack[context.fp + instr.index] = self.stack[sp]
+        self.sp = sp
+        if self.verbose:
+            log.debug("Set local %d = %s", instr.index, value)
+    
+    def execute_local_tee(self, instr: _local_tee, context: ExecutionContext) -> None:
         
-        if hasattr(instr, 'operands') and instr.operands:
-            local_name = instr.operands[0]
-            value = self.stack.pop()
-            context.locals[local_name] = value
-            if self.verbose:
-                print(self._colorize(f"DEBUG: ", 'DEBUG_COLOR') + f"Set local {local_name} = {value}")
+        quicken(instr, _local_tee_quick, index=local_index(context.func, immediate(instr)))
+        self.execute_local_tee_quick(instr, context)
     
-    def execute_call(self, instr: _call, context: ExecutionContext) -> Any:
+    def execute_local_tee_quick(self, instr: _local_tee_quick, context: ExecutionContext) -> None:
         
-        if context.pc < 0:
-            return
+        self.check_stack_size(1, instr)
+        value = self.stack[context.fp + instr.index] = self.stack[self.sp - 1]
+        if self.verbose:
+            log.debug("Set local %d = %s", instr.index, value)
+    
+    def execute_global_get(self, instr: _global_get, context: ExecutionContext) -> None:
         
-        if hasattr(instr, 'operands') and instr.operands:
-            func_name = instr.operands[0]
-            print(self._colorize(f"func_name : ", 'ERROR_COLOR') + f"[{func_name}]")
-            
-            func_index = None
-            for i, func_id in enumerate(self.functions):
-                # print(self._colorize(f"func_id : ", 'ERROR_COLOR') + f"[{func_id}]")
-                
-                if func_name.value == func_id:
-                    func_index = i
-            if func_index is not None:
-                # Prepare arguments from stack
-                target_func = self.functions[func_name.value]
-                args = []
-                for _ in range(len(target_func.params)):
-                    self.check_stack_size(1, instr)
-                    args.insert(0, self.stack.pop())  # Reverse order for correct argument passing
-                
-                result = self.execute_function(target_func.name, args)
-                ++context.pc
-                
-                # Push result
-                if result is not None:
-                    self.stack.append(result)
-                
-                return result
-            elif isinstance(func_name, ID) and func_name.value == "$log":
-                self.check_stack_size(1, _call)
-                value = self.stack.pop()
-                print(self._colorize(f"INFO: ", 'INFO_COLOR'))
-                print(f"Log value : {value}")
-                
-                ++context.pc
-                
-            else:
-                raise RuntimeError(f"Undefined function: {func_name}")
+        quicken(instr, _global_get_quick, index=global_index(self.module, immediate(instr)))
+        self.execute_global_get_quick(instr, context)
+    
+    def execute_global_get_quick(self, instr: _global_get_quick, context: ExecutionContext) -> None:
+        
+        sp = self.sp
+        value = self.stack[sp] = self.globals[instr.index]
+        self.sp = sp + 1
+        if self.verbose:
+            log.debug("Pushed global %d: %s", instr.index, value)
+    
+    def execute_global_set(self, instr: _global_set, context: ExecutionContext) -> None:
+        
+        quicken(instr, _global_set_quick, index=global_index(self.module, immediate(instr)))
+        self.execute_global_set_quick(instr, context)
+    
+    def execute_global_set_quick(self, instr: _global_set_quick, context: ExecutionContext) -> None:
+        
+        self.check_stack_size(1, instr)
+        sp = self.sp - 1
+        value = self.globals[instr.index] = self.stack[sp]
+        self.sp = sp
+        if self.verbose:
+            log.debug("Set global %d = %s", instr.index, value)
+    
+    def execute_call(self, instr: _call, context: ExecutionContext) -> None:
+        
+        quicken_call(instr, self.module, self.functions)
+        self.execute_instruction(instr, context)
+    
+    def execute_call_quick(self, instr: _call_quick, context: ExecutionContext) -> Any:
+        
+        if instr.table is not self.functions:
+            # Inline cache miss, the node was linked by another CompiledModule
+            return self.execute_call(instr, context)
+        return self.call_resolved(instr, instr.target, instr.nparams)
+    
+    def call_resolved(self, instr: _call, target_func: Func, nparams: int) -> Any:
+        
+        self.check_stack_size(nparams, instr)
+        # The arguments stay on the stack as the callee's first locals,
+        # run_frames() continues in the callee
+        self.call_function(target_func)
+    
+    def execute_call_log_quick(self, instr: _call_log_quick, context: ExecutionContext) -> None:
+        
+        self.check_stack_size(1, instr)
+        self.sp -= 1
+        value = self.stack[self.sp]
+        print(self._colorize(f"INFO: ", 'INFO_COLOR'))
+        print(f"Log value : {value}")
     
-    def execute_return(self, instr: _return, context: ExecutionContext) -> Any:
+    def execute_return(self, instr: _return, context: ExecutionContext) -> None:
         
-        return_value = None
-        if self.stack:
-            return_value = self.stack[-1]  # top of stack
-            if self.verbose:
-                print(self._colorize(f"DEBUG: ", 'DEBUG_COLOR') + f"Returning: {return_value}")
-        --context.pc
-        return return_value
+        if self.verbose and self.sp > context.stack_base:
+            log.debug("Returning: %s", self.stack[self.sp - 1])
+        self.return_from(context)
     
     def execute_nop(self) -> None:
         
         if self.verbose:
-            print(self._colorize(f"DEBUG: ", 'DEBUG_COLOR') + "NOP executed")
+            log.debug("NOP executed")
     
     def execute_control_flow(self, instr: ControlFlowInstruction, context: ExecutionContext) -> Any:
         
@@ -389,113 +964,115 @@ class Interpreter:
         else:
             raise RuntimeError(f"Unsupported control flow instruction: {type(instr).__name__}")
     
-    def execute_if(self, instr: _if, context: ExecutionContext) -> Any:
-        if hasattr(instr, 'name') and instr.name:
-            context.ifs[instr.name] = instr
-            
+    def execute_if(self, instr: _if, context: ExecutionContext) -> None:
+        
+        _, then_body, else_body = split_if(instr)
+        quicken(instr, _if_quick, label=getattr(instr, 'name', None),
+                     then_body=prepare_body(then_body), else_body=prepare_body(else_body))
+        self.enter_if(instr, context)
+    
+    def enter_if(self, instr: _if_quick, context: ExecutionContext) -> None:
+        
         self.check_stack_size(1, instr)
-        condition = self.stack.pop()
-        
-        print(f"instr.operands : {instr.operands}")
-        
-        else_index = None
-        for i, operand in enumerate(instr.operands):
-            if isinstance(operand, _else):
-                print("_else() in instr.operands")
-                else_index = i
-                print(f"i : {i}")
-        
-        if_else_operands = []
-        else_end_operands = []
-        
-        if hasattr(instr, 'operands') and instr.operands:
-            if_else_operands = instr.operands
-            
-        if else_index is not None:
-            if_else_operands = instr.operands[0:else_index]
-            print(f"if_else_operands : {if_else_operands}")
-            else_end_operands = instr.operands[else_index+1:len(instr.operands)]
-            print(f"else_end_operands : {else_end_operands}")
-        
-        if condition != 0:  # True
-            return self.execute_instructions(if_else_operands, context)
-        else:
-            return self.execute_instructions(else_end_operands, context)
-            
+        self.sp -= 1
+        body = instr.then_body if self.stack[self.sp] != 0 else instr.else_body
+        if body:
+            self.push_label(context, body, instr)
+    
+    def execute_block(self, instr: _block, context: ExecutionContext) -> None:
         
+        label, body, _ = block_parts(instr)
+        quicken(instr, _block_quick, label=label, body=prepare_body(body))
+        self.enter_block(instr, context)
+    
+    def enter_block(self, instr: _block_quick, context: ExecutionContext) -> None:
         
-        # TODO : Else branch 
-        # raise RuntimeError(f"Nothing returned in execute_if()")
-        return None
+        self.push_label(context, instr.body, instr)
     
-    def execute_block(self, instr: _block, context: ExecutionContext) -> Any:
+    def execute_loop(self, instr: _loop, context: ExecutionContext) -> None:
         
-        if hasattr(instr, 'operands') and instr.operands:
-            return self.execute_instructions(instr.operands, context)
-        raise RuntimeError(f"Nothing returned in execute_block()")
-        return None
+        label, body, _ = block_parts(instr)
+        body = prepare_body(body)
+        quicken(instr, _loop_quick, label=label, body=body, cost=body_cost(body))
+        self.enter_loop(instr, context)
     
-    def execute_loop(self, instr: _loop, context: ExecutionContext) -> Any:
-        if hasattr(instr, 'name') and instr.name:
-            context.loops[instr.name] = instr
+    def enter_loop(self, instr: _loop_quick, context: ExecutionContext) -> None:
         
-        if hasattr(instr, 'operands') and instr.operands:
-            return self.execute_instructions(instr.operands, context)
-        raise RuntimeError(f"Nothing returned in execute_loop()")
-        return None
+        self.push_label(context, instr.body, instr)
+    
+    def continue_loop(self, instr: _loop_quick, context: ExecutionContext) -> None:
+        """Back-edge, the loop's label is the current one"""
+        
+        context.pc = 0
+        if self.metered:
+            self.charge(instr.cost)
+    
+    def resolve_label(self, instr: Instruction, context: ExecutionContext) -> int:
+        """Relative depth of a branch target, given as depth or `$name`"""
+        
+        target = label_of(immediate(instr))
+        # Innermost first, the function body (None) last
+        nodes = [context.node] + [context.labels[n + 2] for n in range(context.nlabels - 4, -1, -4)]
+        if isinstance(target, int):
+            if target >= len(nodes):
+                raise RuntimeError(f"Undefined label: {target}")
+            return target
+        for depth, node in enumerate(nodes):
+            if node is not None and node.label == target:
+                return depth
+        raise RuntimeError(f"Undefined label: {target}")
     
-    def execute_br(self, instr: _br, context: ExecutionContext) -> Any:
-        # TODO (simplified)
+    def branch(self, depth: int, context: ExecutionContext) -> None:
+        """Unwind `depth` labels and continue at the target: the loop header,
+        or the end of a block/if. Branching to the function body returns."""
         
-        if context.pc < 0:
+        if depth == 0:
+            n = context.nlabels
+            target = context.node
+            height = context.height
+        else:
+            n = context.nlabels - 4 * depth
+            target = context.labels[n + 2]
+            height = context.labels[n + 3]
+        if target is None:
+            self.return_from(context)
             return
+        self.sp = height
+        if isinstance(target, _loop):
+            if depth:
+                self.restore_label(context, n)
+            self.continue_loop(target, context)
+        else:
+            # Resume after the block/if, in the label around it
+            self.restore_label(context, n - 4)
+    
+    def execute_br(self, instr: _br, context: ExecutionContext) -> None:
         
-        if hasattr(instr, 'operands') and instr.operands:
-            label_name = instr.operands[0]
-            print(self._colorize(f"label_name : ", 'ERROR_COLOR') + f"[{label_name}]")
-             
-            
-            if isinstance(label_name, ID):
-                # self.check_stack_size(1, _call)
-                # value = self.stack.pop()
-                # print(self._colorize(f"INFO: ", 'INFO_COLOR'))
-                # print(f"Log value : {value}")
-                
-                # ++context.pc
-                print(f"label name in execute_br() : {label_name}")
-                return
-            else:
-                raise RuntimeError(f"Undefined label: {label_name}")
+        depth = self.resolve_label(instr, context)
+        quicken(instr, _br_quick, depth=depth)
+        self.branch(depth, context)
+    
+    def execute_br_quick(self, instr: _br_quick, context: ExecutionContext) -> None:
         
+        self.branch(instr.depth, context)
+    
+    def execute_br_if(self, instr: _br_if, context: ExecutionContext) -> None:
         
-        if self.verbose:
-            print(self._colorize(f"DEBUG: ", 'DEBUG_COLOR') + "BR instruction executed (no-op in simple interpreter)")
-        raise RuntimeError(f"Nothing returned in execute_br()")
-        return None
+        depth = self.resolve_label(instr, context)
+        quicken(instr, _br_if_quick, depth=depth)
+        self.execute_br_if_quick(instr, context)
     
-    def execute_br_if(self, instr: _br_if, context: ExecutionContext) -> Any:
-        # TODO (simplified)
-        self.check_stack_size(1, instr)
-        condition = self.stack.pop()
-        if condition != 0 and hasattr(instr, 'operands') and instr.operands:
-            # Branch target would be used here in full implementation
-            instr_name = instr.operands[0]
-            if instr_name in context.ifs:
-                return self.execute_if(context.ifs[instr_name], context)
-            elif instr_name in context.loops:
-                return self.execute_loop(context.loops[instr_name], context)
-            else:
-                raise RuntimeError(f"No if or loop called {instr_name}")
+    def execute_br_if_quick(self, instr: _br_if_quick, context: ExecutionContext) -> None:
         
-        # else:
-        #     raise RuntimeError(f"No operand for {instr}")
-        # raise RuntimeError(f"Nothing returned in execute_br_if()")
-        return None
+        self.check_stack_size(1, instr)
+        self.sp -= 1
+        if self.stack[self.sp] != 0:
+            self.branch(instr.depth, context)
     
-    def execute_i32_load(self, instr: _i32_load) -> None:
+    def execute_i32_load(self, instr: _i32_load, context: Optional[ExecutionContext] = None) -> None:
         
         self.check_stack_size(1, instr)
-        address = self.stack.pop()
+        address = self.stack[self.sp - 1]
         
         # Check memory bounds
         if address < 0 or address + 4 > len(self.memory):
@@ -503,19 +1080,16 @@ class Interpreter:
         
         # Read 4 bytes from memory
         value = int.from_bytes(self.memory[address:address+4], 'little', signed=True)
-        self.stack.append(value)
-        print(self._colorize("INFO: ", 'HIGHLIGHT_COLOR') + f"memory : {self.memory[0:30]}")
-        
-        print(self._colorize("INFO: ", 'HIGHLIGHT_COLOR') + f"value : {value}")
-
+        self.stack[self.sp - 1] = value
         if self.verbose:
-            print(self._colorize(f"DEBUG: ", 'DEBUG_COLOR') + f"Loaded from memory[{address}]: {value}")
+            log.debug("Loaded from memory[%d]: %s, memory[0:30]: %s", address, value, self.memory[0:30])
     
-    def execute_i32_store(self, instr: _i32_store) -> None:
+    def execute_i32_store(self, instr: _i32_store, context: Optional[ExecutionContext] = None) -> None:
         
         self.check_stack_size(2, instr)
-        value = self.stack.pop()
-        address = self.stack.pop()
+        value = self.stack[self.sp - 1]
+        address = self.stack[self.sp - 2]
+        self.sp -= 2
         
         # Check memory bounds
         if address < 0 or address + 4 > len(self.memory):
@@ -523,23 +1097,94 @@ class Interpreter:
         
         # Store 4 bytes to memory
         self.memory[address:address+4] = value.to_bytes(4, 'little', signed=True)
-        print(self._colorize("INFO: ", 'HIGHLIGHT_COLOR') + f"self.memory[address:address+4] : {self.memory[address:address+4]}")
-        
         if self.verbose:
-            print(self._colorize(f"DEBUG: ", 'DEBUG_COLOR') + f"Stored to memory[{address}]: {value}")
+            log.debug("Stored to memory[%d]: %s (%s)", address, value, self.memory[address:address+4])
+    
+    # Handlers of trusted modules: the same as above without the stack
+    # check, the Validator has ruled out underflows. run_frames() still
+    # logs every instruction in verbose mode.
+    
+    def execute_binary_trusted(self, instr: BinaryInstruction, context: ExecutionContext) -> None:
+        
+        stack = self.stack
+        sp = self.sp - 1
+        stack[sp - 1] = BINARY_OPS[type(instr)](stack[sp - 1], stack[sp])
+        self.sp = sp
+    
+    def execute_i32_clz_trusted(self, instr: _i32_clz, context: ExecutionContext) -> None:
+        
+        self.stack[self.sp - 1] = i32_clz(self.stack[self.sp - 1])
+    
+    def execute_local_set_trusted(self, instr: _local_set_quick, context: ExecutionContext) -> None:
+        
+        sp = self.sp - 1
+        self.stack[context.fp + instr.index] = self.stack[sp]
+        self.sp = sp
+    
+    def execute_local_tee_trusted(self, instr: _local_tee_quick, context: ExecutionContext) -> None:
+        
+        self.stack[context.fp + instr.index] = self.stack[self.sp - 1]
+    
+    def execute_global_set_trusted(self, instr: _global_set_quick, context: ExecutionContext) -> None:
+        
+        sp = self.sp - 1
+        self.globals[instr.index] = self.stack[sp]
+        self.sp = sp
+    
+    def execute_call_trusted(self, instr: _call_quick, context: ExecutionContext) -> Any:
+        
+        if instr.table is not self.functions:
+            return self.execute_call(instr, context)
+        self.call_function(instr.target)
+    
+    def execute_call_log_trusted(self, instr: _call_log_quick, context: ExecutionContext) -> None:
+        
+        self.sp -= 1
+        print(self._colorize("INFO: ", 'INFO_COLOR'))
+        print(f"Log value : {self.stack[self.sp]}")
+    
+    def enter_if_trusted(self, instr: _if_quick, context: ExecutionContext) -> None:
+        
+        self.sp -= 1
+        body = instr.then_body if self.stack[self.sp] != 0 else instr.else_body
+        if body:
+            self.push_label(context, body, instr)
+    
+    def execute_br_if_trusted(self, instr: _br_if_quick, context: ExecutionContext) -> None:
+        
+        self.sp -= 1
+        if self.stack[self.sp] != 0:
+            self.branch(instr.depth, context)
+    
+    def execute_i32_load_trusted(self, instr: _i32_load, context: ExecutionContext) -> None:
+        
+        address = self.stack[self.sp - 1]
+        if address < 0 or address + 4 > len(self.memory):
+            raise RuntimeError(f"Memory access out of bounds: {address}")
+        self.stack[self.sp - 1] = int.from_bytes(self.memory[address:address+4], 'little', signed=True)
+    
+    def execute_i32_store_trusted(self, instr: _i32_store, context: ExecutionContext) -> None:
+        
+        sp = self.sp - 2
+        address = self.stack[sp]
+        self.sp = sp
+        if address < 0 or address + 4 > len(self.memory):
+            raise RuntimeError(f"Memory access out of bounds: {address}")
+        self.memory[address:address+4] = self.stack[sp + 1].to_bytes(4, 'little', signed=True)
     
     def check_stack_size(self, required: int, instr: Instruction) -> None:
         
-        if len(self.stack) < required:
+        available = self.sp - self.current_context.stack_base
+        if available < required:
             raise RuntimeError(
                 f"Stack underflow for {type(instr).__name__}: "
-                f"required {required}, got {len(self.stack)}"
+                f"required {required}, got {available}"
             )
     
     def get_result(self) -> Optional[Any]:
         
-        if self.stack:
-            return self.stack[-1]
+        if self.sp:
+            return self.stack[self.sp - 1]
         raise RuntimeError(f"Nothing returned in get_result()")
         return None
 
@@ -1,5 +1,8 @@
 
 import re
+import Log
+
+log = Log.get_logger("Lexer")
 
 class Module:
     def __init__(self, mems=None, globs=None, funcs=None, exports=None):
@@ -425,22 +428,9 @@ WASM_INSTRUCTIONS = {
             'end': 'var'
         }
 
-COLORS = {
-        
-    'ERROR_COLOR': '\033[1;31m',   # Error messages - Bold Red
-    'WARNING_COLOR': '\033[1;33m', # Warning messages - Bold Yellow  
-    'SUCCESS_COLOR': '\033[1;32m', # Success messages - Bold Green
-    'INFO_COLOR': '\033[1;34m',    # Information messages - Bold Blue
-    'LEXER_DEBUG_COLOR': '\033[36m', # Lexer debug messages - Cyan (no bold)
-    'HIGHLIGHT_COLOR': '\033[7;37m',   # Highlighted text - Reverse video (white on default background)
-    'RESET_COLOR': '\033[0m',  # Reset all styles and colors
-}
-
 class Lexer:
     def __init__(self):
         self.line_number = 1
-        self.lex_verb_flag = False
-        self.lex_col_flag = False
         
     def get_token_class(self, lexeme):
         if lexeme in KEYWORDS:
@@ -449,10 +439,7 @@ class Lexer:
         elif lexeme in WASM_INSTRUCTIONS:
             # if lexeme == 'return':
             #     return _return
-            if self.lex_verb_flag:
-                print(self._lex_colorize(f"Line {self.line_number}: ", 'LEXER_DEBUG_COLOR'), end="     ")
-        
-                print("In WASM_INSTRUCTIONS : " + lexeme)
+            log.debug("Line %d: In WASM_INSTRUCTIONS : %s", self.line_number, lexeme)
             # print(lexeme.replace('.', '_', 1))
             # print(f"'_' + lexeme.replace('.', '_', 1) : {lexeme.replace('.', '_', 1)}")
             
@@ -463,6 +450,7 @@ class Lexer:
         self.input = wat
         self.pos = 0
         self.tokens = []
+        debug = log.isEnabledFor(Log.DEBUG)
         
         # Remove two types of comments
         wat = re.sub(r"\(\;.*?\;\)", "", wat, flags=re.DOTALL)
@@ -496,8 +484,7 @@ class Lexer:
                         self.pos += 1
                     self.pos += 1
                 if self.pos >= len(wat):
-                    print(self._lex_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")  
-                    print(f"Line {self.line_number}: Unclosed string literal")
+                    log.error("Line %d: Unclosed string literal", self.line_number)
                     return None
                 self.pos += 1
                 self.tokens.append(STRING(wat[start:self.pos]))
@@ -528,24 +515,15 @@ class Lexer:
                 lexeme = wat[start:self.pos]
                 
                 token_class = self.get_token_class(lexeme)
-                # print("lexer: lex_verb_flag: " + str(lex_verb_flag))
-                # if lex_verb_flag:
-                if self.lex_verb_flag:
-                    print(self._lex_colorize(f"Line {self.line_number}: ", 'LEXER_DEBUG_COLOR'), end="     ")
-
-                    print('isalpha() token_class: ' + str(token_class))
-                    print('isalpha() token_type: ' + str(type(token_class)))
+                if debug:
+                    log.debug("Line %d: isalpha() token_class: %s, token_type: %s",
+                              self.line_number, token_class, type(token_class))
                     
                 # return None
                 if token_class:
-                    print(self._lex_colorize(f"Line {self.line_number}: ", 'LEXER_DEBUG_COLOR'), end="     ")
-
-                    print('token_class: ' + str(token_class))
                     if isinstance(token_class, _call):
-                        print("callllllllllll")
                         self.tokens.append(token_class(1))
                     elif isinstance(token_class, _global_get):
-                        print("global---------get")
                         self.tokens.append(token_class("test"))
                     else:
                         self.tokens.append(token_class())       # Passing parameters here?
@@ -556,17 +534,11 @@ class Lexer:
                     self.tokens.append(ID(lexeme))
             
             else:
-                print(self._lex_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")  
-                print(f"Line {self.line_number}: Illegal character '{c}'")
+                log.error("Line %d: Illegal character '%s'", self.line_number, c)
                 return None
             
             # if c == '\n':
             #     print("c == '\n'")
         self.tokens.append(EOF())
         
-        return self.tokens
-
-    def _lex_colorize(self, text, color_key):
-        if self.lex_col_flag:
-            return f"{COLORS[color_key]}{text}{COLORS['RESET_COLOR']}"
-        return text
\ No newline at end of file
+        return self.tokens
\ No newline at end of file
@@ -0,0 +1,58 @@
+import logging
+import sys
+from typing import Optional, TextIO
+
+# Leveled logging shared by the Lexer, Parser, Interpreter and main.
+# Messages take %-style arguments (log.debug("Pushed local %d: %s", i, v)),
+# so they are only formatted when their level is enabled. All loggers live
+# under "uwasm" and are silent until `configure` is called: main.py shows
+# warnings and errors by default and everything with -d.
+
+ERROR = logging.ERROR
+WARNING = logging.WARNING
+INFO = logging.INFO
+DEBUG = logging.DEBUG
+
+LEVELS = {'error': ERROR, 'warning': WARNING, 'info': INFO, 'debug': DEBUG}
+
+LEVEL_COLORS = {
+    ERROR: '\033[1;31m',    # Bold Red
+    WARNING: '\033[1;33m',  # Bold Yellow
+    INFO: '\033[1;34m',     # Bold Blue
+    DEBUG: '\033[36m',      # Cyan (no bold)
+}
+RESET_COLOR = '\033[0m'
+
+ROOT = "uwasm"
+
+logging.getLogger(ROOT).addHandler(logging.NullHandler())
+
+class LevelFormatter(logging.Formatter):
+    """`LEVEL: message`, with the level colorized on request"""
+
+    def __init__(self, use_colors: bool = False):
+        super().__init__("%(levelname)s: %(message)s")
+        self.use_colors = use_colors
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        text = super().formatMessage(record)
+        if self.use_colors and record.levelno in LEVEL_COLORS:
+            prefix = f"{record.levelname}:"
+            text = f"{LEVEL_COLORS[record.levelno]}{prefix}{RESET_COLOR}{text[len(prefix):]}"
+        return text
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger of one module, e.g. get_logger("Parser") -> uwasm.Parser"""
+    return logging.getLogger(f"{ROOT}.{name}")
+
+def configure(level: int = WARNING, use_colors: bool = False, stream: Optional[TextIO] = None) -> None:
+    """Send uwasm log records of `level` and above to `stream` (stdout by default)"""
+    root = logging.getLogger(ROOT)
+    for handler in list(root.handlers):
+        if not isinstance(handler, logging.NullHandler):
+            root.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(LevelFormatter(use_colors))
+    root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
@@ -0,0 +1,162 @@
+from Lexer import (
+    Module, Func, Instruction, BinaryInstruction,
+    _i32_const, _i32_div_s, _i32_clz,
+    _local_get, _local_set, _global_get, _global_set,
+    _call, _br, _return, _loop
+)
+from Runtime import RuntimeError, immediate, global_index
+from Passes import Pass, make, arms, walk, local_key, assigned_locals, add_local, stack_effect
+from typing import List, Set, Optional
+import Log
+
+log = Log.get_logger("LoopInvariant")
+
+# Loop-invariant code motion over canonical IR. The straight-line part of a
+# loop body is simulated on a stack of value ranges: every value computed
+# by a contiguous run of pure instructions (constants, local.get,
+# global.get, arithmetic that cannot trap) knows where it starts and
+# whether it is invariant, i.e. reads no local the loop assigns and no
+# global the loop may write. A largest invariant range with at least one
+# operation in it is moved in front of the loop (the preheader) into a
+# fresh local, and the loop reads the local instead:
+#
+#   loop $inner                       local.get $len
+#     local.get $j                    local.get $i
+#     local.get $len                  i32.sub
+#     local.get $i          =>        i32.const 1
+#     i32.sub                         i32.sub
+#     i32.const 1                     local.set $licm_1
+#     i32.sub                         loop $inner
+#     i32.lt_u                          local.get $j
+#     br_if $inner                      local.get $licm_1
+#                                       i32.lt_u ...
+#
+# Inner loops are done first, so code hoisted into an outer loop body can
+# be hoisted again if it is invariant there too. The hoisted code cannot
+# trap, running it once before the loop is safe even if the loop would not
+# have reached it.
+
+class Range:
+    """A value on the simulated stack, computed by body[start:end]"""
+
+    __slots__ = ('start', 'end', 'invariant', 'has_op')
+
+    def __init__(self, start: int, end: int, invariant: bool, has_op: bool):
+        self.start = start
+        self.end = end
+        self.invariant = invariant
+        self.has_op = has_op
+
+class LoopInvariantCodeMotion(Pass):
+    """Hoist loop-invariant expressions into locals set before the loop"""
+
+    name = "licm"
+
+    def run_function(self, func: Func, module: Module) -> int:
+        self.func = func
+        self.module = module
+        hoisted = self.hoist_body(func.body)
+        if hoisted:
+            log.info("%s: hoisted %d expressions", func.name, hoisted)
+        return hoisted
+
+    def hoist_body(self, body: List[Instruction]) -> int:
+        """Hoist out of every loop nested in a body, innermost first"""
+
+        hoisted = 0
+        i = 0
+        while i < len(body):
+            instr = body[i]
+            for arm in arms(instr):
+                hoisted += self.hoist_body(arm)
+            if isinstance(instr, _loop):
+                preheader = self.hoist(instr)
+                body[i:i] = preheader
+                i += len(preheader)
+                hoisted += sum(isinstance(code, _local_set) for code in preheader)
+            i += 1
+        return hoisted
+
+    def hoist(self, loop: _loop) -> List[Instruction]:
+        """Move the invariant ranges of a loop out, returns the preheader"""
+
+        body = loop.operands
+        self.assigned = assigned_locals(body, self.func)
+        self.written_globals = self.globals_written(body)
+        candidates = self.invariant_ranges(body)
+        # Replace from the end, so the earlier ranges stay where they are
+        names = [add_local(self.func, f"$licm_{len(self.func.locals)}") for _ in candidates]
+        pieces = []
+        for name, (start, end) in reversed(list(zip(names, sorted(candidates)))):
+            pieces.append(body[start:end] + [make(_local_set, name)])
+            body[start:end] = [make(_local_get, name)]
+            self.count("hoisted expressions")
+            self.count("instructions hoisted", end - start)
+        return [instr for piece in reversed(pieces) for instr in piece]
+
+    def globals_written(self, body: List[Instruction]) -> Optional[Set[int]]:
+        """Globals the loop may write, None for all of them (calls)"""
+
+        written: Set[int] = set()
+        for instr in walk(body):
+            if isinstance(instr, _call):
+                return None
+            if isinstance(instr, _global_set):
+                try:
+                    written.add(global_index(self.module, immediate(instr)))
+                except (RuntimeError, ValueError):
+                    return None
+        return written
+
+    def is_invariant(self, instr: Instruction) -> bool:
+
+        if isinstance(instr, _i32_const):
+            return True
+        if isinstance(instr, _local_get):
+            key = local_key(self.func, instr)
+            return key is not None and key not in self.assigned
+        if self.written_globals is None:
+            return False
+        try:
+            return global_index(self.module, immediate(instr)) not in self.written_globals
+        except (RuntimeError, ValueError):
+            return False
+
+    def invariant_ranges(self, body: List[Instruction]) -> List[tuple]:
+        """(start, end) of the largest invariant ranges of a loop body's
+        straight-line part that compute something"""
+
+        stack: List[Optional[Range]] = []
+        candidates = []
+
+        def pop(n: int) -> List[Optional[Range]]:
+            values = [stack.pop() if stack else None for _ in range(n)]
+            return values[::-1]
+
+        def retire(values: List[Optional[Range]]) -> None:
+            for value in values:
+                if value is not None and value.invariant and value.has_op:
+                    candidates.append((value.start, value.end))
+
+        for i, instr in enumerate(body):
+            if isinstance(instr, (_i32_const, _local_get, _global_get)):
+                stack.append(Range(i, i + 1, self.is_invariant(instr), False))
+            elif isinstance(instr, (BinaryInstruction, _i32_clz)) and not isinstance(instr, _i32_div_s):
+                operands = pop(1 if isinstance(instr, _i32_clz) else 2)
+                contiguous = all(value is not None for value in operands) and operands[-1].end == i and \
+                    all(a.end == b.start for a, b in zip(operands, operands[1:]))
+                if not contiguous:
+                    retire(operands)
+                    stack.append(None)
+                    continue
+                invariant = all(value.invariant for value in operands)
+                if not invariant:
+                    retire(operands)
+                stack.append(Range(operands[0].start, i + 1, invariant, True))
+            elif isinstance(instr, (_br, _return)):
+                break
+            else:
+                pops, pushes = stack_effect(instr, self.module)
+                retire(pop(pops))
+                stack.extend([None] * pushes)
+        return candidates
@@ -0,0 +1,184 @@
+from Lexer import (
+    Module, Func, Instruction,
+    _i32_const, _i32_add, _i32_sub, _i32_gt_s, _i32_lt_s, _i32_lt_u,
+    _local_get, _local_set, _local_tee,
+    _br, _br_if, _block, _loop
+)
+from Runtime import RuntimeError, wrap_i32, immediate, label_of
+from Passes import (
+    Pass, make, make_block, make_if, arms, walk, local_key, assigned_locals, add_local,
+    constant_value, induction_step, copy_body
+)
+from typing import List, Optional
+import Log
+
+log = Log.get_logger("LoopUnrolling")
+
+# Unrolling of counted loops over canonical IR. An innermost loop ending in
+#
+#   local.get $i  <bound>  i32.lt_s  br_if $loop
+#
+# with $i assigned once in it, by `$i = $i + k` at the top level, and a
+# bound that is a constant or a local the loop does not assign, runs its
+# body `factor` times per check:
+#
+#   block $unroll_1_done
+#     loop $unroll_1
+#       local.get $i  <limit>  i32.lt_s
+#       if
+#         ...body ...body ...body ...body
+#         local.get $i  <bound>  i32.lt_s  br_if $unroll_1
+#         br $unroll_1_done
+#       end
+#     end
+#     loop $loop  ...the original loop, for the remaining iterations...
+#   end
+#
+# The limit is the bound moved by (factor - 1) * k: when $i is below it,
+# the checks after the first factor - 1 copies would all have passed, and
+# $i + (factor - 1) * k cannot wrap. A local bound gets its limit computed
+# once in front of the loop, clamped to a value no $i passes when the
+# subtraction would wrap. Counting down with i32.gt_s works the same way.
+# The loop body must not branch to the loop itself before its end, and
+# branches by depth must not leave it (the copies are nested deeper).
+
+INT_MIN = -0x80000000
+INT_MAX = 0x7FFFFFFF
+U32 = 0x100000000
+
+class LoopUnrolling(Pass):
+    """Unroll counted loops, with the original loop for the remaining iterations"""
+
+    name = "unroll"
+
+    def __init__(self, factor: int = 4, max_size: int = 200):
+        super().__init__()
+        self.factor = factor
+        self.max_size = max_size    # instructions of the unrolled copies
+        self.loops = 0
+
+    def run_function(self, func: Func, module: Module) -> int:
+        self.func = func
+        unrolled = self.unroll_body(func.body)
+        if unrolled:
+            log.info("%s: unrolled %d loops by %d", func.name, unrolled, self.factor)
+        return unrolled
+
+    def unroll_body(self, body: List[Instruction]) -> int:
+        """Unroll the counted loops nested in a body in place"""
+
+        unrolled = 0
+        i = 0
+        while i < len(body):
+            instr = body[i]
+            for arm in arms(instr):
+                unrolled += self.unroll_body(arm)
+            code = self.unroll(instr) if isinstance(instr, _loop) else None
+            if code is not None:
+                body[i:i + 1] = code
+                i += len(code) - 1
+                unrolled += 1
+                self.count("loops unrolled")
+            i += 1
+        return unrolled
+
+    def unroll(self, loop: _loop) -> Optional[List[Instruction]]:
+        """The code replacing a counted loop, None if it is not one"""
+
+        body = loop.operands
+        if self.factor < 2 or len(body) < 8 or any(isinstance(instr, _loop) for instr in walk(body)):
+            return None
+        if sum(1 for _ in walk(body)) * self.factor > self.max_size:
+            return None
+        get, bound, compare, back = body[-4:]
+        if not isinstance(get, _local_get) or not isinstance(back, _br_if) or \
+                not isinstance(compare, (_i32_lt_s, _i32_lt_u, _i32_gt_s)) or not self.targets(back, loop):
+            return None
+        key = local_key(self.func, get)
+        if key is None or sum(1 for instr in walk(body) if isinstance(instr, (_local_set, _local_tee))
+                              and local_key(self.func, instr) == key) != 1:
+            return None
+        # The one write of $i must be its update, at the top level
+        step = next((induction_step(self.func, body, i) for i, instr in enumerate(body)
+                     if isinstance(instr, _local_set) and local_key(self.func, instr) == key), None)
+        if not step or (step > 0) != isinstance(compare, (_i32_lt_s, _i32_lt_u)):
+            return None
+        if isinstance(bound, _local_get):
+            bound_key = local_key(self.func, bound)
+            if bound_key is None or bound_key == key or bound_key in assigned_locals(body, self.func):
+                return None
+        elif constant_value(bound) is None:
+            return None
+        if self.escapes(body[:-1], [], loop):
+            return None
+
+        span = (self.factor - 1) * abs(step)
+        if span > INT_MAX:
+            return None
+        preheader, limit = self.limit(bound, compare, span)
+        if limit is None:
+            return None
+
+        self.loops += 1
+        label = f"$unroll_{self.loops}"
+        done = f"{label}_done"
+        copies = [instr for _ in range(self.factor) for instr in copy_body(body[:-4])]
+        check = [make(_local_get, *get.operands), limit, make(type(compare))]
+        again = copy_body(body[-4:-1]) + [make(_br_if, label), make(_br, done)]
+        main = make_block(_loop, label, check + [make_if(None, copies + again, [])])
+        return preheader + [make_block(_block, done, [main, loop])]
+
+    def limit(self, bound: Instruction, compare: Instruction, span: int) -> tuple:
+        """(preheader, instruction pushing the limit) of a bound, the limit
+        is None if a constant bound cannot be moved by `span`"""
+
+        # Bounds comparing true against the edge would wrap when moved
+        if isinstance(compare, _i32_gt_s):
+            edge, clamp, move = INT_MAX - span, INT_MAX, _i32_add
+        elif isinstance(compare, _i32_lt_s):
+            edge, clamp, move = INT_MIN + span, INT_MIN, _i32_sub
+        else:
+            edge, clamp, move = span, 0, _i32_sub
+        value = constant_value(bound)
+        if value is not None:
+            if isinstance(compare, _i32_gt_s) and value > edge or isinstance(compare, _i32_lt_s) and value < edge \
+                    or isinstance(compare, _i32_lt_u) and value % U32 < edge:
+                return [], None
+            return [], make(_i32_const, str(wrap_i32(value + span if move is _i32_add else value - span)))
+
+        # A local bound gets its limit computed in front of the loop, one no
+        # $i passes when the bound is past the edge
+        name = add_local(self.func, f"$unroll_limit_{len(self.func.locals)}")
+        moved = [make(_local_get, *bound.operands), make(_i32_const, str(span)), make(move), make(_local_set, name)]
+        wraps = [make(_local_get, *bound.operands), make(_i32_const, str(wrap_i32(edge))), make(type(compare))]
+        clamped = make_if(None, [make(_i32_const, str(clamp)), make(_local_set, name)], [])
+        return moved + wraps + [clamped], make(_local_get, name)
+
+    def targets(self, instr: Instruction, loop: _loop) -> bool:
+        """Whether a branch at the top level of the loop body targets the loop"""
+
+        try:
+            target = label_of(immediate(instr))
+        except (RuntimeError, ValueError):
+            return False
+        if isinstance(target, int):
+            return target == 0
+        return loop.name is not None and target == loop.name
+
+    def escapes(self, body: List[Instruction], labels: List[Optional[str]], loop: _loop) -> bool:
+        """Whether a branch in `body` targets the loop, or leaves it by depth"""
+
+        for instr in body:
+            if isinstance(instr, (_br, _br_if)):
+                try:
+                    target = label_of(immediate(instr))
+                except (RuntimeError, ValueError):
+                    return True
+                if isinstance(target, int) and target >= len(labels):
+                    return True
+                if not isinstance(target, int) and target not in labels and target == loop.name:
+                    return True
+            for arm in arms(instr):
+                if self.escapes(arm, labels + [instr.name], loop):
+                    return True
+        return False
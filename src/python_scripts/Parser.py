@@ -37,17 +37,9 @@ from Lexer import (
     _i32_store
     
 )
+import Log
 
-COLORS = {
-        
-    'ERROR_COLOR': '\033[1;31m',   # Error messages - Bold Red
-    'WARNING_COLOR': '\033[1;33m', # Warning messages - Bold Yellow  
-    'SUCCESS_COLOR': '\033[1;32m', # Success messages - Bold Green
-    'PARSER_DEBUG_COLOR': '\033[1;34m',    # Parser debug messages - Bold Blue
-    'DEBUG_COLOR': '\033[36m', # Debug messages - Cyan (no bold)
-    'HIGHLIGHT_COLOR': '\033[7;37m',   # Highlighted text - Reverse video (white on default background)
-    'RESET_COLOR': '\033[0m',  # Reset all styles and colors
-}
+log = Log.get_logger("Parser")
 
 class Parser:
     def __init__(self):
@@ -57,24 +49,20 @@ class Parser:
         self.module = None
         # self.funcs = []
         self.line_number = 1
-        self.par_verb_flag = False
-        self.par_col_flag = False
         
     def next_token(self):
         self.token_index += 1
         if self.token_index < len(self.tokens):
             self.current_token = self.tokens[self.token_index]
         else:
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Parser index Error")
+            log.error("Line %d: Parser index Error", self.line_number)
             self.current_token = None
         return self.current_token
         
     def parse(self, tokens):
         
         if not tokens:
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Error: No tokens to parse")
+            log.error("No tokens to parse")
             return None
             
         self.tokens = tokens
@@ -91,21 +79,18 @@ class Parser:
         self.parse_newline_and_space()
         
         if self.current_token is None or isinstance(self.current_token, EOF):
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f'Line {self.line_number}: Unexpected token "EOF", expected a module field or a module')
+                log.error('Line %d: Unexpected token "EOF", expected a module field or a module', self.line_number)
                 return None
                 
         if not isinstance(self.current_token, LPAREN):
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected '(' at start of module")
+            log.error("Line %d: Unexpected token '%s', expected '(' at start of module", self.line_number, self.current_token)
             return None
         
         self.next_token()
         self.parse_newline_and_space()
             
         if not isinstance(self.current_token, Module):
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected 'module' keyword")
+            log.error("Line %d: Unexpected token '%s', expected 'module' keyword", self.line_number, self.current_token)
             return None
         
         self.module = Module(mems=[], funcs=[], exports=[])
@@ -115,8 +100,7 @@ class Parser:
         while not isinstance(self.current_token, RPAREN):
             
             if self.current_token is None:
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f"Line {self.line_number}: Unexpected EOF while parsing module")
+                log.error("Line %d: Unexpected EOF while parsing module", self.line_number)
                 return None
             
             if isinstance(self.current_token, LPAREN):
@@ -126,16 +110,14 @@ class Parser:
                 if isinstance(self.current_token, Func):        # Can only be surrounded by (...)
                     func = self.parse_func()
                     if func is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing function, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing function, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     self.module.funcs.append(func)
                 elif isinstance(self.current_token, Export):    # Can only be surrounded by (...)
                     export = self.parse_export()
                     if export is None :
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing export, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing export, current token : '%s'", self.line_number, self.current_token)
                         return None
 
                     self.module.exports.append(export)
@@ -145,8 +127,7 @@ class Parser:
 
                     mem = self.parse_memory()
                     if mem is None :
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing memory, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing memory, current token : '%s'", self.line_number, self.current_token)
                         return None
                     self.module.mems.append(mem)
                     # print(f"test_mem : {mem}")
@@ -156,30 +137,26 @@ class Parser:
 
                     glob = self.parse_global()
                     if glob is None :   #DONE: Error message
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing global, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing global, current token : '%s'", self.line_number, self.current_token)
                         return None
                     self.module.globs.append(glob)
                     # print(f"test_mem : {mem}")
                     
                 
                 else:
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: Unexpected token in module: {self.current_token} after (")
+                    log.error("Line %d: Unexpected token in module: %s after (", self.line_number, self.current_token)
                     return None
                 
                 self.parse_newline_and_space()
                 
                 if not isinstance(self.current_token, RPAREN):
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')' after module element")
+                    log.error("Line %d: Unexpected token '%s', expected ')' after module element", self.line_number, self.current_token)
                     return None
                 self.next_token()
                 self.parse_newline_and_space()
                 
             else:
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f"Line {self.line_number}: Unexpected token in module: {self.current_token}")
+                log.error("Line %d: Unexpected token in module: %s", self.line_number, self.current_token)
                 return None
         
         self.next_token()
@@ -187,8 +164,7 @@ class Parser:
         # TODO : indentation for if?
         if (not self.current_token is None) and (not isinstance(self.current_token, EOF)):
                 # print("Type: " + str(type(self.current_token)))
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f'Line {self.line_number}: Unexpected token {self.current_token} after module')
+                log.error("Line %d: Unexpected token %s after module", self.line_number, self.current_token)
                 return None
         return self.module
     
@@ -225,8 +201,7 @@ class Parser:
                     
                 if isinstance(self.current_token, Export):  
                     if current_section and current_section != 'export':
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: Error: Exports must come before params, results, and locals")
+                        log.error("Line %d: Exports must come before params, results, and locals", self.line_number)
                         return None
                     current_section = 'export'
                     
@@ -234,105 +209,85 @@ class Parser:
                     self.parse_newline_and_space()
                     
                     if not isinstance(self.current_token, STRING):
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected export name to be a string in function signature")
+                        log.error("Line %d: Unexpected token '%s', expected export name to be a string in function signature", self.line_number, self.current_token)
                         return None
-                    print(f"export_name : {self.current_token}")
+                    log.debug("export_name : %s", self.current_token)
                     if self.current_token.value not in func.export_names:
                         func.export_names.append(self.current_token.value)
                     else:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: Duplicate export '{self.current_token}'")
+                        log.error("Line %d: Duplicate export '%s'", self.line_number, self.current_token)
                         return None
                     self.next_token()
                     self.parse_newline_and_space()
                 
                 elif isinstance(self.current_token, Param):
                     if current_section and current_section not in ('export', 'param'):
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: Error: Params must come before results and locals")
+                        log.error("Line %d: Params must come before results and locals", self.line_number)
                         return None
                     current_section = 'param'
                     params_returned = self.parse_param()
                     if params_returned is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing parameters, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing parameters, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     func.params.extend(params_returned)
                     
                 elif isinstance(self.current_token, Result):
                     if current_section and current_section not in ('export', 'param', 'result'):
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ") 
-                        print(f"Line {self.line_number}: Error: Results must come after params and before locals")
+                        log.error("Line %d: Results must come after params and before locals", self.line_number)
                         return None
                     current_section = 'result'
                     results = self.parse_result()
                     if results is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing result, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing result, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     func.results.extend(results)
                     
                 elif isinstance(self.current_token, Local):
                     if current_section and current_section not in ('export', 'param', 'result', 'local'):
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ") 
-                        print(f"Line {self.line_number}: Error: Locals must come after params and results")
+                        log.error("Line %d: Locals must come after params and results", self.line_number)
                         return None
                     current_section = 'local'
                     locals = self.parse_local()
                     if locals is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing local, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing local, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     func.locals.extend(locals)
                     
                 elif isinstance(self.current_token, ControlFlowInstruction):
                     if current_section and current_section not in ('export', 'param', 'result', 'local', 'instr'):
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ") 
-                        print(f"Line {self.line_number}: Error: Instructions must come after params, results, and locals")
+                        log.error("Line %d: Instructions must come after params, results, and locals", self.line_number)
                         return None
                     current_section = 'instr'
                     
                     # DONE: Modification
-                    if self.par_verb_flag:
-                        print(self._par_colorize(f"Line {self.line_number}: ", 'PARSER_DEBUG_COLOR'), end="     ")
-                    
-                        print('ControlFlowInstruction :  ' + str(type(self.current_token)))
+                    log.debug("Line %d: ControlFlowInstruction :  %s", self.line_number, type(self.current_token))
                 
                     controlFlowInstr = self.parse_control_flow()
                     if controlFlowInstr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: No valid control flow instruction")
-                        print(self.current_token)
-                        print(self.next_token)
+                        log.error("Line %d: No valid control flow instruction", self.line_number)
+                        log.debug("Current token: %s", self.current_token)
                         return None
                     func.body.append(controlFlowInstr)
                     
                 elif isinstance(self.current_token, Instruction):
                     if current_section and current_section not in ('param', 'result', 'local', 'instr'):
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ") 
-                        print(f"Line {self.line_number}: Error: Instructions must come after params, results, and locals")
+                        log.error("Line %d: Instructions must come after params, results, and locals", self.line_number)
                         return None
                     current_section = 'instr'
                     
-                    if self.par_verb_flag:
-                        print(self._par_colorize(f"Line {self.line_number}: ", 'DEBUG_COLOR'), end="     ")
-                        
-                        print('func (...) (...) (... ' + str(type(self.current_token))) #DONE: MOdification
+                    log.debug("Line %d: func (...) (...) (... %s", self.line_number, type(self.current_token))    #DONE: MOdification
                     instr = self.parse_instruction()
                     if instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     func.body.append(instr)
                     
                 else:
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: Instruction {self.current_token} in function {func.name} not found!")
+                    log.error("Line %d: Instruction %s in function %s not found!", self.line_number, self.current_token, func.name)
                     # break
                     return None
                 
@@ -340,26 +295,21 @@ class Parser:
 
                 # Check closing parenthesis for this if branch
                 if not isinstance(self.current_token, RPAREN):
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')' after func element")      # TODO : param i32 i32
-                    print(self.current_token)
-                    print(self.next_token)
+                    log.error("Line %d: Unexpected token '%s', expected ')' after func element", self.line_number, self.current_token)    # TODO : param i32 i32
+                    log.debug("Current token: %s", self.current_token)
                     return None
                 self.next_token()
                 self.parse_newline_and_space()
                     
             elif isinstance(self.current_token, ControlFlowInstruction):
                 #TODO: MOdification/Deletion
-                print(self._par_colorize(f"Line {self.line_number}: ", 'DEBUG_COLOR'), end="     ")
                 
-                print('ControlFlowInstruction without (...):  ' + str(type(self.current_token)))
+                log.debug("Line %d: ControlFlowInstruction without (...):  %s", self.line_number, type(self.current_token))
 
                 controlFlowInstr = self.parse_control_flow()
                 if controlFlowInstr is None:
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: No valid control flow instruction")
-                    print(self.current_token)
-                    print(self.next_token)
+                    log.error("Line %d: No valid control flow instruction", self.line_number)
+                    log.debug("Current token: %s", self.current_token)
                     return None
                 func.body.append(controlFlowInstr)
                 
@@ -399,14 +349,10 @@ class Parser:
                 # print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
                 # print(f'Line {self.line_number}: Currrent Instruction without (...) surrounded' + str(type(self.current_token)))
                 
-                if self.par_verb_flag:
-                    print(self._par_colorize(f"Line {self.line_number}: ", 'DEBUG_COLOR'), end="     ")
-                    
-                    print('func (...) (...) (... ' + str(type(self.current_token))) #TODO: MOdification
+                log.debug("Line %d: func (...) (...) (... %s", self.line_number, type(self.current_token))    #TODO: MOdification
                 instr = self.parse_instruction()
                 if instr is None:
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                    log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                     return None
                 func.body.append(instr)
@@ -418,15 +364,13 @@ class Parser:
                 #     self.next_token()
                 # continue
             else:
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f"Line {self.line_number}: Instruction {self.current_token} in function {func.name} not found!")
+                log.error("Line %d: Instruction %s in function %s not found!", self.line_number, self.current_token, func.name)
                 # break
                 return None
         # TODO: Error?
-        print(f'Line {self.line_number}: After looping: ' + str(self.current_token))
+        log.debug("Line %d: After looping: %s", self.line_number, self.current_token)
         if not isinstance(self.current_token, RPAREN):
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')' after all func elements")
+            log.error("Line %d: Unexpected token '%s', expected ')' after all func elements", self.line_number, self.current_token)
             return None
             
         return func
@@ -448,8 +392,7 @@ class Parser:
                 self.next_token()
                 self.parse_newline_and_space()
             else:
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected parameter type for ID")
+                log.error("Line %d: Unexpected token '%s', expected parameter type for ID", self.line_number, self.current_token)
                 return None
             
             return params
@@ -470,16 +413,14 @@ class Parser:
                     self.parse_newline_and_space()
                     
                 else:
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected parameter type")
+                    log.error("Line %d: Unexpected token '%s', expected parameter type", self.line_number, self.current_token)
                     return None
                 
         elif isinstance(self.current_token, RPAREN):
             pass    # No variable
         
         else:
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected parameter type")
+            log.error("Line %d: Unexpected token '%s', expected parameter type", self.line_number, self.current_token)
             return None
         
         return params
@@ -502,8 +443,7 @@ class Parser:
                 self.parse_newline_and_space()
             
             else:
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected local type")
+                log.error("Line %d: Unexpected token '%s', expected local type", self.line_number, self.current_token)
                 return None
         
             return locals
@@ -524,16 +464,14 @@ class Parser:
                     self.parse_newline_and_space()
                     
                 else:
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected local type")
+                    log.error("Line %d: Unexpected token '%s', expected local type", self.line_number, self.current_token)
                     return None
         
         elif isinstance(self.current_token, RPAREN):
             pass    # No variable
         
         else:
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected local type")
+            log.error("Line %d: Unexpected token '%s', expected local type", self.line_number, self.current_token)
             return None
         
         return locals
@@ -549,17 +487,15 @@ class Parser:
         
         if not isinstance(self.current_token, RPAREN): 
 
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}' after result types, expected ')'")
+            log.error("Line %d: Unexpected token '%s' after result types, expected ')'", self.line_number, self.current_token)
             return None
         
         return result_types
     
     def parse_control_flow(self):
         
-        print(self._par_colorize(f"Line {self.line_number}: ", 'PARSER_DEBUG_COLOR'), end="     ")
                 
-        print('ControlFlowInstruction inside parse_control_flow:  ' + str(type(self.current_token)))
+        log.debug("Line %d: ControlFlowInstruction inside parse_control_flow:  %s", self.line_number, type(self.current_token))
 
         if isinstance(self.current_token, _nop):
             self.next_token()
@@ -615,8 +551,7 @@ class Parser:
             
             operand = self.current_token
             if not isinstance(self.current_token, (CONST, ID)):
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected CONST or ID after call instruction")
+                log.error("Line %d: Unexpected token '%s', expected CONST or ID after call instruction", self.line_number, self.current_token)
                 return None
             self.next_token()
             self.parse_newline_and_space()
@@ -638,8 +573,7 @@ class Parser:
         else:
             op = self.current_token
             
-            print(self._par_colorize("WARNING: ", 'WARNING_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Is ControlFlowInstruction {op} but not found!")
+            log.warning("Line %d: Is ControlFlowInstruction %s but not found!", self.line_number, op)
             self.next_token()
             self.parse_newline_and_space()
             
@@ -661,26 +595,23 @@ class Parser:
                 if isinstance(self.current_token, ControlFlowInstruction):
                     nested_instr = self.parse_control_flow()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing control flow, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing control flow, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 elif isinstance(self.current_token, Instruction):
                     nested_instr = self.parse_instruction()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 else:
                     #TODO
-                    print('(...) Other options in parse_block???')
+                    log.debug("(...) Other options in parse_block???")
 
                 if not isinstance(self.current_token, RPAREN):
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')' after nested instruction")
+                    log.error("Line %d: Unexpected token '%s', expected ')' after nested instruction", self.line_number, self.current_token)
                     return None
                 self.next_token()
                 self.parse_newline_and_space()
@@ -695,21 +626,19 @@ class Parser:
                 elif isinstance(self.current_token, ControlFlowInstruction):
                     nested_instr = self.parse_control_flow()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing control flow, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing control flow, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 elif isinstance(self.current_token, Instruction):
                     nested_instr = self.parse_instruction()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 else:   #TODO
-                    print('Other options in parse_block???')
+                    log.debug("Other options in parse_block???")
                     break
         # return ControlFlowInstruction(_block, operands)    
         op_block.operands = operands
@@ -734,49 +663,41 @@ class Parser:
                 if isinstance(self.current_token, ControlFlowInstruction):
                     nested_instr = self.parse_control_flow()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing control flow, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing control flow, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 elif isinstance(self.current_token, Instruction):
                     nested_instr = self.parse_instruction()
-                    print("nested_instr inside parse_loop : " + str(nested_instr))
+                    log.debug("nested_instr inside parse_loop : %s", nested_instr)
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 else:   #TODO
-                    print('(...) Other options in parse_loop???')
+                    log.debug("(...) Other options in parse_loop???")
 
                 if not isinstance(self.current_token, RPAREN):
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')' after nested instruction")
+                    log.error("Line %d: Unexpected token '%s', expected ')' after nested instruction", self.line_number, self.current_token)
                     return None
                 self.next_token()
                 self.parse_newline_and_space()
                 
             else:   #TODO
-                if self.par_verb_flag:
-                    print(self._par_colorize(f"Line {self.line_number}: ", 'DEBUG_COLOR'), end="     ")
-                    
-                    print(f'else in parse_loop, current_token : {self.current_token}')
+                log.debug("Line %d: else in parse_loop, current_token : %s", self.line_number, self.current_token)
 
                 # Handle immediate values
-                # if self.par_verb_flag:
-                    print("Inside parse loop: " + str(type(self.current_token)))
+                log.debug("Inside parse loop: %s", type(self.current_token))
                 # if self.current_token == "end":
                 if isinstance(self.current_token, _end):
-                    print(self._par_colorize(f"Line {self.line_number}: ", 'DEBUG_COLOR'), end="     ")
-                    print("_end for _loop")
+                    log.debug("Line %d: _end for _loop", self.line_number)
                     self.next_token()   # To avoid the warning "Is ControlFlowInstruction ... but not found!"
                     self.parse_newline_and_space()
                     
                     # return ControlFlowInstruction(_loop, operands)
                     op_loop.operands = operands
-                    print("op_loop.operands : " + str(op_loop.operands))
+                    log.debug("op_loop.operands : %s", op_loop.operands)
                     
                     return op_loop
                 
@@ -787,28 +708,26 @@ class Parser:
                     
                 elif isinstance(self.current_token, ControlFlowInstruction):
                     nested_instr = self.parse_control_flow()
-                    print(f'Line {self.line_number}: nested control flow in parse_loop : {nested_instr}')   #TODO
+                    log.debug("Line %d: nested control flow in parse_loop : %s", self.line_number, nested_instr)    #TODO
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing control flow, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing control flow, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 elif isinstance(self.current_token, Instruction):
                     nested_instr = self.parse_instruction()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 else:   #TODO
-                    print('Other options/operations/class of instrustions in parse_loop???')
+                    log.debug("Other options/operations/class of instrustions in parse_loop???")
                     break
         # return ControlFlowInstruction(_loop, operands)  
         
         op_loop.operands = operands
-        print("op_loop.operands : " + str(op_loop.operands))
+        log.debug("op_loop.operands : %s", op_loop.operands)
         return op_loop
 
     def parse_br(self, op_br: _br):
@@ -823,8 +742,7 @@ class Parser:
             return op_br
         
         else:
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected function index/name for br")
+            log.error("Line %d: Unexpected token '%s', expected function index/name for br", self.line_number, self.current_token)
             return None
 
     # def parse_br_if(self):
@@ -841,8 +759,7 @@ class Parser:
             self.parse_newline_and_space()
             
         else:
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected branch target (label index/name) for br_if")
+            log.error("Line %d: Unexpected token '%s', expected branch target (label index/name) for br_if", self.line_number, self.current_token)
             return None
 
         # Parse condition and other nested instructions (similar to parse_loop/parse_if)
@@ -855,16 +772,14 @@ class Parser:
                 if isinstance(self.current_token, ControlFlowInstruction):
                     nested_instr = self.parse_control_flow()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing control flow, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing control flow, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 elif isinstance(self.current_token, Instruction):
                     nested_instr = self.parse_instruction()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
@@ -874,13 +789,12 @@ class Parser:
                         operands.append(self.current_token.value)
                         self.next_token()
                     else:
-                        print(f'Line {self.line_number}: Unexpected token in br_if: {self.current_token}')
+                        log.debug("Line %d: Unexpected token in br_if: %s", self.line_number, self.current_token)
                         return None
 
                 # Expect closing parenthesis
                 if not isinstance(self.current_token, RPAREN):
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')' after nested instruction in br_if")
+                    log.error("Line %d: Unexpected token '%s', expected ')' after nested instruction in br_if", self.line_number, self.current_token)
                     return None
                 
                 self.next_token()
@@ -896,16 +810,14 @@ class Parser:
                 elif isinstance(self.current_token, ControlFlowInstruction):
                     nested_instr = self.parse_control_flow()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing control flow, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing control flow, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 elif isinstance(self.current_token, Instruction):
                     nested_instr = self.parse_instruction()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
@@ -945,25 +857,22 @@ class Parser:
                 if isinstance(self.current_token, ControlFlowInstruction):
                     nested_instr = self.parse_control_flow()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing control flow, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing control flow, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 elif isinstance(self.current_token, Instruction):
                     nested_instr = self.parse_instruction()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 else:   #TODO
-                    print('(...) Other options in parse_block???')
+                    log.debug("(...) Other options in parse_block???")
 
                 if not isinstance(self.current_token, RPAREN):
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ") 
-                    print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')' after nested instruction")
+                    log.error("Line %d: Unexpected token '%s', expected ')' after nested instruction", self.line_number, self.current_token)
                     return None
                 self.next_token()
                 self.parse_newline_and_space()
@@ -971,14 +880,10 @@ class Parser:
             else:
                 # Handle immediate values
                 
-                if self.par_verb_flag:
-                    print(self._par_colorize(f"Line {self.line_number}: ", 'DEBUG_COLOR'), end="     ")
-                    
-                    print("Inside parse if: " + str(type(self.current_token)))
+                log.debug("Line %d: Inside parse if: %s", self.line_number, type(self.current_token))
                 # if self.current_token == "end":
                 if isinstance(self.current_token, _end):
-                    print(self._par_colorize(f"Line {self.line_number}: ", 'DEBUG_COLOR'), end="     ")
-                    print("_end for _if")
+                    log.debug("Line %d: _end for _if", self.line_number)
                     self.next_token()   # To avoid the warning "Is ControlFlowInstruction ... but not found!"
                     self.parse_newline_and_space()
                     
@@ -994,21 +899,19 @@ class Parser:
                 elif isinstance(self.current_token, ControlFlowInstruction):
                     nested_instr = self.parse_control_flow()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing control flow, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing control flow, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 elif isinstance(self.current_token, Instruction):
                     nested_instr = self.parse_instruction()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 else:   #TODO
-                    print('Other options in parse_block???')
+                    log.debug("Other options in parse_block???")
                     break
                 
                 
@@ -1029,15 +932,13 @@ class Parser:
                         
                         nested_instr = self.parse_instruction()
                         if nested_instr is None:
-                            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                            print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                            log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                             return None
                         else_operands.append(nested_instr)
                             
                         if not isinstance(self.current_token, RPAREN):
-                            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')' after else instruction")
+                            log.error("Line %d: Unexpected token '%s', expected ')' after else instruction", self.line_number, self.current_token)
                             return None
                         self.next_token()
                         self.parse_newline_and_space()
@@ -1081,16 +982,14 @@ class Parser:
                 if isinstance(self.current_token, ControlFlowInstruction):
                     nested_instr = self.parse_control_flow()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing control flow, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing control flow, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 elif isinstance(self.current_token, Instruction):
                     nested_instr = self.parse_instruction()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
@@ -1100,13 +999,12 @@ class Parser:
                         operands.append(self.current_token.value)
                         self.next_token()
                     else:
-                        print(f'Line {self.line_number}: Unexpected token in br_if: {self.current_token}')
+                        log.debug("Line %d: Unexpected token in br_if: %s", self.line_number, self.current_token)
                         return None
 
                 # Expect closing parenthesis
                 if not isinstance(self.current_token, RPAREN):
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')' after nested instruction in br_if")
+                    log.error("Line %d: Unexpected token '%s', expected ')' after nested instruction in br_if", self.line_number, self.current_token)
                     return None
                 
                 self.next_token()
@@ -1122,16 +1020,14 @@ class Parser:
                 elif isinstance(self.current_token, ControlFlowInstruction):
                     nested_instr = self.parse_control_flow()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing control flow, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing control flow, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                 elif isinstance(self.current_token, Instruction):
                     nested_instr = self.parse_instruction()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
@@ -1167,25 +1063,22 @@ class Parser:
                     if isinstance(self.current_token, ControlFlowInstruction):
                         nested_instr = self.parse_control_flow()
                         if nested_instr is None:
-                            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                            print(f"Line {self.line_number}: None returned after parsing control flow, current token : '{self.current_token}'")
+                            log.error("Line %d: None returned after parsing control flow, current token : '%s'", self.line_number, self.current_token)
                         
                             return None
                         operands.append(nested_instr)
                     elif isinstance(self.current_token, Instruction):
                         nested_instr = self.parse_instruction()
                         if nested_instr is None:
-                            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                            print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                            log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                             return None
                         operands.append(nested_instr)
                     else:   #TODO
-                        print('Other options in parse_control_flow???')
+                        log.debug("Other options in parse_control_flow???")
 
                     if not isinstance(self.current_token, RPAREN):
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')' after nested instruction")
+                        log.error("Line %d: Unexpected token '%s', expected ')' after nested instruction", self.line_number, self.current_token)
                         return None
                     self.next_token()
                     self.parse_newline_and_space()
@@ -1218,15 +1111,13 @@ class Parser:
                             
                             nested_instr = self.parse_instruction()
                             if nested_instr is None:
-                                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                                print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                                log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                                 return None
                             else_operands.append(nested_instr)
                             
                             if not isinstance(self.current_token, RPAREN):
-                                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ") 
-                                print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')' after else instruction")
+                                log.error("Line %d: Unexpected token '%s', expected ')' after else instruction", self.line_number, self.current_token)
                                 return None
                             self.next_token()
                             self.parse_newline_and_space()
@@ -1245,8 +1136,7 @@ class Parser:
                 })
         
         elif op == 'br_if': #TODO:Implementation
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected implementation for br_if parser")
+            log.error("Line %d: Unexpected token '%s', expected implementation for br_if parser", self.line_number, self.current_token)
             return None
         
         elif op == 'call':
@@ -1257,8 +1147,7 @@ class Parser:
                 self.parse_newline_and_space()
                 
             else:
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected function index/name for call")
+                log.error("Line %d: Unexpected token '%s', expected function index/name for call", self.line_number, self.current_token)
                 return None
             
             # Parse call arguments
@@ -1269,15 +1158,13 @@ class Parser:
                     
                     nested_instr = self.parse_instruction()
                     if nested_instr is None:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                        log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                         return None
                     operands.append(nested_instr)
                     
                     if not isinstance(self.current_token, RPAREN):
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')' after call argument")
+                        log.error("Line %d: Unexpected token '%s', expected ')' after call argument", self.line_number, self.current_token)
                         return None
                     self.next_token()
                     self.parse_newline_and_space()
@@ -1324,9 +1211,8 @@ class Parser:
         op = type(self.current_token).__name__[1:].replace('_', '.', 1)    # 1 for avoiding i32.lt.s
         operands = []
         
-        print(self._par_colorize(f"Line {self.line_number}: ", 'PARSER_DEBUG_COLOR'), end="     ")
                 
-        print('Instruction inside parse_instruction:  ' + str(type(self.current_token)))
+        log.debug("Line %d: Instruction inside parse_instruction:  %s", self.line_number, type(self.current_token))
 
         if isinstance(self.current_token, BinaryInstruction):
             self.next_token()
@@ -1353,34 +1239,29 @@ class Parser:
                 if isinstance(self.current_token, Instruction):
                     nested_instr = self.parse_instruction()
                 else:
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: Not an instruction, current token : '{self.current_token}'")
+                    log.error("Line %d: Not an instruction, current token : '%s'", self.line_number, self.current_token)
                     
                         
                 
                 if nested_instr is None:
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                    log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                         
                     return None
                 operands.append(nested_instr)
                 if not isinstance(self.current_token, RPAREN):
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")   
-                    print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')' after nested instruction")
+                    log.error("Line %d: Unexpected token '%s', expected ')' after nested instruction", self.line_number, self.current_token)
                     return None
             elif isinstance(self.current_token, ControlFlowInstruction):
                 nested_instr = self.parse_control_flow()
                 if nested_instr is None:
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: None returned after parsing control flow, current token : '{self.current_token}'")
+                    log.error("Line %d: None returned after parsing control flow, current token : '%s'", self.line_number, self.current_token)
                     
                     return None
                 operands.append(nested_instr)
             elif isinstance(self.current_token, Instruction):
                 nested_instr = self.parse_instruction()
                 if nested_instr is None:
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: None returned after parsing instruction, current token : '{self.current_token}'")
+                    log.error("Line %d: None returned after parsing instruction, current token : '%s'", self.line_number, self.current_token)
                     
                     return None
                 operands.append(nested_instr)
@@ -1389,8 +1270,7 @@ class Parser:
             
             
             else:
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f"Line {self.line_number}: Unexpected token in instruction: {self.current_token}")
+                log.error("Line %d: Unexpected token in instruction: %s", self.line_number, self.current_token)
 
                 return None
                 
@@ -1398,12 +1278,11 @@ class Parser:
             self.parse_newline_and_space()
             
         # if self.par_verb_flag:
-        print(self._par_colorize(f"Line {self.line_number}: ", 'DEBUG_COLOR'), end="     ")
         
         op_class.operands = operands
         
         # print(f'In parse_instruction : {Instruction(op, operands)}')    #TODO
-        print(f'In parse_instruction : {op_class}')    #TODO
+        log.debug("Line %d: In parse_instruction : %s", self.line_number, op_class)    #TODO
         
         return op_class     # Instruction(op, operands)
         # else:
@@ -1411,24 +1290,21 @@ class Parser:
         #     return None
     
     def parse_export(self):
-        print(f"Enter parse_export() : {self.current_token}")
+        log.debug("Enter parse_export() : %s", self.current_token)
         
         export = Export()
         self.next_token()
         self.parse_newline_and_space()
         
         if self.current_token is None:
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected EOF in export")
+            log.error("Line %d: Unexpected EOF in export", self.line_number)
             return None
         if isinstance(self.current_token, LPAREN):
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token ')' in export")
+            log.error("Line %d: Unexpected token ')' in export", self.line_number)
             return None
 
         if not isinstance(self.current_token, STRING):
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")  
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected export name to be a string")
+            log.error("Line %d: Unexpected token '%s', expected export name to be a string", self.line_number, self.current_token)
             return None
         
         export.value = self.current_token
@@ -1436,8 +1312,7 @@ class Parser:
         self.parse_newline_and_space()
         
         if not isinstance(self.current_token, LPAREN):
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected '(' after export name")
+            log.error("Line %d: Unexpected token '%s', expected '(' after export name", self.line_number, self.current_token)
             return None
             
         self.next_token()
@@ -1450,8 +1325,7 @@ class Parser:
             
             # print(self.current_token)
             if not isinstance(self.current_token, ID):
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected function name after 'func' in export")
+                log.error("Line %d: Unexpected token '%s', expected function name after 'func' in export", self.line_number, self.current_token)
                 return None
             # func_name_registered = False
             exp_func = Func(self.current_token.value)
@@ -1472,8 +1346,7 @@ class Parser:
             
             # print(self.current_token)
             if not isinstance(self.current_token, ID):
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected function name after 'func' in export")
+                log.error("Line %d: Unexpected token '%s', expected function name after 'func' in export", self.line_number, self.current_token)
                 return None
             # func_name_registered = False
             exp_mem = Memory(self.current_token.value)
@@ -1489,31 +1362,28 @@ class Parser:
             export.isFunc = False
             
         else:
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected 'func' or 'memory' after '(' in export")
+            log.error("Line %d: Unexpected token '%s', expected 'func' or 'memory' after '(' in export", self.line_number, self.current_token)
             return None
         
         self.next_token()
         self.parse_newline_and_space()
         
         if not isinstance(self.current_token, RPAREN):
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected token ')' after function/memory name in export")
+            log.error("Line %d: Unexpected token '%s', expected token ')' after function/memory name in export", self.line_number, self.current_token)
             return None
         self.next_token()
         self.parse_newline_and_space()
         
         if not isinstance(self.current_token, RPAREN):
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected token ')' in export")
+            log.error("Line %d: Unexpected token '%s', expected token ')' in export", self.line_number, self.current_token)
             return None
         
-        print(f"Before return in parse_export() : {export}")
+        log.debug("Before return in parse_export() : %s", export)
         return export
     
     def parse_memory(self):
         
-        print(f"Enter parse_memory() : {self.current_token}")
+        log.debug("Enter parse_memory() : %s", self.current_token)
         
         mem = Memory()
         self.next_token()
@@ -1521,16 +1391,14 @@ class Parser:
         
         # mem_name = None
         if not isinstance(self.current_token, ID):
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")    
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected memory name after 'mem'")
+            log.error("Line %d: Unexpected token '%s', expected memory name after 'mem'", self.line_number, self.current_token)
             return None
         mem.name = self.current_token.value
         self.next_token() 
         self.parse_newline_and_space()
         
         if not isinstance(self.current_token, CONST):
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected a CONST after memory name")
+            log.error("Line %d: Unexpected token '%s', expected a CONST after memory name", self.line_number, self.current_token)
             return None
         mem.value = self.current_token
         # self.module.mems.append(mem)
@@ -1538,11 +1406,10 @@ class Parser:
         self.parse_newline_and_space()
         
         if not isinstance(self.current_token, RPAREN):
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")    
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected token ')' in memory")
+            log.error("Line %d: Unexpected token '%s', expected token ')' in memory", self.line_number, self.current_token)
             return None
         
-        print(f"Before return in parse_memory() : {mem}")
+        log.debug("Before return in parse_memory() : %s", mem)
         
         return mem
 
@@ -1562,8 +1429,7 @@ class Parser:
             self.parse_newline_and_space()
             
         else:
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected local type")
+            log.error("Line %d: Unexpected token '%s', expected local type", self.line_number, self.current_token)
             return None
         
         if isinstance(self.current_token, LPAREN):
@@ -1583,23 +1449,19 @@ class Parser:
                         self.next_token()
                         self.parse_newline_and_space()
                     else:
-                        print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                        print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected ')'")
+                        log.error("Line %d: Unexpected token '%s', expected ')'", self.line_number, self.current_token)
                         return None
                 
                 else:
-                    print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                    print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected a numeric literal")
+                    log.error("Line %d: Unexpected token '%s', expected a numeric literal", self.line_number, self.current_token)
                     return None          
                 
             elif isinstance(self.current_token, Instruction):
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f"Line {self.line_number}: Invalid initializer: instruction not valid in initializer expression: '{self.current_token}'")
+                log.error("Line %d: Invalid initializer: instruction not valid in initializer expression: '%s'", self.line_number, self.current_token)
                 return None  
             
             else:
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected an instr.")
+                log.error("Line %d: Unexpected token '%s', expected an instr.", self.line_number, self.current_token)
                 return None
             
             
@@ -1622,28 +1484,20 @@ class Parser:
                 #     return None
             
             else:
-                print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-                print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected a numeric literal")
+                log.error("Line %d: Unexpected token '%s', expected a numeric literal", self.line_number, self.current_token)
                 return None
         elif isinstance(self.current_token, Instruction):
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Invalid initializer: instruction not valid in initializer expression: '{self.current_token}'")
+            log.error("Line %d: Invalid initializer: instruction not valid in initializer expression: '%s'", self.line_number, self.current_token)
             return None  
             
         else:
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected an instr.")
+            log.error("Line %d: Unexpected token '%s', expected an instr.", self.line_number, self.current_token)
             return None
             
         if not isinstance(self.current_token, RPAREN):
-            print(self._par_colorize("ERROR: ", 'ERROR_COLOR'), end="\n     ")    
-            print(f"Line {self.line_number}: Unexpected token '{self.current_token}', expected token ')' in global")
+            log.error("Line %d: Unexpected token '%s', expected token ')' in global", self.line_number, self.current_token)
             return None
         
-        print("parse_global_current_token : " + str(self.current_token))       
+        log.debug("parse_global_current_token : %s", self.current_token)
         return glob
-    
-    def _par_colorize(self, text, color_key):
-        if self.par_col_flag:
-            return f"{COLORS[color_key]}{text}{COLORS['RESET_COLOR']}"
-        return text
\ No newline at end of file
+    
\ No newline at end of file
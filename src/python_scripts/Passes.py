@@ -0,0 +1,406 @@
+from Lexer import (
+    Module, Func, Local, Instruction, BinaryInstruction,
+    _i32_const, _i32_add, _i32_sub, _i32_div_s, _i32_clz,
+    _local_get, _local_set, _local_tee, _global_get, _global_set,
+    _call, _br_if, _if, _block, _loop,
+    _i32_load, _i32_store
+)
+from Runtime import (
+    RuntimeError, HOST_FUNCTIONS, operand_value, immediate, block_parts, split_if, flatten,
+    local_index, function_index, wrap_i32, parse_int
+)
+from Validator import Validator
+from typing import List, Dict, Set, Any, Optional, Iterator, TextIO, Tuple
+import contextlib
+import io
+import sys
+import time
+import Log
+
+log = Log.get_logger("Passes")
+
+# Optimization passes between Parser.parse and the engines. The parser
+# produces several shapes for the same code (folded operands, `block ... end`
+# swallowing the rest of the body, three layouts of `if`), so the first pass
+# rewrites every body into one canonical form, which the other passes rely
+# on and every engine already accepts:
+#   - a body is a list of instructions in execution order, their operands
+#     hold immediates only
+#   - a block or loop has its label in `name` and its body in `operands`
+#   - an if has its label in `name` and its arms in operands['then'] and
+#     operands['else'], its condition is computed by the instructions
+#     before it
+# Passes rewrite the Module in place. They must run before a CompiledModule
+# is built, linking quickens the nodes.
+
+class PassError(Exception):
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(f"PassError: {message}")
+
+# Canonical IR
+
+def opcode(instr: Instruction) -> str:
+    """WAT name of an instruction, e.g. _i32_add -> i32.add"""
+    name = type(instr).__name__[1:]
+    prefix, _, rest = name.partition('_')
+    return f"{prefix}.{rest}" if prefix in ('i32', 'local', 'global') else name
+
+def make(cls: type, *imms: Any) -> Instruction:
+    """A canonical instruction, e.g. make(_i32_const, '4')"""
+    return cls(None, list(imms))
+
+def make_block(cls: type, label: Optional[str], body: List[Instruction]) -> Instruction:
+    """A canonical block or loop"""
+    instr = cls(None, body)
+    instr.name = label
+    return instr
+
+def make_if(label: Optional[str], then_body: List[Instruction], else_body: List[Instruction]) -> _if:
+    """A canonical if, its condition must be on the stack before it"""
+    return _if(None, {'then': then_body, 'else': else_body}, name=label)
+
+def immediates(instr: Instruction) -> List[Any]:
+    """Immediates of a canonical instruction, ID/CONST tokens unwrapped"""
+    return [operand_value(op) for op in instr.operands]
+
+def arms(instr: Instruction) -> List[List[Instruction]]:
+    """Nested bodies of a canonical block, loop or if (empty otherwise)"""
+    if isinstance(instr, _if):
+        return [instr.operands['then'], instr.operands['else']]
+    if isinstance(instr, (_block, _loop)):
+        return [instr.operands]
+    return []
+
+def walk(body: List[Instruction]) -> Iterator[Instruction]:
+    """Every instruction of a canonical body, nested ones included"""
+    for instr in body:
+        yield instr
+        for arm in arms(instr):
+            yield from walk(arm)
+
+def local_key(func: Func, instr: Instruction) -> Optional[int]:
+    """Index of the local a local.get/set/tee accesses, None if undefined"""
+    try:
+        return local_index(func, immediate(instr))
+    except (RuntimeError, ValueError):
+        return None
+
+def assigned_locals(body: List[Instruction], func: Func) -> Set[Optional[int]]:
+    """Locals written anywhere in a canonical body"""
+    return {local_key(func, instr) for instr in walk(body) if isinstance(instr, (_local_set, _local_tee))}
+
+def add_local(func: Func, name: str) -> str:
+    """Add an i32 local named `name`, or a variant of it not taken yet"""
+
+    taken = {var.name for var in list(func.params) + list(func.locals)}
+    unique = name
+    n = 1
+    while unique in taken:
+        n += 1
+        unique = f"{name}_{n}"
+    func.locals.append(Local(unique, 'i32'))
+    return unique
+
+def stack_effect(instr: Instruction, module: Module) -> Tuple[int, int]:
+    """(popped, pushed) operand stack slots of a straight-line instruction,
+    or of the condition of an if. Branches and block bodies are up to the
+    caller."""
+
+    if isinstance(instr, (_i32_const, _local_get, _global_get)):
+        return 0, 1
+    if isinstance(instr, BinaryInstruction):
+        return 2, 1
+    if isinstance(instr, (_i32_clz, _i32_load, _local_tee)):
+        return 1, 1
+    if isinstance(instr, (_local_set, _global_set, _br_if, _if)):
+        return 1, 0
+    if isinstance(instr, _i32_store):
+        return 2, 0
+    if isinstance(instr, _call):
+        try:
+            name = immediate(instr)
+            index = function_index(module, name)
+        except (RuntimeError, ValueError):
+            return 0, 0
+        if index is not None:
+            callee = module.funcs[index]
+            return len(callee.params), len(callee.results)
+        return HOST_FUNCTIONS.get(name, (0, 0))
+    return 0, 0
+
+def pure_value_start(body: List[Instruction], end: int) -> Optional[int]:
+    """Start of the instructions in body[:end] that compute the value on
+    top of the stack at `end`, if they have no side effects and cannot
+    trap. None otherwise."""
+
+    needed = 1
+    i = end
+    while needed:
+        i -= 1
+        if i < 0:
+            return None
+        instr = body[i]
+        if isinstance(instr, (_i32_const, _local_get, _global_get)):
+            needed -= 1
+        elif isinstance(instr, BinaryInstruction) and not isinstance(instr, _i32_div_s):
+            needed += 1
+        elif not isinstance(instr, _i32_clz):
+            return None
+    return i
+
+def constant_value(instr: Instruction) -> Optional[int]:
+    """Value of an i32.const, None for anything else"""
+    if not isinstance(instr, _i32_const):
+        return None
+    try:
+        return wrap_i32(parse_int(immediate(instr)))
+    except (RuntimeError, ValueError):
+        return None
+
+def induction_step(func: Func, body: List[Instruction], i: int) -> Optional[int]:
+    """Step k if body[i] is the update `$j = $j +/- k` of a local.set, as
+    `local.get $j i32.const k i32.add local.set $j` (or k first, or i32.sub)"""
+
+    if i < 3 or not isinstance(body[i], _local_set) or not isinstance(body[i - 1], (_i32_add, _i32_sub)):
+        return None
+    key = local_key(func, body[i])
+    first, second = body[i - 3], body[i - 2]
+    if isinstance(first, _local_get) and local_key(func, first) == key:
+        step = constant_value(second)
+    elif isinstance(body[i - 1], _i32_add) and isinstance(second, _local_get) and local_key(func, second) == key:
+        step = constant_value(first)
+    else:
+        return None
+    if step is None or key is None:
+        return None
+    return wrap_i32(-step) if isinstance(body[i - 1], _i32_sub) else step
+
+def copy_body(body: List[Instruction]) -> List[Instruction]:
+    """A fresh copy of a canonical body: linking quickens nodes in place, so
+    two places in a module cannot share them"""
+
+    code: List[Instruction] = []
+    for instr in body:
+        if isinstance(instr, _if):
+            code.append(make_if(instr.name, copy_body(instr.operands['then']), copy_body(instr.operands['else'])))
+        elif isinstance(instr, (_block, _loop)):
+            code.append(make_block(type(instr), instr.name, copy_body(instr.operands)))
+        else:
+            code.append(make(type(instr), *instr.operands))
+    return code
+
+def canonical_body(instrs: List[Any]) -> List[Instruction]:
+
+    body = []
+    for instr in flatten(instrs):
+        if isinstance(instr, (_block, _loop)):
+            label, inner, _ = block_parts(instr)
+            body.append(make_block(type(instr), label, canonical_body(inner)))
+        elif isinstance(instr, _if):
+            condition, then_body, else_body = split_if(instr)
+            body.extend(canonical_body(condition))
+            body.append(make_if(getattr(instr, 'name', None), canonical_body(then_body), canonical_body(else_body)))
+        else:
+            # Folded operands were emitted by flatten, drop them here
+            instr.operands = [op for op in instr.operands
+                              if not isinstance(op, Instruction) and not isinstance(op, type)]
+            body.append(instr)
+    return body
+
+# IR dumps, in flat WAT syntax
+
+def format_body(body: List[Instruction], indent: int) -> List[str]:
+
+    pad = "  " * indent
+    lines = []
+    for instr in body:
+        if isinstance(instr, _if):
+            lines.append(f"{pad}if" + (f" {instr.name}" if instr.name else ""))
+            lines.extend(format_body(instr.operands['then'], indent + 1))
+            if instr.operands['else']:
+                lines.append(f"{pad}else")
+                lines.extend(format_body(instr.operands['else'], indent + 1))
+            lines.append(f"{pad}end")
+        elif isinstance(instr, (_block, _loop)):
+            lines.append(f"{pad}{opcode(instr)}" + (f" {instr.name}" if instr.name else ""))
+            lines.extend(format_body(instr.operands, indent + 1))
+            lines.append(f"{pad}end")
+        else:
+            lines.append(" ".join([pad + opcode(instr)] + [str(imm) for imm in immediates(instr)]))
+    return lines
+
+def format_function(func: Func) -> str:
+
+    header = ["(func"]
+    if func.name:
+        header.append(func.name)
+    header.extend(f"(param {p.name} {p.type})" if p.name else f"(param {p.type})" for p in func.params)
+    header.extend(f"(result {r})" for r in func.results)
+    lines = [" ".join(header)]
+    lines.extend(f"  (local {l.name} {l.type})" if l.name else f"  (local {l.type})" for l in func.locals)
+    lines.extend(format_body(func.body, 1))
+    lines.append(")")
+    return "\n".join(lines)
+
+def format_module(module: Module) -> str:
+    return "\n".join(format_function(func) for func in module.funcs)
+
+def validates(module: Module) -> bool:
+    """Run the Validator, silencing its progress output"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            return bool(Validator().validate(module))
+        except Exception:
+            return False
+
+# Passes
+
+class Pass:
+    """A transformation of canonical IR. run() rewrites a module in place
+    and returns the number of changes, `counts` breaks them down."""
+
+    name = "pass"
+    # Passes that only change how code is represented, not what it does
+    representation_only = False
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        # Changes by function name
+        self.functions: Dict[str, int] = {}
+
+    def count(self, key: str, n: int = 1) -> None:
+        if n:
+            self.counts[key] = self.counts.get(key, 0) + n
+
+    def run(self, module: Module) -> int:
+        total = 0
+        for i, func in enumerate(module.funcs):
+            changes = self.run_function(func, module)
+            if changes:
+                name = func.name or f"func {i}"
+                self.functions[name] = self.functions.get(name, 0) + changes
+            total += changes
+        return total
+
+    def run_function(self, func: Func, module: Module) -> int:
+        raise NotImplementedError
+
+class Normalize(Pass):
+    """Rewrite the parser's output into the canonical form, see above"""
+
+    name = "normalize"
+    # The Validator checks top-level instructions only, so it sees more
+    # after normalizing and the verification baseline is taken afterwards
+    representation_only = True
+
+    def run_function(self, func: Func, module: Module) -> int:
+        if self.is_canonical(func.body):
+            return 0
+        func.body = canonical_body(func.body)
+        self.count("functions rewritten")
+        return 1
+
+    def is_canonical(self, body: List[Any]) -> bool:
+        for instr in body:
+            if not isinstance(instr, Instruction):
+                return False
+            if isinstance(instr, _if):
+                if not isinstance(instr.operands, dict):
+                    return False
+            elif isinstance(instr, (_block, _loop)):
+                if not hasattr(instr, 'name') or any(not isinstance(op, Instruction) for op in instr.operands):
+                    return False
+            elif any(isinstance(op, (Instruction, type)) for op in instr.operands):
+                return False
+            if not all(self.is_canonical(arm) for arm in arms(instr)):
+                return False
+        return True
+
+OPT_LEVELS = (0, 1, 2, 3)
+UNROLL_FACTOR = 4
+
+def pipeline(level: int, unroll_factor: int = UNROLL_FACTOR) -> List[Pass]:
+    """Passes of an optimization level: -O0 runs none, higher levels add
+    passes that cost more compile time. -O3 unrolls counted loops by
+    `unroll_factor`, 1 turns unrolling off."""
+
+    if level not in OPT_LEVELS:
+        raise PassError(f"Unknown optimization level: {level}")
+    if unroll_factor < 1:
+        raise PassError(f"Unroll factor must be at least 1: {unroll_factor}")
+    if level == 0:
+        return []
+    # Imported here, the passes depend on this module
+    from ConstantFolding import ConstantFolding
+    from DeadCode import DeadCodeElimination
+    from Inlining import Inlining
+    from LoopInvariant import LoopInvariantCodeMotion
+    from LoopUnrolling import LoopUnrolling
+    from StrengthReduction import StrengthReduction
+    from ValueNumbering import CommonSubexpressionElimination
+    
+    passes = [Normalize(), ConstantFolding(), DeadCodeElimination()]
+    if level >= 2:
+        # Inlined bodies get the caller's constants, fold them again
+        inlining = Inlining() if level == 2 else Inlining(max_size=40, single_site_size=400, max_depth=3)
+        passes += [inlining, ConstantFolding(), DeadCodeElimination(), LoopInvariantCodeMotion(), StrengthReduction()]
+        if level >= 3 and unroll_factor > 1:
+            # Before cse, which rewrites the induction variable updates
+            passes.append(LoopUnrolling(factor=unroll_factor))
+        passes.append(CommonSubexpressionElimination())
+    return passes
+
+class PassManager:
+    """Run passes in order over a Module, timing each one. With `verify`,
+    a module the Validator accepted must still be accepted after every
+    pass. With `dump_ir`, the IR after every pass is written to `stream`."""
+
+    def __init__(self, passes: List[Pass], verify: bool = True, dump_ir: bool = False,
+                 stream: Optional[TextIO] = None):
+        self.passes = passes
+        self.verify = verify
+        self.dump_ir = dump_ir
+        self.stream = stream
+        # (pass, seconds, changes) of the last run
+        self.results: List[Any] = []
+
+    def run(self, module: Module) -> Module:
+
+        self.results = []
+        valid = self.verify and validates(module)
+        for opt_pass in self.passes:
+            start = time.perf_counter()
+            changes = opt_pass.run(module)
+            elapsed = time.perf_counter() - start
+            self.results.append((opt_pass, elapsed, changes))
+            log.info("%s: %d changes in %.2fms", opt_pass.name, changes, elapsed * 1000)
+            if self.dump_ir:
+                stream = self.stream or sys.stdout
+                stream.write(f";; IR after {opt_pass.name}\n{format_module(module)}\n")
+            if not self.verify:
+                continue
+            if opt_pass.representation_only:
+                valid = validates(module)
+            elif valid and not validates(module):
+                raise PassError(f"The module no longer validates after {opt_pass.name}")
+        return module
+
+    def report(self) -> str:
+        total = sum(elapsed for _, elapsed, _ in self.results)
+        lines = [f"Passes: {len(self.results)} run in {total * 1000:.2f}ms"]
+        for opt_pass, elapsed, changes in self.results:
+            details = ", ".join(f"{key} {n}" for key, n in opt_pass.counts.items())
+            lines.append(f"  {opt_pass.name}: {changes} changes, {elapsed * 1000:.2f}ms"
+                         + (f" ({details})" if details else ""))
+            lines.extend(f"    {name}: {n}" for name, n in opt_pass.functions.items())
+        return "\n".join(lines)
+
+def optimize(module: Module, level: int, verify: bool = True, dump_ir: bool = False,
+             stream: Optional[TextIO] = None, unroll_factor: int = UNROLL_FACTOR) -> PassManager:
+    """Run the pipeline of an optimization level over `module` in place"""
+
+    manager = PassManager(pipeline(level, unroll_factor), verify=verify, dump_ir=dump_ir, stream=stream)
+    manager.run(module)
+    return manager
@@ -0,0 +1,618 @@
+from Lexer import (
+    Module, Func,
+    Instruction, BinaryInstruction,
+    _i32_const, _i32_add, _i32_sub, _i32_mul, _i32_div_s,
+    _i32_ge_u, _i32_gt_s, _i32_lt_s, _i32_lt_u, _i32_clz,
+    _local_get, _local_set, _local_tee,
+    _global_get, _global_set,
+    _call, _return, _block, _loop, _br, _br_if, _if, _then, _else, _end,
+    _i32_load, _i32_store
+)
+from Interpreter import Interpreter, RuntimeError
+from Runtime import (
+    I32_MIN, I32_MAX, U32_MASK, wrap_i32, i32_div_s, i32_clz, parse_int,
+    host_log, HOST_FUNCTIONS,
+    immediate, label_of, block_parts, split_if, flatten,
+    local_index, global_index, function_index, find_function
+)
+from typing import List, Dict, Any, Optional, Tuple
+import struct
+import Log
+
+log = Log.get_logger("Register")
+
+# Register IR: every instruction is a 4-tuple (op, a, b, c) in three-address
+# form. The register file of a frame is laid out as
+#   [params | locals | constants | operand stack slots]
+# so local.get and i32.const need no instruction at all, they just name a
+# register, and `local.get a; local.get b; i32.add; local.set c` lowers to
+# the single instruction (ADD, c, a, b).
+
+MOV = 0         # a = b
+ADD = 1         # a = b + c
+SUB = 2
+MUL = 3
+LT_S = 4        # a = b < c
+LT_U = 5
+GT_S = 6
+GE_U = 7
+BR_LT_S = 8     # if a < b: goto c  (compare fused with br_if/if)
+BR_GE_S = 9
+BR_GT_S = 10
+BR_LE_S = 11
+BR_LT_U = 12
+BR_GE_U = 13
+JMP_IF = 14     # if a: goto b
+JMP_IFNOT = 15  # if not a: goto b
+JMP = 16        # goto a
+LOAD = 17       # a = memory[b]
+STORE = 18      # memory[a] = b
+DIV_S = 19
+CLZ = 20        # a = clz(b)
+GLOBAL_GET = 21 # a = globals[b]
+GLOBAL_SET = 22 # globals[a] = b
+CALL = 23       # a.. = funcs[b](*c), c is a tuple of registers
+CALL_HOST = 24  # host function a(*b)
+RETURN = 25     # return registers a (tuple)
+TRAP = 26       # raise a, stands in for a body that failed to lower
+BACK_EDGE = 27  # pc = back_edge(pc a), patched over loop back-edges by profiling tiers
+
+OPCODE_NAMES = {
+    MOV: 'mov', ADD: 'add', SUB: 'sub', MUL: 'mul',
+    LT_S: 'lt_s', LT_U: 'lt_u', GT_S: 'gt_s', GE_U: 'ge_u',
+    BR_LT_S: 'br_lt_s', BR_GE_S: 'br_ge_s', BR_GT_S: 'br_gt_s', BR_LE_S: 'br_le_s',
+    BR_LT_U: 'br_lt_u', BR_GE_U: 'br_ge_u',
+    JMP_IF: 'jmp_if', JMP_IFNOT: 'jmp_ifnot', JMP: 'jmp',
+    LOAD: 'load', STORE: 'store', DIV_S: 'div_s', CLZ: 'clz',
+    GLOBAL_GET: 'global.get', GLOBAL_SET: 'global.set',
+    CALL: 'call', CALL_HOST: 'call_host', RETURN: 'return', TRAP: 'trap',
+    BACK_EDGE: 'back_edge',
+}
+
+BINARY_OPCODES = {
+    _i32_add: ADD,
+    _i32_sub: SUB,
+    _i32_mul: MUL,
+    _i32_div_s: DIV_S,
+    _i32_ge_u: GE_U,
+    _i32_gt_s: GT_S,
+    _i32_lt_s: LT_S,
+    _i32_lt_u: LT_U,
+}
+
+# compare -> (branch if true, branch if false)
+FUSED_BRANCHES = {
+    LT_S: (BR_LT_S, BR_GE_S),
+    GT_S: (BR_GT_S, BR_LE_S),
+    LT_U: (BR_LT_U, BR_GE_U),
+    GE_U: (BR_GE_U, BR_LT_U),
+}
+
+BRANCHES = {BR_LT_S, BR_GE_S, BR_GT_S, BR_LE_S, BR_LT_U, BR_GE_U}
+
+def jump_target(instr: Tuple[int, Any, Any, Any]) -> Optional[int]:
+    op, a, b, c = instr
+    if op == JMP:
+        return a
+    if op in (JMP_IF, JMP_IFNOT):
+        return b
+    if op in BRANCHES:
+        return c
+    return None
+
+_I32 = struct.Struct('<i')
+
+class RegisterFunction:
+    """Register IR of one function plus the initial register file"""
+
+    def __init__(self, func: Func, index: int):
+        self.func = func
+        self.index = index
+        self.name = func.name
+        self.nparams = len(func.params)
+        self.nlocals = len(func.locals)
+        self.nresults = len(func.results)
+        self.constants: List[int] = []
+        self.max_stack = 0
+        self.code: List[Tuple[int, Any, Any, Any]] = []
+        self.frame: List[int] = []  # register file template, params excluded
+        self.loop_headers: List[int] = []
+        # id(_loop node) -> (header pc, operand stack height) for entering mid-function
+        self.osr_entries: Dict[int, Tuple[int, int]] = {}
+
+    @property
+    def back_edges(self) -> List[int]:
+        """pcs of the jumps that go back to a loop header"""
+        return [pc for pc, instr in enumerate(self.code)
+                if jump_target(instr) is not None and jump_target(instr) <= pc
+                and jump_target(instr) in self.loop_headers]
+
+    def is_constant(self, r: int) -> bool:
+        return self.nparams + self.nlocals <= r < self.stack_base
+
+    def constant(self, r: int) -> int:
+        return self.constants[r - self.nparams - self.nlocals]
+
+    @property
+    def stack_base(self) -> int:
+        return self.nparams + self.nlocals + len(self.constants)
+
+    def emit(self, op: int, a: Any = None, b: Any = None, c: Any = None) -> int:
+        self.code.append((op, a, b, c))
+        return len(self.code) - 1
+
+    def patch(self, pc: int, target: int) -> None:
+        op, a, b, c = self.code[pc]
+        if op == JMP:
+            self.code[pc] = (op, target, b, c)
+        elif op in (JMP_IF, JMP_IFNOT):
+            self.code[pc] = (op, a, target, c)
+        else:
+            self.code[pc] = (op, a, b, target)
+
+    def register_name(self, r: int) -> str:
+        if r < self.nparams + self.nlocals:
+            return f"l{r}"
+        if r < self.stack_base:
+            return f"#{self.constant(r)}"
+        return f"s{r - self.stack_base}"
+
+    def disassemble(self) -> str:
+        reg = self.register_name
+        lines = [f"{self.name} (params={self.nparams}, locals={self.nlocals}, "
+                 f"results={self.nresults}, registers={len(self.frame) + self.nparams})"]
+        for pc, (op, a, b, c) in enumerate(self.code):
+            marker = ">" if pc in self.loop_headers else " "
+            if op == JMP:
+                operands = f"{a}"
+            elif op in (JMP_IF, JMP_IFNOT):
+                operands = f"{reg(a)}, {b}"
+            elif op in BRANCHES:
+                operands = f"{reg(a)}, {reg(b)}, {c}"
+            elif op == GLOBAL_GET:
+                operands = f"{reg(a)}, g{b}"
+            elif op == GLOBAL_SET:
+                operands = f"g{a}, {reg(b)}"
+            elif op == CALL:
+                operands = f"{reg(a)}, {b}(" + ", ".join(map(reg, c)) + ")"
+            elif op == CALL_HOST:
+                operands = f"{a}(" + ", ".join(map(reg, b)) + ")"
+            elif op == RETURN:
+                operands = ", ".join(map(reg, a))
+            elif op in (TRAP, BACK_EDGE):
+                operands = repr(a)
+            else:
+                operands = ", ".join(reg(r) for r in (a, b, c) if r is not None)
+            lines.append(f"  {marker}{pc:4d}  {OPCODE_NAMES[op]:<10} {operands}")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"RegisterFunction({self.name}, {len(self.code)} instructions)"
+
+class _Label:
+    def __init__(self, kind: str, name: Optional[str], height: int, target: Optional[int] = None):
+        self.kind = kind
+        self.name = name
+        self.height = height
+        self.target = target    # known for loops (the header), patched later for blocks/ifs
+        self.patches: List[int] = []
+
+class RegisterLowering:
+    """Lowers the stack code of a Module's Func bodies into register IR"""
+
+    def __init__(self, module: Module):
+        self.module = module
+
+    def lower_module(self) -> List[RegisterFunction]:
+        return [self.lower(func, i) for i, func in enumerate(self.module.funcs)]
+
+    def lower(self, func: Func, index: int) -> RegisterFunction:
+        try:
+            return self.lower_function(func, index)
+        except RuntimeError as e:
+            # The error surfaces when the broken function is called
+            function = RegisterFunction(func, index)
+            function.emit(TRAP, e.message)
+            return function
+
+    def lower_function(self, func: Func, index: int) -> RegisterFunction:
+        self.func = func
+        self.function = RegisterFunction(func, index)
+        self.labels: List[_Label] = []
+        self.stack: List[int] = []     # register holding each operand stack entry
+        self.unreachable = False
+        self.barrier = 0    # no instruction before this pc may be rewritten
+
+        body = flatten(func.body)
+        self.constant_registers: Dict[int, int] = {}
+        self.collect_constants(body)
+        self.lower_body(body)
+        if not self.unreachable:
+            self.emit_return()
+
+        function = self.function
+        function.frame = ([0] * function.nlocals + function.constants + [0] * function.max_stack)
+        return function
+
+    def collect_constants(self, instrs: List[Any]) -> None:
+        """Constants get a register each, placed before the operand stack slots"""
+        for instr in instrs:
+            if isinstance(instr, _i32_const):
+                value = parse_int(immediate(instr))
+                if value not in self.constant_registers:
+                    self.constant_registers[value] = self.function.nparams + self.function.nlocals + len(self.function.constants)
+                    self.function.constants.append(value)
+            elif isinstance(instr, (_block, _loop)):
+                self.collect_constants(block_parts(instr)[1])
+            elif isinstance(instr, _if):
+                for part in split_if(instr):
+                    self.collect_constants(part)
+
+    def lower_body(self, instrs: List[Any]) -> None:
+        for instr in instrs:
+            if self.unreachable:
+                break   # dead code after br/return
+            self.lower_instruction(instr)
+
+    # Operand stack to registers
+
+    def slot(self, k: int) -> int:
+        return self.function.stack_base + k
+
+    def push_slot(self) -> int:
+        """Register for a value produced on top of the operand stack"""
+        k = len(self.stack)
+        if k + 1 > self.function.max_stack:
+            self.function.max_stack = k + 1
+        self.stack.append(self.slot(k))
+        return self.slot(k)
+
+    def pop(self) -> int:
+        if not self.stack:
+            raise RuntimeError(f"Stack underflow while lowering {self.func.name}")
+        return self.stack.pop()
+
+    def materialize(self, k: int) -> None:
+        if self.stack[k] != self.slot(k):
+            self.function.emit(MOV, self.slot(k), self.stack[k])
+            self.stack[k] = self.slot(k)
+
+    def materialize_all(self) -> None:
+        """Control flow merges expect every entry in its own stack slot"""
+        for k in range(len(self.stack)):
+            self.materialize(k)
+
+    def set_barrier(self) -> None:
+        self.barrier = len(self.function.code)
+
+    def last_writer(self, register: int) -> Optional[int]:
+        """pc of the previous instruction if it only computed `register`"""
+        pc = len(self.function.code) - 1
+        if pc < self.barrier:
+            return None
+        op, a, _, _ = self.function.code[pc]
+        if op in (ADD, SUB, MUL, DIV_S, LT_S, LT_U, GT_S, GE_U, CLZ, LOAD, GLOBAL_GET, MOV) and a == register:
+            return pc
+        return None
+
+    # Instructions
+
+    def lower_instruction(self, instr: Instruction) -> None:
+        emit = self.function.emit
+        if isinstance(instr, _i32_const):
+            self.stack.append(self.constant_registers[parse_int(immediate(instr))])
+        elif isinstance(instr, BinaryInstruction):
+            op = BINARY_OPCODES.get(type(instr))
+            if op is None:
+                raise RuntimeError(f"Unsupported binary instruction: {type(instr).__name__}")
+            b = self.pop()
+            a = self.pop()
+            emit(op, self.push_slot(), a, b)
+        elif isinstance(instr, _i32_clz):
+            a = self.pop()
+            emit(CLZ, self.push_slot(), a)
+        elif isinstance(instr, _local_get):
+            self.stack.append(local_index(self.func, immediate(instr)))
+        elif isinstance(instr, (_local_set, _local_tee)):
+            self.lower_local_set(local_index(self.func, immediate(instr)))
+            if isinstance(instr, _local_tee):
+                self.stack.append(local_index(self.func, immediate(instr)))
+        elif isinstance(instr, _global_get):
+            emit(GLOBAL_GET, self.push_slot(), global_index(self.module, immediate(instr)))
+        elif isinstance(instr, _global_set):
+            emit(GLOBAL_SET, global_index(self.module, immediate(instr)), self.pop())
+        elif isinstance(instr, _i32_load):
+            address = self.pop()
+            emit(LOAD, self.push_slot(), address)
+        elif isinstance(instr, _i32_store):
+            value = self.pop()
+            address = self.pop()
+            emit(STORE, address, value)
+        elif isinstance(instr, _call):
+            self.lower_call(immediate(instr))
+        elif isinstance(instr, _return):
+            self.emit_return()
+        elif isinstance(instr, _block):
+            self.lower_block(instr)
+        elif isinstance(instr, _loop):
+            self.lower_loop(instr)
+        elif isinstance(instr, _if):
+            self.lower_if(instr)
+        elif isinstance(instr, _br):
+            self.lower_br(label_of(immediate(instr)))
+        elif isinstance(instr, _br_if):
+            self.lower_br_if(label_of(immediate(instr)))
+        elif isinstance(instr, (_then, _else, _end)):
+            pass    # structural markers, already consumed by split_if/block_parts
+        else:
+            raise RuntimeError(f"Unsupported instruction: {type(instr).__name__}")
+
+    def lower_local_set(self, index: int) -> None:
+        value = self.pop()
+        # Pending reads of the local must see the old value
+        for k, register in enumerate(self.stack):
+            if register == index:
+                self.materialize(k)
+        pc = self.last_writer(value)
+        if pc is not None and value == self.slot(len(self.stack)):
+            # Retarget `s = b op c; local.set x` to `x = b op c`
+            op, _, b, c = self.function.code[pc]
+            self.function.code[pc] = (op, index, b, c)
+        elif value != index:
+            self.function.emit(MOV, index, value)
+
+    def lower_call(self, target: Any) -> None:
+        index = function_index(self.module, target)
+        if index is None:
+            params, results = HOST_FUNCTIONS.get(target, (0, 0))
+            args = tuple(reversed([self.pop() for _ in range(params)]))
+            self.function.emit(CALL_HOST, target, args)
+            for _ in range(results):
+                self.push_slot()
+            return
+        callee = self.module.funcs[index]
+        args = tuple(reversed([self.pop() for _ in callee.params]))
+        dst = self.slot(len(self.stack))
+        for _ in callee.results:
+            self.push_slot()
+        self.function.emit(CALL, dst, index, args)
+
+    def emit_return(self) -> None:
+        nresults = self.function.nresults
+        results = tuple(self.stack[-nresults:]) if nresults and self.stack else ()
+        self.function.emit(RETURN, results)
+        self.unreachable = True
+
+    # Structured control flow
+
+    def lower_block(self, instr: _block) -> None:
+        name, body, _ = block_parts(instr)
+        self.materialize_all()
+        label = _Label('block', name, len(self.stack))
+        self.labels.append(label)
+        self.lower_body(body)
+        self.labels.pop()
+        self.end_label(label, len(self.function.code))
+
+    def lower_loop(self, instr: _loop) -> None:
+        name, body, _ = block_parts(instr)
+        self.materialize_all()
+        header = len(self.function.code)
+        self.set_barrier()
+        label = _Label('loop', name, len(self.stack), header)
+        self.function.loop_headers.append(header)
+        self.function.osr_entries[id(instr)] = (header, len(self.stack))
+        self.labels.append(label)
+        self.lower_body(body)
+        self.labels.pop()
+        self.end_label(label, None)
+
+    def lower_if(self, instr: _if) -> None:
+        cond_instrs, then_body, else_body = split_if(instr)
+        self.lower_body(cond_instrs)
+        cond = self.pop()
+        self.materialize_all()
+        jump_else = self.emit_conditional_jump(cond, negate=True)
+
+        label = _Label('if', getattr(instr, 'name', None), len(self.stack))
+        self.labels.append(label)
+        entry = list(self.stack)
+        self.lower_body(then_body)
+        if else_body:
+            if not self.unreachable:
+                label.patches.append(self.function.emit(JMP, None))
+            self.function.patch(jump_else, len(self.function.code))
+            self.set_barrier()
+            self.stack = entry
+            self.unreachable = False
+            self.lower_body(else_body)
+            self.labels.pop()
+            self.end_label(label, len(self.function.code))
+        else:
+            self.labels.pop()
+            self.end_label(label, len(self.function.code))
+            self.function.patch(jump_else, len(self.function.code))
+
+    def end_label(self, label: _Label, end: Optional[int]) -> None:
+        for pc in label.patches:
+            self.function.patch(pc, end)
+        del self.stack[label.height:]
+        for k in range(len(self.stack)):
+            self.stack[k] = self.slot(k)
+        self.unreachable = False
+        self.set_barrier()
+
+    def resolve_label(self, target) -> Optional[_Label]:
+        """None stands for the function body itself (a return)"""
+        if isinstance(target, int):
+            if target == len(self.labels):
+                return None
+            if target > len(self.labels):
+                raise RuntimeError(f"Undefined label: {target}")
+            return self.labels[-1 - target]
+        for label in reversed(self.labels):
+            if label.name == target:
+                return label
+        raise RuntimeError(f"Undefined label: {target}")
+
+    def emit_conditional_jump(self, cond: int, negate: bool = False, target: Optional[int] = None) -> int:
+        """Jump on `cond`, fusing it with the compare that produced it"""
+        pc = self.last_writer(cond)
+        if pc is not None and cond == self.slot(len(self.stack)):
+            op, _, a, b = self.function.code[pc]
+            if op in FUSED_BRANCHES:
+                del self.function.code[pc]
+                return self.function.emit(FUSED_BRANCHES[op][1 if negate else 0], a, b, target)
+        return self.function.emit(JMP_IFNOT if negate else JMP_IF, cond, target)
+
+    def lower_br(self, target) -> None:
+        label = self.resolve_label(target)
+        if label is None:
+            self.emit_return()
+            return
+        pc = self.function.emit(JMP, label.target)
+        if label.target is None:
+            label.patches.append(pc)
+        self.unreachable = True
+
+    def lower_br_if(self, target) -> None:
+        label = self.resolve_label(target)
+        cond = self.pop()
+        if label is None:
+            skip = self.emit_conditional_jump(cond, negate=True)
+            self.emit_return()
+            self.unreachable = False
+            self.function.patch(skip, len(self.function.code))
+            self.set_barrier()
+            return
+        pc = self.emit_conditional_jump(cond, target=label.target)
+        if label.target is None:
+            label.patches.append(pc)
+
+class RegisterInterpreter(Interpreter):
+    """Executes register IR, one dispatch per three-address instruction"""
+
+    def __init__(self, module: Module, verbose: bool = False, use_colors: bool = False):
+        super().__init__(module, verbose=verbose, use_colors=use_colors)
+        self.register_functions: List[RegisterFunction] = RegisterLowering(self.module).lower_module()
+        for function in self.register_functions:
+            log.info("Lowered %s to %d register instructions", function.name, len(function.code))
+
+    def execute_function(self, func_name: str, args: List[Any] = None) -> Any:
+        if isinstance(func_name, Func):
+            func_name = func_name.name
+        if args is None:
+            args = []
+        function = self.register_functions[find_function(self.module, func_name)]
+        if len(args) != function.nparams:
+            raise RuntimeError(f"Function {function.name} expects {function.nparams} arguments, got {len(args)}")
+        return self.run(function, [wrap_i32(int(a)) for a in args])
+
+    def run(self, function: RegisterFunction, args: List[int], pc: int = 0, regs: Optional[List[int]] = None) -> Any:
+        """Run from pc 0, or from `pc` on a prepared register file"""
+        code = function.code
+        if regs is None:
+            regs = args + function.frame
+        memory = self.memory
+        globals_ = self.globals
+        unpack_from = _I32.unpack_from
+        pack_into = _I32.pack_into
+
+        while True:
+            op, a, b, c = code[pc]
+            pc += 1
+            if op == MOV:
+                regs[a] = regs[b]
+            elif op == ADD:
+                r = regs[b] + regs[c]
+                regs[a] = r if I32_MIN <= r <= I32_MAX else wrap_i32(r)
+            elif op == SUB:
+                r = regs[b] - regs[c]
+                regs[a] = r if I32_MIN <= r <= I32_MAX else wrap_i32(r)
+            elif op == MUL:
+                r = regs[b] * regs[c]
+                regs[a] = r if I32_MIN <= r <= I32_MAX else wrap_i32(r)
+            elif op == BR_LT_S:
+                if regs[a] < regs[b]:
+                    pc = c
+            elif op == BR_GE_S:
+                if regs[a] >= regs[b]:
+                    pc = c
+            elif op == BR_GT_S:
+                if regs[a] > regs[b]:
+                    pc = c
+            elif op == BR_LE_S:
+                if regs[a] <= regs[b]:
+                    pc = c
+            elif op == BR_LT_U:
+                if (regs[a] & U32_MASK) < (regs[b] & U32_MASK):
+                    pc = c
+            elif op == BR_GE_U:
+                if (regs[a] & U32_MASK) >= (regs[b] & U32_MASK):
+                    pc = c
+            elif op == LOAD:
+                address = regs[b]
+                if address < 0 or address + 4 > len(memory):
+                    raise RuntimeError(f"Memory access out of bounds: {address}")
+                regs[a] = unpack_from(memory, address)[0]
+            elif op == STORE:
+                address = regs[a]
+                if address < 0 or address + 4 > len(memory):
+                    raise RuntimeError(f"Memory access out of bounds: {address}")
+                pack_into(memory, address, regs[b])
+            elif op == JMP:
+                pc = a
+            elif op == JMP_IF:
+                if regs[a]:
+                    pc = b
+            elif op == JMP_IFNOT:
+                if not regs[a]:
+                    pc = b
+            elif op == LT_S:
+                regs[a] = 1 if regs[b] < regs[c] else 0
+            elif op == LT_U:
+                regs[a] = 1 if (regs[b] & U32_MASK) < (regs[c] & U32_MASK) else 0
+            elif op == GT_S:
+                regs[a] = 1 if regs[b] > regs[c] else 0
+            elif op == GE_U:
+                regs[a] = 1 if (regs[b] & U32_MASK) >= (regs[c] & U32_MASK) else 0
+            elif op == DIV_S:
+                regs[a] = i32_div_s(regs[b], regs[c])
+            elif op == CLZ:
+                regs[a] = i32_clz(regs[b])
+            elif op == GLOBAL_GET:
+                regs[a] = globals_[b]
+            elif op == GLOBAL_SET:
+                globals_[a] = regs[b]
+            elif op == CALL:
+                callee = self.register_functions[b]
+                result = self.run(callee, [regs[r] for r in c])
+                if callee.nresults == 1:
+                    regs[a] = result
+                elif callee.nresults > 1:
+                    regs[a:a + callee.nresults] = result
+            elif op == CALL_HOST:
+                self.call_host(a, [regs[r] for r in b])
+            elif op == RETURN:
+                if not a:
+                    return None
+                if len(a) == 1:
+                    return regs[a[0]]
+                return tuple(regs[r] for r in a)
+            elif op == TRAP:
+                raise RuntimeError(a)
+            elif op == BACK_EDGE:
+                pc = self.back_edge(function, regs, a)
+
+    def back_edge(self, function: RegisterFunction, regs: List[int], pc: int) -> int:
+        """Hook for BACK_EDGE instructions, returns the pc to continue at"""
+        raise RuntimeError(f"No back edge handler in {function.name} at {pc}")
+
+    def call_host(self, name: str, args: List[int]) -> None:
+        if name == '$log':
+            host_log(args[0], self.use_colors)
+        else:
+            raise RuntimeError(f"Undefined function: {name}")
+
+    def disassemble(self) -> str:
+        return "\n".join(function.disassemble() for function in self.register_functions)
@@ -0,0 +1,270 @@
+from Lexer import (
+    Module, Func, ID, CONST,
+    Instruction,
+    _i32_add, _i32_sub, _i32_mul, _i32_div_s,
+    _i32_ge_u, _i32_gt_s, _i32_lt_s, _i32_lt_u,
+    _nop, _block, _loop, _if, _then, _else, _end
+)
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+# Shared helpers for the execution engines (Interpreter, Bytecode, ...).
+# The parser produces a few different shapes for the same construct
+# (folded vs. flat instructions, three layouts of `if`, `block ... end`
+# swallowing the rest of the body), the helpers below decode them once.
+
+COLORS = {
+    'ERROR_COLOR': '\033[1;31m',
+    'WARNING_COLOR': '\033[1;33m',
+    'SUCCESS_COLOR': '\033[1;32m',
+    'INFO_COLOR': '\033[1;34m',
+    'DEBUG_COLOR': '\033[36m',
+    'HIGHLIGHT_COLOR': '\033[7;37m',
+    'RESET_COLOR': '\033[0m',
+}
+
+# Defined here rather than in Interpreter so that Interpreter can use the
+# helpers below, Interpreter re-exports both
+class RuntimeError(Exception):  # Custom
+    
+    def __init__(self, message, line_number=None):
+        self.message = message
+        self.line_number = line_number
+        super().__init__(f"RuntimeError: {message}" + (f" at line {line_number}" if line_number else ""))
+
+class OutOfFuel(RuntimeError):
+    """Trap: the fuel budget of the execution is used up"""
+
+class DeadlineExceeded(RuntimeError):
+    """Trap: the wall-clock deadline of the execution has passed"""
+
+class ExecutionSuspended(RuntimeError):
+    """The execution stopped on request after writing a checkpoint"""
+
+I32_MIN = -0x80000000
+I32_MAX = 0x7FFFFFFF
+U32_MASK = 0xFFFFFFFF
+
+def wrap_i32(value: int) -> int:
+    """Wrap an arbitrary Python int to a signed 32-bit value"""
+    return ((value + 0x80000000) & U32_MASK) - 0x80000000
+
+def i32_add(a: int, b: int) -> int:
+    r = a + b
+    return r if I32_MIN <= r <= I32_MAX else wrap_i32(r)
+
+def i32_sub(a: int, b: int) -> int:
+    r = a - b
+    return r if I32_MIN <= r <= I32_MAX else wrap_i32(r)
+
+def i32_mul(a: int, b: int) -> int:
+    r = a * b
+    return r if I32_MIN <= r <= I32_MAX else wrap_i32(r)
+
+def i32_div_s(a: int, b: int) -> int:
+    if b == 0:
+        raise RuntimeError("Division by zero")
+    if a == I32_MIN and b == -1:
+        raise RuntimeError("Integer overflow")
+    q = abs(a) // abs(b)
+    return -q if (a < 0) != (b < 0) else q
+
+def i32_ge_u(a: int, b: int) -> int:
+    return 1 if (a & U32_MASK) >= (b & U32_MASK) else 0
+
+def i32_gt_s(a: int, b: int) -> int:
+    return 1 if a > b else 0
+
+def i32_lt_s(a: int, b: int) -> int:
+    return 1 if a < b else 0
+
+def i32_lt_u(a: int, b: int) -> int:
+    return 1 if (a & U32_MASK) < (b & U32_MASK) else 0
+
+def i32_clz(a: int) -> int:
+    return 32 - (a & U32_MASK).bit_length()
+
+BINARY_OPS = {
+    _i32_add: i32_add,
+    _i32_sub: i32_sub,
+    _i32_mul: i32_mul,
+    _i32_div_s: i32_div_s,
+    _i32_ge_u: i32_ge_u,
+    _i32_gt_s: i32_gt_s,
+    _i32_lt_s: i32_lt_s,
+    _i32_lt_u: i32_lt_u,
+}
+
+def parse_int(text: Union[str, int]) -> int:
+    """Decode an i32 literal (decimal or 0x hex) to a signed value"""
+    if isinstance(text, int):
+        return wrap_i32(text)
+    return wrap_i32(int(text, 0) if text.lower().lstrip('-').startswith('0x') else int(text))
+
+# Host functions
+
+def host_log(value: int, use_colors: bool = False) -> None:
+    info = "INFO: "
+    if use_colors:
+        info = f"{COLORS['INFO_COLOR']}{info}{COLORS['RESET_COLOR']}"
+    print(f"{info}\nLog value : {value}")
+
+# name -> (param count, result count); `$log` is the implicit console import
+# the test programs use without declaring it
+HOST_FUNCTIONS: Dict[str, Tuple[int, int]] = {
+    '$log': (1, 0),
+}
+
+# AST decoding
+
+def is_nop(instr: Any) -> bool:
+    # parse_control_flow returns the _nop class itself, not an instance
+    return instr is _nop or isinstance(instr, _nop)
+
+def operand_value(operand: Any) -> Any:
+    """Unwrap ID/CONST tokens, the parser stores some immediates as tokens"""
+    if isinstance(operand, (ID, CONST)):
+        return operand.value
+    return operand
+
+def immediates(instr: Instruction) -> List[Any]:
+    return [operand_value(op) for op in instr.operands
+            if not isinstance(op, Instruction) and not isinstance(op, type)]
+
+def immediate(instr: Instruction) -> Any:
+    imms = immediates(instr)
+    if not imms:
+        raise RuntimeError(f"Missing immediate for {type(instr).__name__}")
+    return imms[0]
+
+def children(instr: Instruction) -> List[Instruction]:
+    """Folded operands, e.g. (local.set $x (i32.const 1)), run before instr"""
+    if isinstance(instr.operands, dict):
+        return []
+    return [op for op in instr.operands if isinstance(op, Instruction)]
+
+def label_of(operand: Any) -> Union[str, int]:
+    """Branch target as a `$name` or as a relative depth"""
+    value = operand_value(operand)
+    if isinstance(value, str) and not value.startswith('$'):
+        return int(value)
+    return value
+
+def block_parts(instr: Instruction) -> Tuple[Optional[str], List[Any], List[Any]]:
+    """Split a block/loop into (label, body, trailing).
+
+    A flat `block ... end` is parsed greedily, so the instructions after the
+    `end` marker end up inside the block; they are returned as `trailing`.
+    """
+    label = getattr(instr, 'name', None)
+    body = []
+    trailing = []
+    operands = list(instr.operands)
+    for i, op in enumerate(operands):
+        if isinstance(op, _end):
+            trailing = operands[i+1:]
+            break
+        if isinstance(op, str) or isinstance(op, (ID, CONST)):
+            if label is None and not body:
+                label = operand_value(op)
+            continue
+        body.append(op)
+    return label, flatten(body), trailing
+
+def split_if(instr: _if) -> Tuple[List[Any], List[Any], List[Any]]:
+    """Split an if into (folded condition, then branch, else branch)"""
+    operands = instr.operands
+    if isinstance(operands, dict):
+        return [], flatten(operands.get('then', [])), flatten(operands.get('else', []))
+
+    cond, then_body, else_body = [], [], []
+    has_then = any(isinstance(op, _then) for op in operands)
+    current = then_body
+    for op in operands:
+        if isinstance(op, _then):
+            then_body.extend(op.operands)
+            current = None
+        elif isinstance(op, _else):
+            current = else_body
+            else_body.extend(op.operands)
+        elif isinstance(op, str):
+            continue
+        elif current is None:
+            # stray instruction after (then ...) without (else ...)
+            else_body.append(op)
+        elif has_then and current is then_body:
+            cond.append(op)
+        else:
+            current.append(op)
+    return flatten(cond), flatten(then_body), flatten(else_body)
+
+def flatten(instrs: List[Any]) -> List[Any]:
+    """Linearize folded instructions into execution order"""
+    result = []
+    for instr in instrs:
+        if is_nop(instr) or isinstance(instr, str):
+            continue
+        if isinstance(instr, (_block, _loop)):
+            result.append(instr)
+            _, _, trailing = block_parts(instr)
+            result.extend(flatten(trailing))
+        elif isinstance(instr, _if):
+            result.append(instr)
+        elif isinstance(instr, Instruction):
+            result.extend(flatten(children(instr)))
+            result.append(instr)
+    return result
+
+# Index resolution
+
+def local_names(func: Func) -> List[Optional[str]]:
+    return [p.name for p in func.params] + [l.name for l in func.locals]
+
+def local_index(func: Func, operand: Any) -> int:
+    value = operand_value(operand)
+    if isinstance(value, str) and value.startswith('$'):
+        names = local_names(func)
+        if value in names:
+            return names.index(value)
+        raise RuntimeError(f"Undefined local variable: {value}")
+    index = int(value)
+    if index >= len(func.params) + len(func.locals):
+        raise RuntimeError(f"Undefined local variable: {value}")
+    return index
+
+def global_index(module: Module, operand: Any) -> int:
+    value = operand_value(operand)
+    if isinstance(value, str) and value.startswith('$'):
+        for i, glob in enumerate(module.globs):
+            if glob.name == value:
+                return i
+        raise RuntimeError(f"Undefined global variable: {value}")
+    index = int(value)
+    if index >= len(module.globs):
+        raise RuntimeError(f"Undefined global variable: {value}")
+    return index
+
+def function_index(module: Module, operand: Any) -> Optional[int]:
+    """Index into module.funcs, or None for host functions / unknown names"""
+    value = operand_value(operand)
+    if isinstance(value, str) and value.startswith('$'):
+        for i, func in enumerate(module.funcs):
+            if func.name == value:
+                return i
+        return None
+    index = int(value)
+    return index if index < len(module.funcs) else None
+
+def find_function(module: Module, func_name: Optional[str]) -> int:
+    for i, func in enumerate(module.funcs):
+        if func.name == func_name:
+            return i
+    raise RuntimeError(f"Undefined function: {func_name}")
+
+def initial_globals(module: Module) -> List[int]:
+    return [parse_int(glob.value) if glob.value is not None else 0 for glob in module.globs]
+
+def initial_memory(module: Module) -> bytearray:
+    for mem in module.mems:
+        if mem.value and hasattr(mem.value, 'value'):
+            return bytearray(int(mem.value.value) * 65536)
+    return bytearray()
@@ -0,0 +1,290 @@
+from Lexer import (
+    Module, Func, Instruction, BinaryInstruction,
+    _i32_const, _i32_add, _i32_sub, _i32_mul, _i32_div_s,
+    _i32_gt_s, _i32_lt_s, _i32_lt_u, _i32_ge_u,
+    _local_get, _local_set, _local_tee,
+    _br, _return, _loop, _if
+)
+from Runtime import wrap_i32, immediate
+from Passes import (
+    Pass, make, immediates, arms, walk, local_key, add_local, stack_effect, pure_value_start,
+    constant_value, induction_step
+)
+from typing import List, Dict, Tuple, Optional, Iterator
+import Log
+
+log = Log.get_logger("StrengthReduction")
+
+# Strength reduction and algebraic simplification over canonical IR.
+#
+# Induction variables: a local assigned exactly once in a loop, by
+# `local.get $j i32.const k i32.add local.set $j` (or i32.sub), steps by k
+# every time. Its multiplications by a constant, `$j * c` and `($j + d) * c`,
+# can read a local kept equal to `$j * c` instead: it is set in front of the
+# loop and gets `c * k` added right after $j's update. The update costs four
+# instructions per iteration, so a factor c is only reduced when its
+# multiplications save more than that.
+#
+# Then the binary instructions are simplified, with rules by
+# BinaryInstruction class, see below. Operands are found by simulating the
+# stack on the start of each value's instructions; an operand that is
+# dropped must be pure (pure_value_start), an operand that stays may have
+# side effects. There is no shift or mask instruction, multiplications and
+# divisions by powers of two stay as they are.
+
+# x op c -> x
+RIGHT_IDENTITY = {_i32_add: 0, _i32_sub: 0, _i32_mul: 1, _i32_div_s: 1}
+# c op x -> x
+LEFT_IDENTITY = {_i32_add: 0, _i32_mul: 1}
+# x op c -> c, c op x -> c for a pure x
+ABSORBING = {_i32_mul: 0}
+# x op 0 -> constant for a pure x, unsigned compares with zero
+UNSIGNED_ZERO = {_i32_lt_u: 0, _i32_ge_u: 1}
+# x op x -> constant for a pure x
+SELF = {_i32_sub: 0, _i32_gt_s: 0, _i32_lt_s: 0, _i32_lt_u: 0, _i32_ge_u: 1}
+# Rule names in the counts
+SYMBOLS = {_i32_add: '+', _i32_sub: '-', _i32_mul: '*', _i32_div_s: '/', _i32_gt_s: '>',
+           _i32_lt_s: '<', _i32_lt_u: '<u', _i32_ge_u: '>=u'}
+
+# Instructions a reduced induction variable's update adds to every iteration
+UPDATE_COST = 4
+
+def bodies(body: List[Instruction]) -> Iterator[List[Instruction]]:
+    """A canonical body and every body nested in it"""
+    yield body
+    for instr in body:
+        for arm in arms(instr):
+            yield from bodies(arm)
+
+class StrengthReduction(Pass):
+    """Reduce induction variable multiplications and simplify binary instructions"""
+
+    name = "strength-reduction"
+
+    def run_function(self, func: Func, module: Module) -> int:
+        self.func = func
+        self.module = module
+        changes = sum(self.counts.values())
+        self.reduce_loops(func.body)
+        func.body = self.simplify_body(func.body)
+        changes = sum(self.counts.values()) - changes
+        if changes:
+            log.info("%s: %d rewrites", func.name, changes)
+        return changes
+
+    # Induction variables
+
+    def reduce_loops(self, body: List[Instruction]) -> None:
+        """Reduce the induction variables of every loop nested in a body"""
+
+        i = 0
+        while i < len(body):
+            instr = body[i]
+            for arm in arms(instr):
+                self.reduce_loops(arm)
+            if isinstance(instr, _loop):
+                preheader = self.reduce(instr)
+                body[i:i] = preheader
+                i += len(preheader)
+            i += 1
+
+    def reduce(self, loop: _loop) -> List[Instruction]:
+        """Reduce the profitable multiplications of a loop, returns the
+        instructions initializing the new locals"""
+
+        writes: Dict[Optional[int], int] = {}
+        for instr in walk(loop.operands):
+            if isinstance(instr, (_local_set, _local_tee)):
+                key = local_key(self.func, instr)
+                writes[key] = writes.get(key, 0) + 1
+        # Induction variable -> (its update, step)
+        steps: Dict[int, Tuple[Instruction, int]] = {}
+        for body in bodies(loop.operands):
+            for i, instr in enumerate(body):
+                step = induction_step(self.func, body, i)
+                if step is not None and writes.get(local_key(self.func, instr)) == 1:
+                    steps[local_key(self.func, instr)] = (instr, step)
+        if not steps:
+            return []
+
+        # (variable, factor) -> [(body, start, end, offset)]
+        families: Dict[Tuple[int, int], List[tuple]] = {}
+        for body in bodies(loop.operands):
+            for i in range(len(body)):
+                found = self.multiplication(body, i, steps)
+                if found is not None:
+                    key, factor, start, offset = found
+                    families.setdefault((key, factor), []).append((body, start, i + 1, offset))
+
+        preheader: List[Instruction] = []
+        updates: List[Tuple[Instruction, str, int]] = []
+        replacements: Dict[int, List[tuple]] = {}
+        for (key, factor), sites in families.items():
+            if factor in (0, 1):
+                # Left to the algebraic rules
+                continue
+            saved = sum(end - start - (1 if offset == 0 else 3) for _, start, end, offset in sites)
+            if saved <= UPDATE_COST:
+                continue
+            update, step = steps[key]
+            variable = immediate(update)
+            name = add_local(self.func, f"$iv_{len(self.func.locals)}")
+            preheader += [make(_local_get, variable), make(_i32_const, str(factor)), make(_i32_mul),
+                          make(_local_set, name)]
+            for body, start, end, offset in sites:
+                code = [make(_local_get, name)]
+                if offset:
+                    code += [make(_i32_const, str(offset)), make(_i32_add)]
+                replacements.setdefault(id(body), []).append((body, start, end, code))
+            updates.append((update, name, wrap_i32(factor * step)))
+            self.count("induction variables")
+            self.count("multiplications reduced", len(sites))
+        # Replace from the end, so the earlier sites stay where they are
+        for sites in replacements.values():
+            for body, start, end, code in sorted(sites, key=lambda site: site[1], reverse=True):
+                body[start:end] = code
+        for update, name, increment in updates:
+            for body in bodies(loop.operands):
+                position = next((i for i, instr in enumerate(body) if instr is update), None)
+                if position is not None:
+                    body[position + 1:position + 1] = [make(_local_get, name), make(_i32_const, str(increment)),
+                                                       make(_i32_add), make(_local_set, name)]
+                    break
+        return preheader
+
+    def multiplication(self, body: List[Instruction], i: int, steps: Dict[int, Tuple[Instruction, int]]) \
+            -> Optional[Tuple[int, int, int, int]]:
+        """(variable, factor, start, offset) if body[start:i + 1] multiplies
+        an induction variable plus `offset / factor` by a constant factor"""
+
+        if not isinstance(body[i], _i32_mul) or i < 2:
+            return None
+        variable = lambda instr: local_key(self.func, instr) if isinstance(instr, _local_get) else None
+        factor = constant_value(body[i - 1])
+        # ($j +/- d) * c
+        if i >= 4 and factor is not None and isinstance(body[i - 2], (_i32_add, _i32_sub)) and \
+                variable(body[i - 4]) in steps and constant_value(body[i - 3]) is not None:
+            offset = constant_value(body[i - 3])
+            if isinstance(body[i - 2], _i32_sub):
+                offset = -offset
+            return variable(body[i - 4]), factor, i - 4, wrap_i32(offset * factor)
+        # $j * c, c * $j
+        if factor is not None and variable(body[i - 2]) in steps:
+            return variable(body[i - 2]), factor, i - 2, 0
+        factor = constant_value(body[i - 2])
+        if factor is not None and variable(body[i - 1]) in steps:
+            return variable(body[i - 1]), factor, i - 2, 0
+        return None
+
+    # Algebraic simplification
+
+    def simplify_body(self, body: List[Instruction]) -> List[Instruction]:
+        """Simplify a body and the bodies nested in it"""
+
+        out: List[Instruction] = []
+        # Start in `out` of the instructions computing each stack value
+        stack: List[Optional[int]] = []
+        for i, instr in enumerate(body):
+            if isinstance(instr, _if):
+                instr.operands['then'] = self.simplify_body(instr.operands['then'])
+                instr.operands['else'] = self.simplify_body(instr.operands['else'])
+            elif arms(instr):
+                instr.operands = self.simplify_body(instr.operands)
+            self.emit(out, stack, instr)
+            if isinstance(instr, (_br, _return)):
+                # The rest of the body is unreachable, keep it as it is
+                out.extend(body[i + 1:])
+                break
+        return out
+
+    def emit(self, out: List[Instruction], stack: List[Optional[int]], instr: Instruction) -> None:
+        """Append an instruction to `out`, or what it simplifies to"""
+
+        if isinstance(instr, BinaryInstruction):
+            right = stack.pop() if stack else None
+            left = stack.pop() if stack else None
+            if left is not None and right is not None and self.simplify(out, stack, instr, left, right):
+                return
+            out.append(instr)
+            stack.append(left if right is not None else None)
+            return
+        pops, pushes = stack_effect(instr, self.module)
+        popped = [stack.pop() if stack else None for _ in range(pops)]
+        start = len(out) if not popped else None if None in popped else min(popped)
+        out.append(instr)
+        stack.extend([start if pushes == 1 else None] * pushes)
+
+    def simplify(self, out: List[Instruction], stack: List[Optional[int]], instr: BinaryInstruction,
+                 left: int, right: int) -> bool:
+        """Apply the first matching rule to `left instr right`, whose operands
+        are out[left:right] and out[right:]. False if none matches."""
+
+        op = type(instr)
+        symbol = SYMBOLS.get(op, '?')
+        right_constant = constant_value(out[right]) if right == len(out) - 1 else None
+        left_constant = constant_value(out[left]) if right == left + 1 else None
+        left_pure = pure_value_start(out, right) == left
+        right_pure = pure_value_start(out, len(out)) == right
+
+        if right_constant is not None:
+            if RIGHT_IDENTITY.get(op) == right_constant:
+                del out[right]
+                stack.append(left)
+                self.count(f"x {symbol} {right_constant}")
+                return True
+            if ABSORBING.get(op) == right_constant and left_pure:
+                return self.replace(out, stack, left, right_constant, f"x {symbol} {right_constant}")
+            if op in UNSIGNED_ZERO and right_constant == 0 and left_pure:
+                return self.replace(out, stack, left, UNSIGNED_ZERO[op], f"x {symbol} 0")
+            if self.reassociate(out, stack, instr, left, right, right_constant):
+                return True
+        if left_constant is not None:
+            if LEFT_IDENTITY.get(op) == left_constant:
+                del out[left]
+                stack.append(left)
+                self.count(f"{left_constant} {symbol} x")
+                return True
+            if ABSORBING.get(op) == left_constant and right_pure:
+                return self.replace(out, stack, left, left_constant, f"{left_constant} {symbol} x")
+        if op in SELF and left_pure and right_pure and self.same(out[left:right], out[right:]):
+            return self.replace(out, stack, left, SELF[op], f"x {symbol} x")
+        return False
+
+    def replace(self, out: List[Instruction], stack: List[Optional[int]], start: int, value: int,
+                rule: str) -> bool:
+        """Replace out[start:] by a constant"""
+
+        del out[start:]
+        out.append(make(_i32_const, str(value)))
+        stack.append(start)
+        self.count(rule)
+        return True
+
+    def reassociate(self, out: List[Instruction], stack: List[Optional[int]], instr: BinaryInstruction,
+                    left: int, right: int, constant: int) -> bool:
+        """(x + c1) + c2 -> x + (c1 + c2), likewise with i32.sub, and
+        (x * c1) * c2 -> x * (c1 * c2)"""
+
+        if right - left < 3:
+            return False
+        inner, inner_constant = out[right - 1], constant_value(out[right - 2])
+        if inner_constant is None:
+            return False
+        if isinstance(instr, (_i32_add, _i32_sub)) and isinstance(inner, (_i32_add, _i32_sub)):
+            value = (-inner_constant if isinstance(inner, _i32_sub) else inner_constant) + \
+                (-constant if isinstance(instr, _i32_sub) else constant)
+            code = [make(_i32_const, str(wrap_i32(value))), make(_i32_add)]
+        elif isinstance(instr, _i32_mul) and isinstance(inner, _i32_mul):
+            code = [make(_i32_const, str(wrap_i32(inner_constant * constant))), make(_i32_mul)]
+        else:
+            return False
+        del out[right - 2:]
+        self.count("constants reassociated")
+        # x is on the stack again, the combined operation may simplify further
+        stack.append(left)
+        for instr in code:
+            self.emit(out, stack, instr)
+        return True
+
+    def same(self, a: List[Instruction], b: List[Instruction]) -> bool:
+        return len(a) == len(b) and all(type(x) is type(y) and immediates(x) == immediates(y) for x, y in zip(a, b))
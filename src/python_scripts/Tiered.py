@@ -0,0 +1,152 @@
+from Lexer import Module, Func, _loop
+from Interpreter import Interpreter, ExecutionContext, RuntimeError, MAX_CALL_DEPTH, PYTHON_RECURSION_EXHAUSTED
+from Register import RegisterInterpreter, RegisterLowering, RegisterFunction, CALL
+from typing import List, Dict, Any, Optional
+import Log
+
+log = Log.get_logger("Tiered")
+
+# Tiered execution: functions start in the tree-walking Interpreter, which
+# needs no compilation, and are lowered to register IR once they are hot.
+# Hotness is counted per Func (invocations) and per _loop (back-edges). A
+# hot loop promotes its function mid-execution: the ExecutionContext locals
+# and the function's part of the operand stack are moved into a register
+# file and the register tier continues at the loop header (on-stack
+# replacement). Register code calls register code in Python, those calls
+# count towards the call depth limit through Interpreter.compiled_depth.
+
+CALL_THRESHOLD = 2
+LOOP_THRESHOLD = 20
+
+class TieredInterpreter(RegisterInterpreter):
+    """Tree walker that promotes hot functions to the register tier"""
+
+    def __init__(self, module: Module, verbose: bool = False, use_colors: bool = False,
+                 call_threshold: int = CALL_THRESHOLD, loop_threshold: int = LOOP_THRESHOLD,
+                 max_call_depth: int = MAX_CALL_DEPTH, trusted: bool = False,
+                 fuel: Optional[int] = None, timeout: Optional[float] = None):
+        # Skip the eager lowering of RegisterInterpreter, functions are
+        # lowered one by one when they get hot
+        Interpreter.__init__(self, module, verbose=verbose, use_colors=use_colors,
+                             max_call_depth=max_call_depth, trusted=trusted, fuel=fuel, timeout=timeout)
+        self.call_threshold = call_threshold
+        self.loop_threshold = loop_threshold
+        self.lowering = RegisterLowering(self.module)
+        self.register_functions: List[Optional[RegisterFunction]] = [None] * len(self.module.funcs)
+        self.function_indices = {id(func): i for i, func in enumerate(self.module.funcs)}
+        self.invocation_counts: Dict[int, int] = {}
+        self.back_edge_counts: Dict[int, int] = {}    # id(_loop) -> entries
+        self.promotions: Dict[str, str] = {}
+        self.osr_counts: Dict[str, int] = {}
+
+    # Calls go through the tree walker's frame stack, not RegisterInterpreter
+    execute_function = Interpreter.execute_function
+
+    def call_function(self, func: Func) -> Optional[ExecutionContext]:
+        # Entry calls and the calls of tree-walked code both land here.
+        # The register tier is not metered, metered calls stay in the tree.
+        if self.metered:
+            return super().call_function(func)
+        index = self.function_indices[id(func)]
+        function = self.register_functions[index]
+        if function is None:
+            count = self.invocation_counts.get(index, 0) + 1
+            self.invocation_counts[index] = count
+            if count > self.call_threshold:
+                function = self.promote(index, f"{count - 1} calls")
+        if function is None:
+            return super().call_function(func)
+
+        # The arguments are on top of the tree walker's operand stack, both
+        # tiers keep i32 values wrapped
+        fp = self.sp - function.nparams
+        try:
+            result = self.run(function, self.stack[fp:self.sp])
+        except RecursionError:
+            raise RuntimeError(PYTHON_RECURSION_EXHAUSTED) from None
+        self.sp = fp
+        if result is not None:
+            self.stack[fp] = result
+            self.sp = fp + 1
+        return None
+
+    def run(self, function: RegisterFunction, args: List[int], pc: int = 0, regs: Optional[List[int]] = None) -> Any:
+        if regs is not None:
+            # On-stack replacement continues a call whose frame is on call_stack
+            return super().run(function, args, pc, regs)
+        if len(self.call_stack) + self.compiled_depth >= self.max_call_depth:
+            raise RuntimeError(f"Call stack exhausted: more than {self.max_call_depth} nested calls")
+        self.compiled_depth += 1
+        try:
+            return super().run(function, args, pc, regs)
+        finally:
+            self.compiled_depth -= 1
+
+    def enter_loop(self, instr: _loop, context: ExecutionContext) -> None:
+        if not self.loop_is_hot(instr, context):
+            super().enter_loop(instr, context)
+
+    def continue_loop(self, instr: _loop, context: ExecutionContext) -> None:
+        if not self.loop_is_hot(instr, context):
+            super().continue_loop(instr, context)
+
+    def loop_is_hot(self, instr: _loop, context: ExecutionContext) -> bool:
+        """Count a loop entry or back-edge, True if the call continued in the register tier"""
+        if self.metered:
+            return False
+        key = id(instr)
+        count = self.back_edge_counts.get(key, 0) + 1
+        self.back_edge_counts[key] = count
+        return count >= self.loop_threshold and self.enter_compiled_loop(instr, context)
+
+    def enter_compiled_loop(self, instr: _loop, context: ExecutionContext) -> bool:
+        """OSR: finish the current call in the register tier from the loop header"""
+        index = self.function_indices[id(context.func)]
+        function = self.register_functions[index] or self.promote(index, "hot loop")
+        entry = function.osr_entries.get(id(instr))
+        base = context.stack_base
+        if entry is None or self.sp - base != entry[1]:
+            return False  # no matching header, keep walking the tree
+        header, height = entry
+
+        regs = [0] * function.nparams + function.frame
+        regs[:base - context.fp] = self.stack[context.fp:base]
+        regs[function.stack_base:function.stack_base + self.sp - base] = self.stack[base:self.sp]
+        self.sp = base
+
+        log.info("On-stack replacement of %s at loop %s", function.name, instr.name or header)
+        self.osr_counts[function.name] = self.osr_counts.get(function.name, 0) + 1
+        try:
+            result = self.run(function, [], header, regs)
+        except RecursionError:
+            raise RuntimeError(PYTHON_RECURSION_EXHAUSTED) from None
+        if result is not None:
+            self.stack[self.sp] = result
+            self.sp += 1
+        # The call is complete, only its frame is left to pop
+        self.return_from(context)
+        return True
+
+    def promote(self, index: int, reason: str) -> RegisterFunction:
+        """Lower a function, and what it calls, to the register tier"""
+        pending = [index]
+        while pending:
+            i = pending.pop()
+            if self.register_functions[i] is not None:
+                continue
+            function = self.lowering.lower(self.module.funcs[i], i)
+            self.register_functions[i] = function
+            self.promotions[function.name] = reason if i == index else f"called by {self.module.funcs[index].name}"
+            # Register code calls register code directly
+            pending.extend(b for op, a, b, c in function.code if op == CALL)
+            log.info("Promoted %s to the register tier (%s)", function.name, self.promotions[function.name])
+        return self.register_functions[index]
+
+    def statistics(self) -> str:
+        lines = [f"Tiers: {len(self.promotions)} of {len(self.module.funcs)} functions promoted "
+                 f"(call threshold {self.call_threshold}, loop threshold {self.loop_threshold})"]
+        for i, func in enumerate(self.module.funcs):
+            tier = f"register ({self.promotions[func.name]})" if func.name in self.promotions else "tree"
+            lines.append(f"  {func.name}: {self.invocation_counts.get(i, 0)} interpreted calls, "
+                         f"{self.osr_counts.get(func.name, 0)} on-stack replacements, {tier}")
+        return "\n".join(lines)
@@ -0,0 +1,319 @@
+from Lexer import Module
+from Interpreter import RuntimeError
+from Register import (
+    RegisterInterpreter, RegisterFunction, jump_target,
+    MOV, ADD, SUB, MUL, LT_S, LT_U, GT_S, GE_U,
+    BR_LT_S, BR_GE_S, BR_GT_S, BR_LE_S, BR_LT_U, BR_GE_U,
+    JMP_IF, JMP_IFNOT, JMP, LOAD, STORE, DIV_S, CLZ,
+    GLOBAL_GET, GLOBAL_SET, CALL, CALL_HOST, RETURN, TRAP, BACK_EDGE,
+    _I32
+)
+from Runtime import (
+    wrap_i32, i32_add, i32_sub, i32_mul, i32_div_s, i32_clz,
+    i32_lt_s, i32_gt_s, i32_lt_u, i32_ge_u
+)
+from typing import List, Dict, Any, Tuple, Set
+import time
+import Log
+
+log = Log.get_logger("Tracing")
+
+# Trace-recording JIT on top of the register IR. Every loop back-edge is
+# patched to a BACK_EDGE instruction that counts iterations per loop. Once a
+# loop is hot, the next iteration is executed step by step while the taken
+# path is recorded, then the straight-line trace is compiled into a Python
+# function that keeps running until one of its guards fails.
+
+HOT_LOOP_THRESHOLD = 8
+MAX_TRACE_LENGTH = 500
+
+ARITHMETIC = {ADD: '+', SUB: '-', MUL: '*'}
+COMPARES = {LT_S: '<', GT_S: '>', LT_U: '<', GE_U: '>='}
+BRANCH_COMPARES = {BR_LT_S: '<', BR_GE_S: '>=', BR_GT_S: '>', BR_LE_S: '<=', BR_LT_U: '<', BR_GE_U: '>='}
+UNSIGNED = {LT_U, GE_U, BR_LT_U, BR_GE_U}
+
+# Semantics used while stepping through an iteration that is being recorded
+BINARY_STEPS = {
+    ADD: i32_add, SUB: i32_sub, MUL: i32_mul, DIV_S: i32_div_s,
+    LT_S: i32_lt_s, GT_S: i32_gt_s, LT_U: i32_lt_u, GE_U: i32_ge_u,
+}
+BRANCH_STEPS = {
+    BR_LT_S: i32_lt_s, BR_GT_S: i32_gt_s, BR_LT_U: i32_lt_u, BR_GE_U: i32_ge_u,
+    BR_GE_S: lambda a, b: a >= b, BR_LE_S: lambda a, b: a <= b,
+}
+
+class Trace:
+    """A compiled loop trace and its counters"""
+
+    def __init__(self, function: RegisterFunction, header: int, length: int):
+        self.function_name = function.name
+        self.header = header
+        self.length = length
+        self.source = ""
+        self.run = None
+        self.compile_time = 0.0
+        self.entries = 0
+        self.iterations = 0
+        self.exits: Dict[int, int] = {}
+
+    def __repr__(self):
+        return f"Trace({self.function_name}@{self.header}, {self.length} instructions)"
+
+class TraceCompiler:
+    """Turns a recorded list of (pc, instruction, next pc) into Python source"""
+
+    def __init__(self, interpreter: RegisterInterpreter, function: RegisterFunction):
+        self.interpreter = interpreter
+        self.function = function
+        self.lines: List[str] = []
+        self.read: Set[int] = set()
+        self.written: Set[int] = set()
+
+    def ref(self, r: int) -> str:
+        if self.function.is_constant(r):
+            value = self.function.constant(r)
+            return str(value) if value >= 0 else f"({value})"
+        self.read.add(r)
+        return f"r{r}"
+
+    def target(self, r: int) -> str:
+        self.written.add(r)
+        return f"r{r}"
+
+    def emit(self, line: str) -> None:
+        self.lines.append("            " + line)
+
+    def condition(self, instr: Tuple[int, Any, Any, Any]) -> str:
+        op, a, b, _ = instr
+        if op == JMP_IF:
+            return self.ref(a)
+        if op == JMP_IFNOT:
+            return f"not {self.ref(a)}"
+        if op in UNSIGNED:
+            return f"({self.ref(a)} & 4294967295) {BRANCH_COMPARES[op]} ({self.ref(b)} & 4294967295)"
+        return f"{self.ref(a)} {BRANCH_COMPARES[op]} {self.ref(b)}"
+
+    def side_exit(self, pc: int) -> None:
+        # Placeholder, the write-back list is only known once the whole trace is seen
+        self.emit(f"    EXIT {pc}")
+
+    def compile(self, recorded: List[Tuple[int, Tuple[int, Any, Any, Any], int]]) -> str:
+        for pc, instr, next_pc in recorded:
+            self.compile_instruction(pc, instr, next_pc)
+
+        writeback = [f"regs[{r}] = r{r}" for r in sorted(self.written)]
+        body = []
+        for line in self.lines:
+            if line.strip().startswith("EXIT "):
+                indent = line[:len(line) - len(line.lstrip())]
+                exit_pc = line.strip().split()[1]
+                body.extend(indent + stmt for stmt in writeback)
+                body.append(f"{indent}return {exit_pc}, n")
+            else:
+                body.append(line)
+
+        loads = [f"        r{r} = regs[{r}]" for r in sorted(self.read | self.written)]
+        header = ["def _make(memory, globals_, unpack_from, pack_into, wrap, div_s, clz, call, call_host, RuntimeError):",
+                  "    mlen4 = len(memory) - 4",
+                  "    def trace(regs):",
+                  f"        # {self.function.name} loop at {recorded[0][0]}, {len(recorded)} instructions"]
+        return "\n".join(header + loads + ["        n = 0", "        while True:", "            n += 1"] + body +
+                         ["    return trace"]) + "\n"
+
+    def compile_instruction(self, pc: int, instr: Tuple[int, Any, Any, Any], next_pc: int) -> None:
+        op, a, b, c = instr
+        if op == MOV:
+            self.emit(f"{self.target(a)} = {self.ref(b)}")
+        elif op in ARITHMETIC:
+            left, right = self.ref(b), self.ref(c)
+            dst = self.target(a)
+            self.emit(f"{dst} = {left} {ARITHMETIC[op]} {right}")
+            self.emit(f"if not -2147483648 <= {dst} <= 2147483647: {dst} = wrap({dst})")
+        elif op in COMPARES:
+            if op in UNSIGNED:
+                cond = f"({self.ref(b)} & 4294967295) {COMPARES[op]} ({self.ref(c)} & 4294967295)"
+            else:
+                cond = f"{self.ref(b)} {COMPARES[op]} {self.ref(c)}"
+            self.emit(f"{self.target(a)} = 1 if {cond} else 0")
+        elif op == LOAD:
+            self.emit(f"_a = {self.ref(b)}")
+            self.emit("if _a < 0 or _a > mlen4: raise RuntimeError(f'Memory access out of bounds: {_a}')")
+            self.emit(f"{self.target(a)} = unpack_from(memory, _a)[0]")
+        elif op == STORE:
+            self.emit(f"_a = {self.ref(a)}")
+            self.emit("if _a < 0 or _a > mlen4: raise RuntimeError(f'Memory access out of bounds: {_a}')")
+            self.emit(f"pack_into(memory, _a, {self.ref(b)})")
+        elif op == DIV_S:
+            left, right = self.ref(b), self.ref(c)
+            self.emit(f"{self.target(a)} = div_s({left}, {right})")
+        elif op == CLZ:
+            value = self.ref(b)
+            self.emit(f"{self.target(a)} = clz({value})")
+        elif op == GLOBAL_GET:
+            self.emit(f"{self.target(a)} = globals_[{b}]")
+        elif op == GLOBAL_SET:
+            self.emit(f"globals_[{a}] = {self.ref(b)}")
+        elif op == CALL:
+            args = ", ".join(self.ref(r) for r in c)
+            nresults = self.interpreter.register_functions[b].nresults
+            if nresults == 0:
+                self.emit(f"call({b}, [{args}])")
+            elif nresults == 1:
+                self.emit(f"{self.target(a)} = call({b}, [{args}])")
+            else:
+                targets = ", ".join(self.target(a + i) for i in range(nresults))
+                self.emit(f"{targets} = call({b}, [{args}])")
+        elif op == CALL_HOST:
+            args = ", ".join(self.ref(r) for r in b)
+            self.emit(f"call_host({a!r}, [{args}])")
+        elif op == JMP:
+            pass    # the trace is already laid out in execution order
+        else:
+            # Guard: stay on the trace only if the branch goes the recorded way
+            target = jump_target(instr)
+            cond = self.condition(instr)
+            if next_pc == target:
+                self.emit(f"if not ({cond}):")
+                self.side_exit(pc + 1)
+            else:
+                self.emit(f"if {cond}:")
+                self.side_exit(target)
+
+class TraceInterpreter(RegisterInterpreter):
+    """Register IR executor that records and compiles hot loop traces"""
+
+    def __init__(self, module: Module, verbose: bool = False, use_colors: bool = False,
+                 hot_loop_threshold: int = HOT_LOOP_THRESHOLD):
+        super().__init__(module, verbose=verbose, use_colors=use_colors)
+        self.hot_loop_threshold = hot_loop_threshold
+        self.back_edge_counts: Dict[Tuple[int, int], int] = {}
+        self.traces: Dict[Tuple[int, int], Trace] = {}
+        self.aborted: Dict[Tuple[int, int], str] = {}
+        self.originals: Dict[Tuple[int, int], Tuple[int, Any, Any, Any]] = {}
+        for function in self.register_functions:
+            for pc in function.back_edges:
+                self.originals[(function.index, pc)] = function.code[pc]
+                function.code[pc] = (BACK_EDGE, pc, None, None)
+
+    def back_edge(self, function: RegisterFunction, regs: List[int], pc: int) -> int:
+        instr = self.originals[(function.index, pc)]
+        next_pc = self.step(function, regs, pc, instr)
+        header = jump_target(instr)
+        if next_pc != header:
+            return next_pc
+        key = (function.index, header)
+        trace = self.traces.get(key)
+        if trace is not None:
+            return self.enter_trace(trace, regs)
+        count = self.back_edge_counts.get(key, 0) + 1
+        self.back_edge_counts[key] = count
+        if count >= self.hot_loop_threshold and key not in self.aborted:
+            return self.record(function, regs, header)
+        return header
+
+    def enter_trace(self, trace: Trace, regs: List[int]) -> int:
+        trace.entries += 1
+        exit_pc, iterations = trace.run(regs)
+        trace.iterations += iterations
+        trace.exits[exit_pc] = trace.exits.get(exit_pc, 0) + 1
+        return exit_pc
+
+    def record(self, function: RegisterFunction, regs: List[int], header: int) -> int:
+        """Execute one iteration from `header` while recording it"""
+        key = (function.index, header)
+        recorded = []
+        pc = header
+        while True:
+            instr = function.code[pc]
+            if instr[0] == BACK_EDGE:
+                instr = self.originals[(function.index, pc)]
+            if instr[0] in (RETURN, TRAP) or len(recorded) >= MAX_TRACE_LENGTH:
+                self.aborted[key] = "leaves the loop" if instr[0] in (RETURN, TRAP) else "too long"
+                return pc
+            next_pc = self.step(function, regs, pc, instr)
+            recorded.append((pc, instr, next_pc))
+            target = jump_target(instr)
+            if target is not None and next_pc == target and target <= pc:
+                if target != header:
+                    # An inner loop, that one gets its own trace
+                    self.aborted[key] = f"contains the loop at {target}"
+                    return next_pc
+                trace = self.compile_trace(function, header, recorded)
+                self.traces[key] = trace
+                return self.enter_trace(trace, regs)
+            pc = next_pc
+
+    def compile_trace(self, function: RegisterFunction, header: int, recorded: List[Tuple[int, Any, int]]) -> Trace:
+        start = time.perf_counter()
+        trace = Trace(function, header, len(recorded))
+        trace.source = TraceCompiler(self, function).compile(recorded)
+        namespace: Dict[str, Any] = {}
+        exec(compile(trace.source, f"<trace {function.name}@{header}>", 'exec'), namespace)
+
+        def call(index, args):
+            return self.run(self.register_functions[index], args)
+
+        trace.run = namespace['_make'](self.memory, self.globals, _I32.unpack_from, _I32.pack_into,
+                                       wrap_i32, i32_div_s, i32_clz, call, self.call_host, RuntimeError)
+        trace.compile_time = time.perf_counter() - start
+        log.info("Compiled trace for %s loop at %s (%d instructions)", function.name, header, len(recorded))
+        return trace
+
+    def step(self, function: RegisterFunction, regs: List[int], pc: int, instr: Tuple[int, Any, Any, Any]) -> int:
+        """Execute the single instruction at pc, returns the next pc"""
+        op, a, b, c = instr
+        if op == MOV:
+            regs[a] = regs[b]
+        elif op in BINARY_STEPS:
+            regs[a] = BINARY_STEPS[op](regs[b], regs[c])
+        elif op == LOAD:
+            address = regs[b]
+            if address < 0 or address + 4 > len(self.memory):
+                raise RuntimeError(f"Memory access out of bounds: {address}")
+            regs[a] = _I32.unpack_from(self.memory, address)[0]
+        elif op == STORE:
+            address = regs[a]
+            if address < 0 or address + 4 > len(self.memory):
+                raise RuntimeError(f"Memory access out of bounds: {address}")
+            _I32.pack_into(self.memory, address, regs[b])
+        elif op == CLZ:
+            regs[a] = i32_clz(regs[b])
+        elif op == GLOBAL_GET:
+            regs[a] = self.globals[b]
+        elif op == GLOBAL_SET:
+            self.globals[a] = regs[b]
+        elif op == CALL:
+            callee = self.register_functions[b]
+            result = self.run(callee, [regs[r] for r in c])
+            if callee.nresults == 1:
+                regs[a] = result
+            elif callee.nresults > 1:
+                regs[a:a + callee.nresults] = result
+        elif op == CALL_HOST:
+            self.call_host(a, [regs[r] for r in b])
+        elif op == JMP:
+            return a
+        elif op == JMP_IF:
+            if regs[a]:
+                return b
+        elif op == JMP_IFNOT:
+            if not regs[a]:
+                return b
+        elif op in BRANCH_STEPS:
+            if BRANCH_STEPS[op](regs[a], regs[b]):
+                return c
+        else:
+            raise RuntimeError(f"Cannot step over opcode {op}")
+        return pc + 1
+
+    def statistics(self) -> str:
+        lines = [f"Traces: {len(self.traces)} compiled, {len(self.aborted)} aborted "
+                 f"(threshold {self.hot_loop_threshold} back-edges)"]
+        for (index, header), trace in sorted(self.traces.items()):
+            exits = ", ".join(f"pc {pc}: {count}" for pc, count in sorted(trace.exits.items()))
+            lines.append(f"  {trace.function_name} loop at {header}: {trace.length} instructions, "
+                         f"compiled in {trace.compile_time * 1000:.3f} ms, {trace.entries} entries, "
+                         f"{trace.iterations} iterations, guard exits {{{exits}}}")
+        for (index, header), reason in sorted(self.aborted.items()):
+            lines.append(f"  {self.register_functions[index].name} loop at {header}: not traced, {reason}")
+        return "\n".join(lines)
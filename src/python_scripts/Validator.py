@@ -37,6 +37,7 @@ from Lexer import (
 )
 
 from Parser import *
+from Runtime import COLORS
 
 
 class Validator:
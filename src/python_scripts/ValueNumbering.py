@@ -0,0 +1,360 @@
+from Lexer import (
+    Module, Func, Instruction, BinaryInstruction,
+    _i32_const, _i32_add, _i32_sub, _i32_mul, _i32_clz,
+    _local_get, _local_set, _local_tee, _global_get, _global_set,
+    _call, _br, _return, _block, _loop, _if,
+    _i32_load, _i32_store
+)
+from Runtime import RuntimeError, wrap_i32, parse_int, immediate, global_index
+from Passes import Pass, make, walk, local_key, add_local, stack_effect
+from typing import List, Dict, Tuple, Any, Optional
+import Log
+
+log = Log.get_logger("ValueNumbering")
+
+# Common subexpression and redundant load elimination over canonical IR,
+# by value numbering. Straight-line code is simulated on a stack of values:
+# equal value numbers mean equal values at run time. A local, a global or
+# a memory word read twice without a write in between gets the same number,
+# so does arithmetic on equal numbers. A value computed again by a
+# contiguous run of instructions (arithmetic, i32.load) is read from a
+# local instead, the first computation keeps it with a local.tee:
+#
+#   local.get $addr1                  local.get $addr1
+#   i32.load                          i32.load
+#   ...                    =>         local.tee $cse_7
+#   if                                ...
+#     local.get $addr1                if
+#     i32.load                          local.get $cse_7
+#     local.set $tmp1                   local.set $tmp1
+#
+# If a local already holds the value, e.g. it was stored with local.set,
+# that local is read. Nested bodies start from the state of the code
+# before them, it runs first: an if arm can reuse the condition's loads.
+# Afterwards, everything they may change is forgotten. A loop forgets it
+# on entry too, the back-edge brings changed values around.
+#
+# Memory words are tracked by the value number of their address. A store
+# forgets the words it may overwrite and remembers the value stored, so a
+# load after it reads the value without going to memory. Two addresses are
+# only known to differ when both are `base * scale + offset` for the same
+# base and scale and their offsets are at least a word apart; calls forget
+# all words and globals. A repeated load reads the same address as the
+# first one, which did not trap, neither does a repeated division.
+
+# Operations whose operands can be swapped without changing the value
+COMMUTATIVE = (_i32_add, _i32_mul)
+
+class Value:
+    """A value on the simulated stack. `start` and `end` delimit the
+    instructions of the body computing it, start is None when they cannot
+    be removed (side effects, or not contiguous)."""
+
+    __slots__ = ('number', 'start', 'end')
+
+    def __init__(self, number: int, start: Optional[int], end: int):
+        self.number = number
+        self.start = start
+        self.end = end
+
+class Region:
+    """A body being rewritten: its output so far and its simulated stack"""
+
+    __slots__ = ('out', 'stack')
+
+    def __init__(self):
+        self.out: List[Instruction] = []
+        self.stack: List[Value] = []
+
+class Site:
+    """The first computation of a value, ends with `instr` in `region`.
+    `local` is the local keeping it once a later computation reuses it."""
+
+    __slots__ = ('region', 'instr', 'local')
+
+    def __init__(self, region: Region, instr: Instruction):
+        self.region = region
+        self.instr = instr
+        self.local: Optional[str] = None
+
+class State:
+    """What is known at a point of a body, by value number"""
+
+    def __init__(self):
+        self.locals: Dict[int, int] = {}                    # local index -> value
+        self.holders: Dict[int, Tuple[int, Any]] = {}       # value -> (local index, immediate)
+        self.globals: Dict[int, int] = {}                   # global index -> value
+        self.memory: Dict[int, int] = {}                    # address value -> loaded value
+        self.sites: Dict[int, Site] = {}                    # value -> first computation
+
+    def copy(self) -> 'State':
+        state = State()
+        state.locals = dict(self.locals)
+        state.holders = dict(self.holders)
+        state.globals = dict(self.globals)
+        state.memory = dict(self.memory)
+        state.sites = dict(self.sites)
+        return state
+
+class CommonSubexpressionElimination(Pass):
+    """Reuse computed values and loaded memory words instead of recomputing them"""
+
+    name = "cse"
+
+    def run_function(self, func: Func, module: Module) -> int:
+        self.func = func
+        self.module = module
+        self.numbers = 0
+        # Hash-consing of expressions on value numbers
+        self.table: Dict[tuple, int] = {}
+        # Value number -> (base, scale, offset): value == base * scale + offset
+        self.affine: Dict[int, Tuple[Optional[int], int, int]] = {}
+        reused = self.counts.get("expressions reused", 0)
+        state = State()
+        for i in range(len(func.params) + len(func.locals)):
+            state.locals[i] = self.fresh()
+        func.body = self.number_body(func.body, state)
+        reused = self.counts.get("expressions reused", 0) - reused
+        if reused:
+            log.info("%s: reused %d values", func.name, reused)
+        return reused
+
+    def fresh(self) -> int:
+        self.numbers += 1
+        return self.numbers
+
+    def lookup(self, key: tuple) -> int:
+        if key not in self.table:
+            self.table[key] = self.fresh()
+        return self.table[key]
+
+    def number_body(self, body: List[Instruction], state: State) -> List[Instruction]:
+        """Rewrite a body entered in `state`, which is updated to the state on
+        fall-through"""
+
+        region = Region()
+        out, stack = region.out, region.stack
+
+        def pop(n: int) -> List[Value]:
+            values = [stack.pop() if stack else Value(self.fresh(), None, len(out)) for _ in range(n)]
+            return values[::-1]
+
+        for i, instr in enumerate(body):
+            if isinstance(instr, _i32_const):
+                try:
+                    constant = wrap_i32(parse_int(immediate(instr)))
+                    number = self.lookup(('const', constant))
+                    self.affine[number] = (None, 0, constant)
+                except (RuntimeError, ValueError):
+                    number = self.fresh()
+                out.append(instr)
+                stack.append(Value(number, len(out) - 1, len(out)))
+            elif isinstance(instr, _local_get):
+                key = local_key(self.func, instr)
+                if key is None:
+                    number = self.fresh()
+                elif key not in state.locals:
+                    number = state.locals[key] = self.fresh()
+                else:
+                    number = state.locals[key]
+                out.append(instr)
+                stack.append(Value(number, len(out) - 1, len(out)))
+            elif isinstance(instr, _global_get):
+                index = self.global_key(instr)
+                if index is None:
+                    number = self.fresh()
+                elif index not in state.globals:
+                    number = state.globals[index] = self.fresh()
+                else:
+                    number = state.globals[index]
+                out.append(instr)
+                stack.append(Value(number, len(out) - 1, len(out)))
+            elif isinstance(instr, (BinaryInstruction, _i32_clz, _i32_load)):
+                operands = pop(1 if isinstance(instr, (_i32_clz, _i32_load)) else 2)
+                out.append(instr)
+                number = self.operation(instr, operands, state)
+                contiguous = all(value.start is not None for value in operands) and \
+                    all(a.end == b.start for a, b in zip(operands, operands[1:])) and \
+                    operands[-1].end == len(out) - 1
+                stack.append(Value(number, operands[0].start if contiguous else None, len(out)))
+                self.reuse(region, state)
+            elif isinstance(instr, (_local_set, _local_tee)):
+                value = pop(1)[0]
+                key = local_key(self.func, instr)
+                out.append(instr)
+                if key is None:
+                    # Any local may have changed
+                    for index in state.locals:
+                        state.locals[index] = self.fresh()
+                else:
+                    state.locals[key] = value.number
+                    state.holders[value.number] = (key, immediate(instr))
+                if isinstance(instr, _local_tee):
+                    stack.append(Value(value.number, None, len(out)))
+            elif isinstance(instr, _global_set):
+                value = pop(1)[0]
+                index = self.global_key(instr)
+                out.append(instr)
+                if index is None:
+                    state.globals.clear()
+                else:
+                    state.globals[index] = value.number
+            elif isinstance(instr, _i32_store):
+                address, value = pop(2)
+                out.append(instr)
+                for loaded in list(state.memory):
+                    if not self.distinct(loaded, address.number):
+                        del state.memory[loaded]
+                state.memory[address.number] = value.number
+            elif isinstance(instr, (_block, _loop)):
+                if isinstance(instr, _loop):
+                    self.forget(instr.operands, state)
+                instr.operands = self.number_body(instr.operands, state.copy())
+                self.forget(instr.operands, state)
+                out.append(instr)
+            elif isinstance(instr, _if):
+                pop(1)
+                instr.operands['then'] = self.number_body(instr.operands['then'], state.copy())
+                instr.operands['else'] = self.number_body(instr.operands['else'], state.copy())
+                self.forget(instr.operands['then'] + instr.operands['else'], state)
+                out.append(instr)
+            else:
+                pops, pushes = stack_effect(instr, self.module)
+                pop(pops)
+                out.append(instr)
+                if isinstance(instr, _call):
+                    state.globals.clear()
+                    state.memory.clear()
+                stack.extend(Value(self.fresh(), None, len(out)) for _ in range(pushes))
+                if isinstance(instr, (_br, _return)):
+                    # The rest of the body is unreachable, keep it as it is
+                    out.extend(body[i + 1:])
+                    break
+        return out
+
+    def global_key(self, instr: Instruction) -> Optional[int]:
+        try:
+            return global_index(self.module, immediate(instr))
+        except (RuntimeError, ValueError):
+            return None
+
+    def operation(self, instr: Instruction, operands: List[Value], state: State) -> int:
+        """Value number of an arithmetic instruction or load"""
+
+        numbers = [value.number for value in operands]
+        if isinstance(instr, _i32_load):
+            address = numbers[0]
+            if address not in state.memory:
+                state.memory[address] = self.fresh()
+            return state.memory[address]
+        if isinstance(instr, COMMUTATIVE):
+            numbers.sort()
+        number = self.lookup((type(instr),) + tuple(numbers))
+        if number not in self.affine:
+            form = self.affine_form(instr, operands)
+            if form is not None:
+                self.affine[number] = form
+        return number
+
+    def affine_form(self, instr: Instruction, operands: List[Value]) -> Optional[Tuple[Optional[int], int, int]]:
+        """(base, scale, offset) of an operation's value if it is one. All i32
+        arithmetic wraps the same way, so the forms stay exact."""
+
+        forms = [self.affine.get(value.number, (value.number, 1, 0)) for value in operands]
+        if len(forms) == 2:
+            (base_a, scale_a, offset_a), (base_b, scale_b, offset_b) = forms
+            if isinstance(instr, _i32_add):
+                if base_a is None:
+                    return base_b, scale_b, wrap_i32(offset_a + offset_b)
+                if base_b is None:
+                    return base_a, scale_a, wrap_i32(offset_a + offset_b)
+            elif isinstance(instr, _i32_sub) and base_b is None:
+                return base_a, scale_a, wrap_i32(offset_a - offset_b)
+            elif isinstance(instr, _i32_mul):
+                if base_b is None:
+                    return base_a, wrap_i32(scale_a * offset_b), wrap_i32(offset_a * offset_b)
+                if base_a is None:
+                    return base_b, wrap_i32(scale_b * offset_a), wrap_i32(offset_b * offset_a)
+        return None
+
+    def distinct(self, a: int, b: int) -> bool:
+        """Whether the words at addresses a and b cannot overlap"""
+
+        base_a, scale_a, offset_a = self.affine.get(a, (a, 1, 0))
+        base_b, scale_b, offset_b = self.affine.get(b, (b, 1, 0))
+        if base_a != base_b or scale_a != scale_b:
+            return False
+        distance = (offset_a - offset_b) & 0xFFFFFFFF
+        return 4 <= distance <= 0xFFFFFFFF - 3
+
+    def forget(self, body: List[Instruction], state: State) -> None:
+        """Forget in `state` what running `body` may change"""
+
+        for instr in walk(body):
+            if isinstance(instr, (_local_set, _local_tee)):
+                key = local_key(self.func, instr)
+                for index in (state.locals if key is None else [key]):
+                    state.locals[index] = self.fresh()
+            elif isinstance(instr, _global_set):
+                index = self.global_key(instr)
+                if index is None:
+                    state.globals.clear()
+                else:
+                    state.globals.pop(index, None)
+            elif isinstance(instr, _i32_store):
+                state.memory.clear()
+            elif isinstance(instr, _call):
+                state.globals.clear()
+                state.memory.clear()
+
+    def reuse(self, region: Region, state: State) -> None:
+        """Replace the value just computed on top of region's stack by a
+        local.get, if the value is available, or remember where it is"""
+
+        value = region.stack[-1]
+        if value.start is None or value.end - value.start < 2:
+            return
+        holder = state.holders.get(value.number)
+        if holder is not None and state.locals.get(holder[0]) == value.number:
+            local = holder[1]
+        else:
+            site = state.sites.get(value.number)
+            if site is None or not self.keep(site, value.number, state):
+                state.sites[value.number] = Site(region, region.out[-1])
+                return
+            local = site.local
+            if value.start is None:
+                # The local.tee went into this very value
+                return
+        removed = region.out[value.start:]
+        del region.out[value.start:]
+        region.out.append(make(_local_get, local))
+        value.end = value.start + 1
+        self.count("expressions reused")
+        self.count("loads eliminated", sum(isinstance(instr, _i32_load) for instr in removed))
+
+    def keep(self, site: Site, number: int, state: State) -> bool:
+        """Make a site keep its value in a local, False if the site is gone"""
+
+        if site.local is None:
+            out = site.region.out
+            position = next((i for i, instr in enumerate(out) if instr is site.instr), None)
+            if position is None:
+                return False
+            site.local = add_local(self.func, f"$cse_{len(self.func.locals)}")
+            out.insert(position + 1, make(_local_tee, site.local))
+            # Values after the site move, the ones around it now store to a
+            # local and cannot be removed any more
+            for value in site.region.stack:
+                if value.start is None:
+                    value.end += value.end > position
+                elif value.start > position:
+                    value.start += 1
+                    value.end += 1
+                elif value.end > position:
+                    value.start = None
+                    value.end += 1
+            self.count("locals")
+        key = len(self.func.params) + [var.name for var in self.func.locals].index(site.local)
+        state.locals[key] = number
+        return True
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import io
+import os
+import signal
+import statistics
+import time
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from Lexer import Lexer, Module, Func
+from Parser import Parser
+from main import ENGINES
+
+class BenchmarkTimeout(Exception):
+    pass
+
+def load_module(path: Path) -> Optional[Module]:
+    """Lex and parse a .wat file, silencing the parser's debug output"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        tokens = Lexer().tokenize(path.read_text())
+        if tokens is None:
+            return None
+        return Parser().parse(tokens)
+
+def entry_points(module: Module) -> List[Func]:
+    """Exported functions, or the first function like main.py does"""
+    names = [exp.exp_func.name for exp in module.exports if exp.isFunc and exp.exp_func]
+    funcs = [func for func in module.funcs if func.name in names]
+    if not funcs and module.funcs:
+        funcs = [module.funcs[0]]
+    return funcs
+
+def time_engine(engine: str, path: Path, func: Func, args: List[int], runs: int, timeout: int) -> Tuple[Optional[float], str]:
+    """Best wall time in ms of `runs` calls, plus the result as text"""
+    times = []
+    result = None
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            interpreter = ENGINES[engine](load_module(path), verbose=False)
+            for _ in range(runs):
+                if hasattr(signal, 'SIGALRM'):
+                    signal.alarm(timeout)
+                start = time.perf_counter()
+                result = interpreter.execute_function(func.name, list(args))
+                times.append((time.perf_counter() - start) * 1000)
+        except BenchmarkTimeout:
+            return None, "timeout"
+        except Exception as e:
+            return None, f"error: {str(e)[:40]}"
+        finally:
+            if hasattr(signal, 'SIGALRM'):
+                signal.alarm(0)
+    return min(times), str(result)
+
+def benchmark(engines: List[str], test_dirs: List[str], runs: int, arg: int, timeout: int) -> Dict[str, Dict[str, Tuple[Optional[float], str]]]:
+    """Run every entry point of every test file on every engine"""
+    results = {}
+    for test_dir in test_dirs:
+        for path in sorted(Path(test_dir).glob('*.wat')):
+            module = load_module(path)
+            if module is None:
+                continue
+            for func in entry_points(module):
+                key = f"{path.name} {func.name}"
+                args = [arg] * len(func.params)
+                results[key] = {engine: time_engine(engine, path, func, args, runs, timeout) for engine in engines}
+    return results
+
+def print_table(results: Dict[str, Dict[str, Tuple[Optional[float], str]]], engines: List[str]) -> None:
+    baseline = engines[0]
+    header = f"{'Benchmark':<48}" + "".join(f"{engine:>14}" for engine in engines)
+    print(header)
+    print("-" * len(header))
+    speedups = {engine: [] for engine in engines[1:]}
+    for key, row in results.items():
+        cells = []
+        for engine in engines:
+            ms, status = row[engine]
+            cells.append(f"{ms:12.3f}ms" if ms is not None else f"{status[:12]:>14}")
+            base_ms = row[baseline][0]
+            if engine != baseline and ms and base_ms:
+                speedups[engine].append(base_ms / ms)
+        print(f"{key[:47]:<48}" + "".join(cells))
+    print("-" * len(header))
+    for engine, values in speedups.items():
+        if values:
+            print(f"{engine}: geometric mean speedup over {baseline} "
+                  f"{statistics.geometric_mean(values):.1f}x ({len(values)} benchmarks)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Uwasm execution engines on the test corpus")
+    parser.add_argument("-e", "--engines", nargs='+', default=list(ENGINES), choices=list(ENGINES),
+                       help="Engines to compare, the first one is the baseline")
+    parser.add_argument("--test-dirs", nargs='+', default=["../tests/success", "../tests/custom"],
+                       help="Directories containing test files")
+    parser.add_argument("--runs", type=int, default=10,
+                       help="Number of calls per benchmark, the best one is reported")
+    parser.add_argument("--arg", type=int, default=10,
+                       help="Value passed for every function parameter")
+    parser.add_argument("--timeout", type=int, default=5,
+                       help="Seconds before a single call is abandoned (e.g. infinite loops)")
+    args = parser.parse_args()
+
+    if hasattr(signal, 'SIGALRM'):
+        def on_alarm(signum, frame):
+            raise BenchmarkTimeout()
+        signal.signal(signal.SIGALRM, on_alarm)
+
+    results = benchmark(args.engines, args.test_dirs, args.runs, args.arg, args.timeout)
+    print_table(results, args.engines)
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,21 @@ from Lexer import Lexer
 from Parser import Parser
 from Validator import Validator
 from ASTPrinter import ASTPrinter, EnhancedASTPrinter
-from Interpreter import interpret_ast, Interpreter
+from Interpreter import interpret_ast, Interpreter, RuntimeError, OutOfFuel, DeadlineExceeded, ExecutionSuspended
+from Bytecode import BytecodeInterpreter
+from Closure import ClosureInterpreter
+from Register import RegisterInterpreter
+from Tracing import TraceInterpreter
+from Tiered import TieredInterpreter
+from Codegen import ModuleTranspiler, CodegenError, export_names, identifier
+from Passes import optimize, PassError, OPT_LEVELS, UNROLL_FACTOR
+import Log
+import functools
 import pprint
 import os
+import signal
 import sys
+import tempfile
 import argparse
 from pathlib import Path
 import json
@@ -14,13 +25,25 @@ verb_flag = False
 valid_flag = False
 color_flag = False
 
+log = Log.get_logger("main")
+
+ENGINES = {
+    'tree': Interpreter,
+    'bytecode': BytecodeInterpreter,
+    'closure': ClosureInterpreter,
+    'codegen': functools.partial(Interpreter, codegen=True),
+    'register': RegisterInterpreter,
+    'trace': TraceInterpreter,
+    'tiered': TieredInterpreter,
+}
+
 parser_arg = argparse.ArgumentParser(description="An interpreter for WASM")
 
 parser_arg.add_argument(
     '-t',
     '--test',
     action='store_true',
-    help="Run all test files in ../tests/success and ../tests/failure"
+    help="Run all test files in ../tests/success and ../tests/failure, and the regression fixtures in ../tests/regression"
 )
 
 parser_arg.add_argument(
@@ -34,7 +57,15 @@ parser_arg.add_argument(
     '-d',
     '--debug',
     action='store_true',
-    help="List all intermediate verbose steps, can be used for debugging purposes"
+    help="List all intermediate verbose steps, can be used for debugging purposes (same as --log-level debug)"
+)
+
+parser_arg.add_argument(
+    '--log-level',
+    type=str,
+    choices=list(Log.LEVELS),
+    default='warning',
+    help="Least severe log messages shown from the lexer, parser and interpreter (default: warning)"
 )
 
 parser_arg.add_argument(
@@ -90,6 +121,115 @@ parser_arg.add_argument(
     help="Output format for results"
 )
 
+parser_arg.add_argument(
+    '-e',
+    '--engine',
+    type=str,
+    choices=['tree', 'bytecode', 'closure', 'codegen', 'register', 'trace', 'tiered'],
+    default='tree',
+    help="Execution engine: tree-walking interpreter, compiled bytecode, compiled closures, generated Python source, register IR, register IR with a tracing JIT or tree walker promoting hot functions to register IR"
+)
+
+parser_arg.add_argument(
+    '--stats',
+    action='store_true',
+    help="Print the execution statistics of the engine after the run (e.g. compiled traces)"
+)
+
+parser_arg.add_argument(
+    '--max-call-depth',
+    type=int,
+    default=None,
+    metavar='N',
+    help="Limit of nested guest calls, including the calls made by compiled code (tree, codegen, tiered)"
+)
+
+parser_arg.add_argument(
+    '--unchecked',
+    action='store_true',
+    help="Validate the module, then run it without dynamic stack checks (tree, codegen, tiered)"
+)
+
+parser_arg.add_argument(
+    '--fuel',
+    type=int,
+    default=None,
+    metavar='N',
+    help="Trap once about N instructions have run, checked at loop back-edges and calls (tree, codegen, tiered)"
+)
+
+parser_arg.add_argument(
+    '--timeout',
+    type=float,
+    default=None,
+    metavar='SECONDS',
+    help="Trap once the call has run for SECONDS, checked at loop back-edges and calls (tree, codegen, tiered)"
+)
+
+parser_arg.add_argument(
+    '--checkpoint',
+    type=str,
+    default=None,
+    metavar='PATH',
+    help="Write a checkpoint to PATH on SIGUSR1, and stop after writing one on SIGTERM (tree, codegen, tiered)"
+)
+
+parser_arg.add_argument(
+    '--checkpoint-every',
+    type=int,
+    default=None,
+    metavar='N',
+    help="With --checkpoint, also write one every N fuel units"
+)
+
+parser_arg.add_argument(
+    '--resume',
+    type=str,
+    default=None,
+    metavar='PATH',
+    help="Continue the execution saved in the checkpoint at PATH instead of starting the function (tree, codegen, tiered)"
+)
+
+parser_arg.add_argument(
+    '--dump-source',
+    action='store_true',
+    help="Print the Python source generated by the codegen engine"
+)
+
+parser_arg.add_argument(
+    '-O',
+    dest='opt_level',
+    type=int,
+    choices=OPT_LEVELS,
+    default=0,
+    metavar='LEVEL',
+    help="Optimization level 0-3 (-O0 ... -O3), higher levels run more expensive passes before execution or transpilation (default: 0)"
+)
+
+parser_arg.add_argument(
+    '--dump-ir',
+    action='store_true',
+    help="Print the IR after every optimization pass"
+)
+
+parser_arg.add_argument(
+    '--unroll',
+    dest='unroll_factor',
+    type=int,
+    default=UNROLL_FACTOR,
+    metavar='N',
+    help=f"Unroll counted loops N times at -O3, 1 disables unrolling (default: {UNROLL_FACTOR})"
+)
+
+parser_arg.add_argument(
+    '-T',
+    '--transpile',
+    type=str,
+    metavar='OUTPUT',
+    default="",
+    help="Transpile the module ahead of time into a standalone, importable Python file"
+)
+
 parser_arg.add_argument('file', type=argparse.FileType('r'), nargs='?', help="Input .wat file")
 
 def run_tests():
@@ -127,6 +267,113 @@ def run_tests():
                 else:
                     print("\033[31mValidation failed\033[0m")
                 print(f"Test {test_file.name} completed")
+    return run_regression_tests()
+
+# Regression fixtures run on every engine and on the ahead-of-time
+# transpiled module, at every optimization level. Each
+# `;; run: $func args... -> expected` comment line is one call, `expected`
+# is an i32 or `trap`. A `;; changes: pass...` line names passes that must
+# change the module at -O3, so the fixture keeps exercising them.
+# The tiered engine runs below its thresholds, all in the tree walker, and
+# above them: promoted at the first call, and by on-stack replacement at
+# the first loop entry. The fixtures also run trusted (--unchecked), which
+# refuses a module with a nested stack underflow, and transpiled ahead of
+# time, which refuses a module it cannot translate: a refusal counts as a
+# trap. "tree (resumed)" writes a checkpoint every few fuel units and
+# continues from the last one in a fresh Interpreter.
+REGRESSION_DIR = "../tests/regression"
+REGRESSION_ENGINES = {
+    **ENGINES,
+    'tiered (cold)': functools.partial(TieredInterpreter, call_threshold=sys.maxsize, loop_threshold=sys.maxsize),
+    'tiered (hot calls)': functools.partial(TieredInterpreter, call_threshold=0),
+    'tiered (hot loops)': functools.partial(TieredInterpreter, call_threshold=sys.maxsize, loop_threshold=1),
+    'tree (unchecked)': functools.partial(Interpreter, trusted=True),
+    'tiered (unchecked)': functools.partial(TieredInterpreter, trusted=True),
+    'tree (resumed)': None,
+    'aot': None,
+}
+REGRESSION_CHECKPOINT_EVERY = 25
+
+def parse_regression_runs(text):
+    runs = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line.startswith(';; run:'):
+            continue
+        call, _, expected = line[len(';; run:'):].partition('->')
+        name, *args = call.split()
+        expected = expected.strip()
+        runs.append((name, list(map(int, args)), expected if expected == 'trap' else int(expected)))
+    return runs
+
+def parse_regression_passes(text):
+    return [name for line in text.splitlines() if line.strip().startswith(';; changes:')
+            for name in line.strip()[len(';; changes:'):].split()]
+
+def load_regression(text, level):
+    """A freshly parsed module optimized at `level`, and its PassManager"""
+    module = Parser().parse(Lexer().tokenize(text))
+    return module, optimize(module, level)
+
+def trap_or_result(call, trap=RuntimeError):
+    try:
+        return call()
+    except trap:
+        return 'trap'
+
+def run_regression(text, level, engine, name, args):
+    """Result of one call on a freshly loaded module, 'trap' if it traps"""
+    module, _ = load_regression(text, level)
+    if engine == 'tree (resumed)':
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint')
+            interpreter = Interpreter(module)
+            interpreter.set_checkpointing(path, REGRESSION_CHECKPOINT_EVERY)
+            result = trap_or_result(lambda: interpreter.execute_function(name, args))
+            if not os.path.exists(path):
+                return result
+            resumed = trap_or_result(lambda: Interpreter(load_regression(text, level)[0]).resume(path))
+        return resumed if resumed == result else f"{result}, {resumed} after resuming"
+    if engine != 'aot':
+        return trap_or_result(lambda: REGRESSION_ENGINES[engine](module).execute_function(name, args))
+    index = next(i for i, func in enumerate(module.funcs) if func.name == name)
+    try:
+        source = ModuleTranspiler(module).transpile()
+    except CodegenError:
+        return 'trap'
+    namespace = {}
+    exec(compile(source, name, 'exec'), namespace)
+    function = namespace[identifier(export_names(module)[index][0])]
+    return trap_or_result(lambda: function(*args), namespace['RuntimeError'])
+
+def run_regression_tests():
+    print(f"\nRunning regression tests in {REGRESSION_DIR}:")
+    failures = 0
+    for test_file in sorted(Path(REGRESSION_DIR).glob('*.wat')):
+        text = test_file.read_text()
+        _, manager = load_regression(text, max(OPT_LEVELS))
+        changed = {opt_pass.name for opt_pass, _, changes in manager.results if changes}
+        for name in parse_regression_passes(text):
+            if name not in changed:
+                failures += 1
+                print(f"\033[31m{test_file.name}: {name} made no changes at -O{max(OPT_LEVELS)}\033[0m")
+        for name, args, expected in parse_regression_runs(text):
+            for level in OPT_LEVELS:
+                for engine in REGRESSION_ENGINES:
+                    try:
+                        result = run_regression(text, level, engine, name, args)
+                    except Exception as e:
+                        result = f"{type(e).__name__}: {e}"
+                    if result != expected:
+                        failures += 1
+                        print(f"\033[31m{test_file.name} {name} {args} on {engine} at -O{level}: "
+                              f"expected {expected}, got {result}\033[0m")
+        print(f"Test {test_file.name} completed")
+    if failures:
+        print(f"\033[31m{failures} regression runs failed\033[0m")
+    else:
+        print("\033[1;32mAll regression runs passed\033[0m")
+    return failures == 0
 
 
 def main():
@@ -140,13 +387,15 @@ def main():
         valid_flag = True
     if args.color:
         color_flag = True
+    Log.configure(Log.DEBUG if verb_flag else Log.LEVELS[args.log_level], use_colors=color_flag)
     
     if args.test:
-        run_tests()
+        if not run_tests():
+            sys.exit(1)
         return
     
     if not args.file:
-        print("Error: No input file specified")
+        log.error("No input file specified")
         parser_arg.print_help()
         sys.exit(1)
     
@@ -160,19 +409,14 @@ def main():
             print("===================")
             
     except Exception as e:
-        print(f"Error reading file: {e}")
+        log.error("Error reading file: %s", e)
         sys.exit(1)
     
 
     lexer = Lexer()
-    if verb_flag:
-        lexer.lex_verb_flag = True
-    if color_flag:
-        lexer.lex_col_flag = True
-        
     tokens = lexer.tokenize(wat_code)
     if tokens is None:
-        print("Lexical analysis failed")
+        log.error("Lexical analysis failed")
         sys.exit(1)
         
     if verb_flag:
@@ -183,16 +427,11 @@ def main():
     
 
     parser = Parser()
-    if verb_flag:
-        parser.par_verb_flag = True
-    if color_flag:
-        parser.par_col_flag = True
-    
     print("\n=== Parsing ===")
         
     ast = parser.parse(tokens)
     if ast is None:
-        print("Parsing failed")
+        log.error("Parsing failed")
         sys.exit(1)
     
     if args.ast or args.branch or args.color:
@@ -214,7 +453,8 @@ def main():
     if color_flag:
         validator.val_col_flag = True
         
-    if valid_flag:
+    # --unchecked is only safe for modules that passed validation
+    if valid_flag or (args.interpret and args.unchecked):
         print("\n=== VALIDATION ===")
         validation_result = validator.validate(ast)
         if validation_result:
@@ -223,6 +463,29 @@ def main():
             print("✗ Validation failed")
             sys.exit(1)
     
+    # Optimization, verified by re-running the Validator after every pass
+    if args.opt_level:
+        print(f"\n=== OPTIMIZATION (-O{args.opt_level}) ===")
+        try:
+            pass_manager = optimize(ast, args.opt_level, dump_ir=args.dump_ir, unroll_factor=args.unroll_factor)
+        except PassError as e:
+            log.error("Optimization failed: %s", e.message)
+            sys.exit(1)
+        if args.stats:
+            print(pass_manager.report())
+    
+    # Ahead-of-time transpilation
+    if args.transpile:
+        print("\n=== TRANSPILATION ===")
+        try:
+            source = ModuleTranspiler(ast, source_name=os.path.basename(args.file.name)).transpile()
+        except CodegenError as e:
+            log.error("Transpilation failed: %s", e.message)
+            sys.exit(1)
+        with open(args.transpile, 'w') as output:
+            output.write(source)
+        print(f"✓ Transpiled to {args.transpile}")
+    
     # Interpretation
     if args.interpret:
         print("\n=== INTERPRETATION ===")
@@ -239,15 +502,46 @@ def main():
             #     print("Error: Invalid JSON format for parameters")
             #     sys.exit(1)
         
-        print(params)
-        print(list(map(int, params)))
         params = list(map(int, params))
+        log.debug("Parameters: %s", params)
 
-        interpreter = Interpreter(ast, verbose=True, use_colors=color_flag)
+        engine_options = {}
+        if (args.max_call_depth is not None or args.unchecked) and args.engine not in ('tree', 'codegen', 'tiered'):
+            log.error("--max-call-depth and --unchecked need the tree, codegen or tiered engine")
+            sys.exit(1)
+        if args.max_call_depth is not None:
+            engine_options['max_call_depth'] = args.max_call_depth
+        if args.unchecked:
+            engine_options['trusted'] = True
+        if args.fuel is not None or args.timeout is not None:
+            # A limit that is silently ignored would be worse than none
+            if args.engine not in ('tree', 'codegen', 'tiered'):
+                log.error("--fuel and --timeout need the tree, codegen or tiered engine")
+                sys.exit(1)
+            engine_options['fuel'] = args.fuel
+            engine_options['timeout'] = args.timeout
+        if (args.checkpoint or args.resume) and args.engine not in ('tree', 'codegen', 'tiered'):
+            log.error("--checkpoint and --resume need the tree, codegen or tiered engine")
+            sys.exit(1)
+        interpreter = ENGINES[args.engine](ast, verbose=verb_flag, use_colors=color_flag, **engine_options)
+        if args.checkpoint:
+            interpreter.set_checkpointing(args.checkpoint, args.checkpoint_every)
+            signal.signal(signal.SIGUSR1, lambda signum, frame: interpreter.request_checkpoint())
+            signal.signal(signal.SIGTERM, lambda signum, frame: interpreter.request_checkpoint(stop=True))
+        if verb_flag and args.engine in ('bytecode', 'register', 'trace'):
+            print(interpreter.disassemble())
+        if args.dump_source and interpreter.codegen_source:
+            print("\n=== GENERATED SOURCE ===")
+            print(interpreter.codegen_source)
+        
+        def run(name):
+            if args.resume:
+                return interpreter.resume(args.resume)
+            return interpreter.execute_function(name, params)
         
         # Execute specific function or find exported function
         result = None
-        print(f"args.function : {args.function}")
+        log.debug("args.function : %s", args.function)
         if args.function:
             # Find the specified function
             func_to_execute = None
@@ -255,22 +549,31 @@ def main():
                 if func.name == args.function:
                     func_to_execute = func
                     break
-            print(f"func_to_execute : {func_to_execute}")
+            log.debug("func_to_execute : %s", func_to_execute)
             if func_to_execute:
                 try:
-                    result = interpreter.execute_function(func_to_execute.name, params)
+                    result = run(func_to_execute.name)
+                except ExecutionSuspended as e:
+                    log.warning("%s", e.message)
+                    sys.exit(1)
                 except Exception as e:
-                    print(f"Error executing function {args.function}: {e}")
+                    log.error("Error executing function %s: %s", args.function, e)
                     sys.exit(1)
             else:
-                print(f"Error: Function '{args.function}' not found")
+                log.error("Function '%s' not found", args.function)
                 sys.exit(1)
         else:
             # Execute with default behavior (exported function or first function)
             if ast.funcs:
-                
-                result = interpreter.execute_function(ast.funcs[0].name, params)
-            print("Result : " + str(type(result)))
+                try:
+                    result = run(ast.funcs[0].name)
+                except ExecutionSuspended as e:
+                    log.warning("%s", e.message)
+                    sys.exit(1)
+                except (OutOfFuel, DeadlineExceeded) as e:
+                    log.error("%s", e.message)
+                    sys.exit(1)
+            log.debug("Result : %s", type(result))
             
             # try:
             #     # result = interpreter.execute()
@@ -284,7 +587,7 @@ def main():
             output_data = {
                 "success": True,
                 "result": result,
-                "stack_size": len(interpreter.stack),
+                "stack_size": len(interpreter.operand_stack()),
                 "memory_size": len(interpreter.memory)
             }
             print(json.dumps(output_data, indent=2))
@@ -296,11 +599,15 @@ def main():
             
             # if verb_flag:
             # if True:
-            print(f"Final stack size: {len(interpreter.stack)}")
+            print(f"Final stack size: {len(interpreter.operand_stack())}")
             print(f"Memory size: {len(interpreter.memory)} bytes")
 
         
-        print("Interpreter stack : " + str(interpreter.stack))
+        if args.stats and hasattr(interpreter, 'statistics'):
+            print("\n=== STATISTICS ===")
+            print(interpreter.statistics())
+        
+        log.debug("Interpreter stack : %s", interpreter.operand_stack())
         print("✓ Interpretation completed")
 
         # result = interpret_ast(ast, True, True)
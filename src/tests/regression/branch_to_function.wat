@@ -0,0 +1,71 @@
+;; A branch whose depth equals the number of enclosing blocks targets the
+;; function body itself and returns the values on top of the stack, like
+;; `return`. br_if returns only when taken, and values left below the
+;; results are dropped.
+;; run: $br_body 3 -> 7
+;; run: $br_if_body 1 -> 7
+;; run: $br_if_body 0 -> 8
+;; run: $extra_below 4 -> 12
+;; run: $from_block 2 -> 2
+;; run: $from_block -2 -> -20
+;; run: $from_loop 10 -> 600
+;; run: $from_loop 4 -> 12
+(module
+  (func $br_body (param $x i32) (result i32)
+    (i32.const 7)
+    (br 0))
+  (func $br_if_body (param $x i32) (result i32)
+    (i32.const 7)
+    (local.get $x)
+    (br_if 0)
+    (i32.const 1)
+    (i32.add))
+  (func $extra_below (param $x i32) (result i32)
+    (i32.const 100)
+    (local.get $x)
+    (i32.const 3)
+    (i32.mul)
+    (br 0))
+  (func $from_block (param $x i32) (result i32)
+    (block $b
+      (local.get $x)
+      (local.get $x)
+      (i32.const 0)
+      (i32.gt_s)
+      (br_if 1)
+      (i32.const 10)
+      (i32.mul)
+      (br 1))
+    (i32.const -1))
+  (func $from_loop (param $n i32) (result i32)
+    (local $i i32)
+    loop $l
+      (local.get $i)
+      (i32.const 1)
+      (i32.add)
+      (local.set $i)
+      (local.get $i)
+      (i32.const 5)
+      (i32.gt_s)
+      if
+        (local.get $i)
+        (i32.const 100)
+        (i32.mul)
+        (br 2)
+      end
+      (local.get $n)
+      (local.get $i)
+      (i32.gt_s)
+      (br_if $l)
+      (local.get $i)
+      (i32.const 3)
+      (i32.mul)
+      (br 1)
+    end
+    (i32.const -1))
+  (export "br_body" (func $br_body))
+  (export "br_if_body" (func $br_if_body))
+  (export "extra_below" (func $extra_below))
+  (export "from_block" (func $from_block))
+  (export "from_loop" (func $from_loop))
+)
@@ -0,0 +1,61 @@
+;; Calls run on the tree walker's explicit frame stack: a return keeps only
+;; the declared results, the caller continues after a call, and recursion
+;; does not use the Python stack. $fib_calls overflows i32 like fib_imp.wat
+;; with -p 100, and every engine must agree on the wrapped result.
+;; run: $sum_to 200 -> 20100
+;; run: $after_call 5 -> 12
+;; run: $early 1 -> 2
+;; run: $early 0 -> 7
+;; run: $fib_calls 100 -> -1869596475
+;; run: $fib_calls 1 -> 1
+(module
+  (func $sum_to (param $n i32) (result i32)
+    (local.get $n)
+    (i32.const 1)
+    (i32.lt_s)
+    if
+      (i32.const 0)
+      (return)
+    end
+    (local.get $n)
+    (local.get $n)
+    (i32.const 1)
+    (i32.sub)
+    (call $sum_to)
+    (i32.add))
+  (func $three (result i32)
+    (i32.const 3))
+  (func $after_call (param $x i32) (result i32)
+    (call $three)
+    (i32.const 4)
+    (i32.add)
+    (local.get $x)
+    (i32.add))
+  (func $early (param $x i32) (result i32)
+    (i32.const 1)
+    (local.get $x)
+    if
+      (i32.const 2)
+      (return)
+    end
+    (i32.const 6)
+    (i32.add))
+  (func $plus (param $a i32) (param $b i32) (result i32)
+    (local.get $a) (local.get $b) (i32.add))
+  (func $fib_calls (param $n i32) (result i32)
+    (local $a i32) (local $b i32) (local $next i32)
+    (i32.const 1)
+    (local.set $b)
+    loop $loop
+      (local.get $a) (local.get $b) (call $plus) (local.set $next)
+      (local.get $b) (local.set $a)
+      (local.get $next) (local.set $b)
+      (local.get $n) (i32.const 1) (i32.sub) (local.set $n)
+      (local.get $n) (i32.const 0) (i32.gt_s) (br_if $loop)
+    end
+    (local.get $b))
+  (export "sum_to" (func $sum_to))
+  (export "after_call" (func $after_call))
+  (export "early" (func $early))
+  (export "fib_calls" (func $fib_calls))
+)
@@ -0,0 +1,60 @@
+;; "tree (resumed)" checkpoints these every 25 fuel units and continues
+;; from the last checkpoint in a fresh Interpreter. The checkpoint must
+;; hold memory, globals, nested frames and the labels of nested blocks and
+;; loops, and the resumed call must return what the whole call returned.
+;; run: $run 40 -> 7035190
+;; run: $run 7 -> 105025
+;; run: $depth 30 -> -405
+;; run: $trap_late 30 -> trap
+(module
+  (memory $m 1)
+  (global $calls i32 (i32.const 0))
+  (func $visit (param $i i32) (result i32)
+    (global.get $calls) (i32.const 1) (i32.add) (global.set $calls)
+    (local.get $i) (i32.const 4) (i32.mul)
+    (local.get $i) (i32.const 4) (i32.mul) (i32.load)
+    (local.get $i) (i32.add)
+    (i32.store)
+    (local.get $i) (i32.const 4) (i32.mul) (i32.load))
+  (func $run (param $n i32) (result i32)
+    (local $i i32) (local $j i32) (local $s i32)
+    loop $outer
+      (i32.const 0) (local.set $j)
+      (block $skip
+        loop $inner
+          (local.get $j) (local.get $i) (i32.gt_s) (br_if $skip)
+          (local.get $s) (local.get $j) (call $visit) (i32.add) (local.set $s)
+          (local.get $j) (i32.const 1) (i32.add) (local.set $j)
+          (local.get $j) (i32.const 5) (i32.lt_s) (br_if $inner)
+        end)
+      (local.get $i) (i32.const 1) (i32.add) (local.set $i)
+      (local.get $i) (local.get $n) (i32.lt_s) (br_if $outer)
+    end
+    (local.get $s) (i32.const 1000) (i32.mul)
+    (global.get $calls)
+    (i32.add))
+  (func $sum_down (param $n i32) (result i32)
+    (local.get $n)
+    (i32.const 1)
+    (i32.lt_s)
+    if
+      (i32.const 0)
+      (return)
+    end
+    (local.get $n) (call $visit)
+    (local.get $n) (i32.const 1) (i32.sub) (call $sum_down)
+    (i32.add))
+  (func $depth (param $n i32) (result i32)
+    (local.get $n) (call $sum_down)
+    (local.get $n) (call $sum_down)
+    (i32.sub)
+    (global.get $calls)
+    (i32.add))
+  (func $trap_late (param $n i32) (result i32)
+    (local.get $n) (call $sum_down)
+    (i32.const 0)
+    (i32.div_s))
+  (export "run" (func $run))
+  (export "depth" (func $depth))
+  (export "trap_late" (func $trap_late))
+)
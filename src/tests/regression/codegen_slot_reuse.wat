@@ -0,0 +1,20 @@
+;; A compare left pending on the codegen stack reads slot s1, which the
+;; constant sum below is written to: the compare must be evaluated first.
+;; run: $f 10 5 -> 300
+;; run: $f 5 10 -> 301
+(module
+  (func $f (param $a i32) (param $b i32) (result i32)
+    (local.get $a)
+    (i32.const 0)
+    (i32.add)
+    (local.get $b)
+    (i32.const 0)
+    (i32.add)
+    (i32.lt_s)
+    (i32.const 100)
+    (i32.const 200)
+    (i32.add)
+    (i32.add)
+  )
+  (export "f" (func $f))
+)
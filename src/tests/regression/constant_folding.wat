@@ -0,0 +1,65 @@
+;; Constant operands the optimizer folds at -O1 and up must fold to what the
+;; engines compute at -O0: wrapped sums and products, truncating division,
+;; unsigned compares of negative constants, and a division by zero that
+;; stays a trap at run time.
+;; changes: constant-folding
+;; run: $div_then_wrap -> 2147483645
+;; run: $wrapping -> -2147418113
+;; run: $unsigned -> 0
+;; run: $clz -> 31
+;; run: $zero_divisor -> trap
+;; run: $partial 5 -> -2147483644
+(module
+  (func $div_then_wrap (result i32)
+    (i32.const -7)
+    (i32.const 2)
+    (i32.div_s)
+    (i32.const 2147483647)
+    (i32.const 1)
+    (i32.add)
+    (i32.add))
+  (func $wrapping (result i32)
+    (i32.const 65536)
+    (i32.const 65537)
+    (i32.mul)
+    (i32.const -2147483648)
+    (i32.const 1)
+    (i32.sub)
+    (i32.add))
+  (func $unsigned (result i32)
+    (i32.const -1)
+    (i32.const 1)
+    (i32.lt_u)
+    (i32.const 1)
+    (i32.const -1)
+    (i32.ge_u)
+    (i32.const 10)
+    (i32.mul)
+    (i32.add))
+  (func $clz (result i32)
+    (i32.const 1)
+    (i32.clz)
+    (i32.const -1)
+    (i32.clz)
+    (i32.const 100)
+    (i32.mul)
+    (i32.add))
+  (func $zero_divisor (result i32)
+    (i32.const 5)
+    (i32.const 3)
+    (i32.const 3)
+    (i32.sub)
+    (i32.div_s))
+  (func $partial (param $x i32) (result i32)
+    (local.get $x)
+    (i32.const -2147483648)
+    (i32.const -1)
+    (i32.add)
+    (i32.add))
+  (export "div_then_wrap" (func $div_then_wrap))
+  (export "wrapping" (func $wrapping))
+  (export "unsigned" (func $unsigned))
+  (export "clz" (func $clz))
+  (export "zero_divisor" (func $zero_divisor))
+  (export "partial" (func $partial))
+)
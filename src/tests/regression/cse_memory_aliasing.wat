@@ -0,0 +1,79 @@
+;; Loads that -O2 cse reuses must be forgotten when a store may overwrite
+;; them: a store to an address only known at run time, to an address 4
+;; bytes away from a known one, or a call. A load after a store to the
+;; same address reads the stored value.
+;; changes: cse
+;; run: $same_or_other 8 8 -> 100111
+;; run: $same_or_other 8 12 -> 11022
+;; run: $same_or_other 8 9 -> 25636622
+;; run: $neighbours 2 -> 3375
+;; run: $neighbours 0 -> trap
+;; run: $forwarded 16 -5 -> 25
+;; run: $after_call 20 -> 1
+;; run: $globals 3 -> 34
+(module
+  (memory $m 1)
+  (global $g i32 (i32.const 0))
+  (func $fill (param $base i32)
+    (local.get $base) (i32.const 11) (i32.store)
+    (local.get $base) (i32.const 4) (i32.add) (i32.const 22) (i32.store)
+    (local.get $base) (i32.const 8) (i32.add) (i32.const 33) (i32.store))
+  (func $same_or_other (param $a i32) (param $b i32) (result i32)
+    (local.get $a) (call $fill)
+    (local.get $a) (i32.load)
+    (local.get $b) (i32.const 100) (i32.store)
+    (local.get $a) (i32.load)
+    (i32.const 1000) (i32.mul)
+    (i32.add)
+    (local.get $a) (i32.load)
+    (i32.add))
+  (func $neighbours (param $j i32) (result i32)
+    (i32.const 0) (call $fill)
+    (local.get $j) (i32.const 4) (i32.mul) (i32.load)
+    (local.get $j) (i32.const 1) (i32.add) (i32.const 4) (i32.mul) (i32.const 7) (i32.store)
+    (local.get $j) (i32.const 4) (i32.mul) (i32.load)
+    (i32.const 100) (i32.mul)
+    (i32.add)
+    (local.get $j) (i32.const 1) (i32.sub) (i32.const 4) (i32.mul) (i32.const 9) (i32.store)
+    (local.get $j) (i32.const 4) (i32.mul) (i32.load)
+    (i32.add)
+    (local.get $j) (i32.const 1) (i32.sub) (i32.const 4) (i32.mul) (i32.load)
+    (i32.add))
+  (func $forwarded (param $a i32) (param $v i32) (result i32)
+    (local.get $a) (local.get $v) (local.get $v) (i32.mul) (i32.store)
+    (local.get $a) (i32.load)
+    (local.get $a) (i32.load)
+    (i32.sub)
+    (local.get $a) (i32.load)
+    (i32.add))
+  (func $clobber (param $a i32)
+    ;; Recursive, so it is never inlined and cse sees the call
+    (local.get $a)
+    (i32.const 0)
+    (i32.lt_s)
+    if
+      (i32.const 0)
+      (call $clobber)
+      (return)
+    end
+    (local.get $a) (i32.const -1) (i32.store)
+    (i32.const 5) (global.set $g))
+  (func $after_call (param $a i32) (result i32)
+    (local.get $a) (call $fill)
+    (local.get $a) (i32.load)
+    (local.get $a) (call $clobber)
+    (local.get $a) (i32.load)
+    (i32.const 10) (i32.mul)
+    (i32.add))
+  (func $globals (param $x i32) (result i32)
+    (local.get $x) (global.set $g)
+    (global.get $g) (global.get $g) (i32.mul)
+    (i32.const 0) (call $clobber)
+    (global.get $g) (global.get $g) (i32.mul)
+    (i32.add))
+  (export "same_or_other" (func $same_or_other))
+  (export "neighbours" (func $neighbours))
+  (export "forwarded" (func $forwarded))
+  (export "after_call" (func $after_call))
+  (export "globals" (func $globals))
+)
@@ -0,0 +1,58 @@
+;; i32 arithmetic must give the same results on every engine and tier:
+;; wrapping add/sub/mul, truncating div_s, unsigned compares and clz. The
+;; tiered engine runs each call cold, in the tree walker, and promoted to
+;; the register tier at the first call or at the first loop entry.
+;; run: $add 2147483647 1 -> -2147483648
+;; run: $sub -2147483648 1 -> 2147483647
+;; run: $mul 65536 65537 -> 65536
+;; run: $div -7 2 -> -3
+;; run: $div 7 -2 -> -3
+;; run: $div 1 0 -> trap
+;; run: $lt_u -1 1 -> 0
+;; run: $lt_u 1 -1 -> 1
+;; run: $ge_u -1 1 -> 1
+;; run: $clz 1 -> 31
+;; run: $clz 0 -> 32
+;; run: $clz -1 -> 0
+;; run: $fib 100 -> -1869596475
+;; run: $fib 10 -> 89
+;; run: $fahrenheit 3 -> -16
+(module
+  (func $add (param $a i32) (param $b i32) (result i32)
+    (local.get $a) (local.get $b) (i32.add))
+  (func $sub (param $a i32) (param $b i32) (result i32)
+    (local.get $a) (local.get $b) (i32.sub))
+  (func $mul (param $a i32) (param $b i32) (result i32)
+    (local.get $a) (local.get $b) (i32.mul))
+  (func $div (param $a i32) (param $b i32) (result i32)
+    (local.get $a) (local.get $b) (i32.div_s))
+  (func $lt_u (param $a i32) (param $b i32) (result i32)
+    (local.get $a) (local.get $b) (i32.lt_u))
+  (func $ge_u (param $a i32) (param $b i32) (result i32)
+    (local.get $a) (local.get $b) (i32.ge_u))
+  (func $clz (param $a i32) (result i32)
+    (local.get $a) (i32.clz))
+  (func $fib (param $n i32) (result i32)
+    (local $a i32) (local $b i32) (local $next i32)
+    (i32.const 1)
+    (local.set $b)
+    loop $loop
+      (local.get $a) (local.get $b) (i32.add) (local.set $next)
+      (local.get $b) (local.set $a)
+      (local.get $next) (local.set $b)
+      (local.get $n) (i32.const 1) (i32.sub) (local.set $n)
+      (local.get $n) (i32.const 0) (i32.gt_s) (br_if $loop)
+    end
+    (local.get $b))
+  (func $fahrenheit (param $f i32) (result i32)
+    (local.get $f) (i32.const 32) (i32.sub) (i32.const 5) (i32.mul) (i32.const 9) (i32.div_s))
+  (export "add" (func $add))
+  (export "sub" (func $sub))
+  (export "mul" (func $mul))
+  (export "div" (func $div))
+  (export "lt_u" (func $lt_u))
+  (export "ge_u" (func $ge_u))
+  (export "clz" (func $clz))
+  (export "fib" (func $fib))
+  (export "fahrenheit" (func $fahrenheit))
+)
@@ -0,0 +1,74 @@
+;; Callees that -O2 inlines into a block: an early `return` becomes a
+;; branch out of the block, with the caller's own values still on the
+;; stack below the call. The callee's locals are zeroed at every call
+;; site, also in a loop.
+;; changes: inline
+;; run: $caller 5 -> 1035
+;; run: $caller -5 -> 1000
+;; run: $caller 0 -> 1000
+;; run: $nested 3 -> 97
+;; run: $nested 50 -> 100
+;; run: $nested -1 -> 100
+;; run: $in_loop 6 -> 15
+(module
+  (func $clamp (param $x i32) (result i32)
+    (local.get $x)
+    (i32.const 0)
+    (i32.lt_s)
+    if
+      (i32.const 0)
+      (return)
+    end
+    (local.get $x)
+    (i32.const 10)
+    (i32.gt_s)
+    if
+      (i32.const 10)
+      (return)
+    end
+    (local.get $x))
+  (func $caller (param $x i32) (result i32)
+    (i32.const 1000)
+    (local.get $x)
+    (call $clamp)
+    (i32.const 7)
+    (i32.mul)
+    (i32.add))
+  (func $first_big (param $x i32) (result i32)
+    (local $k i32)
+    (block $done
+      (loop $l
+        (local.get $k) (local.get $x) (i32.mul) (i32.const 20) (i32.gt_s)
+        if
+          (local.get $k)
+          (return)
+        end
+        (local.get $k) (i32.const 1) (i32.add) (local.set $k)
+        (local.get $k) (i32.const 8) (i32.lt_s) (br_if $l)))
+    (i32.const -1))
+  (func $nested (param $x i32) (result i32)
+    (i32.const 100)
+    (local.get $x)
+    (call $first_big)
+    (i32.sub)
+    (local.get $x)
+    (i32.const 2)
+    (i32.mul)
+    (call $first_big)
+    (i32.add))
+  (func $counter (param $x i32) (result i32)
+    (local $acc i32)
+    (local.get $acc) (local.get $x) (i32.add) (local.set $acc)
+    (local.get $acc))
+  (func $in_loop (param $n i32) (result i32)
+    (local $i i32) (local $s i32)
+    loop $l
+      (local.get $s) (local.get $i) (call $counter) (i32.add) (local.set $s)
+      (local.get $i) (i32.const 1) (i32.add) (local.set $i)
+      (local.get $i) (local.get $n) (i32.lt_s) (br_if $l)
+    end
+    (local.get $s))
+  (export "caller" (func $caller))
+  (export "nested" (func $nested))
+  (export "in_loop" (func $in_loop))
+)
@@ -0,0 +1,39 @@
+;; Stored values are i32 and out-of-bounds accesses trap, also in the
+;; trusted (--unchecked) tree walker, which skips the stack checks and the
+;; per-instruction error wrapping.
+;; run: $store_sum 2147483647 -> -2
+;; run: $store_sum -5 -> -10
+;; run: $store_at 65532 7 -> 7
+;; run: $store_at 65533 7 -> trap
+;; run: $store_at -4 7 -> trap
+;; run: $load_at 65536 -> trap
+;; run: $div_at 0 -> trap
+(module
+  (memory $m 1)
+  (func $store_sum (param $a i32) (result i32)
+    (i32.const 0)
+    (local.get $a)
+    (local.get $a)
+    (i32.add)
+    (i32.store)
+    (i32.const 0)
+    (i32.load))
+  (func $store_at (param $addr i32) (param $v i32) (result i32)
+    (local.get $addr)
+    (local.get $v)
+    (i32.store)
+    (local.get $addr)
+    (i32.load))
+  (func $load_at (param $addr i32) (result i32)
+    (local.get $addr)
+    (i32.load))
+  (func $div_at (param $addr i32) (result i32)
+    (i32.const 10)
+    (local.get $addr)
+    (i32.load)
+    (i32.div_s))
+  (export "store_sum" (func $store_sum))
+  (export "store_at" (func $store_at))
+  (export "load_at" (func $load_at))
+  (export "div_at" (func $div_at))
+)
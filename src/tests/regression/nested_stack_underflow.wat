@@ -0,0 +1,40 @@
+;; The Validator only checks the top level of a function body, so an
+;; underflow nested in a block, loop or if passes it. The checked engines
+;; trap on it, and "tree (unchecked)" must refuse the module instead of
+;; popping the caller's values and the params.
+;; run: $in_block 5 -> trap
+;; run: $in_loop 5 -> trap
+;; run: $in_if 1 -> trap
+;; run: $caller 5 -> trap
+(module
+  (func $in_block (param $x i32) (result i32)
+    (local $y i32)
+    (block $b
+      (i32.add)
+      (local.set $y))
+    (local.get $x))
+  (func $in_loop (param $x i32) (result i32)
+    loop $l
+      (local.get $x)
+      (i32.add)
+      (local.set $x)
+    end
+    (local.get $x))
+  (func $in_if (param $x i32) (result i32)
+    (local.get $x)
+    if
+      (i32.const 3)
+      (i32.mul)
+      (local.set $x)
+    end
+    (local.get $x))
+  (func $caller (param $x i32) (result i32)
+    (i32.const 100)
+    (local.get $x)
+    (call $in_block)
+    (i32.add))
+  (export "in_block" (func $in_block))
+  (export "in_loop" (func $in_loop))
+  (export "in_if" (func $in_if))
+  (export "caller" (func $caller))
+)
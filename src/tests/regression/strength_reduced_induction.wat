@@ -0,0 +1,88 @@
+;; Multiplications of induction variables by a constant that -O2
+;; strength-reduction turns into additions in the loop: a stencil reading
+;; (i-1)*4, i*4 and (i+1)*4, a step of 2, a countdown with a negative
+;; factor, and products that wrap around the i32 range.
+;; changes: strength-reduction
+;; run: $stencil 20 -> 3426
+;; run: $stencil 3 -> -8
+;; run: $step_two 17 -> 116334
+;; run: $countdown 9 -> -1620
+;; run: $countdown -4 -> 149
+;; run: $wrapping 12 -> 767205658
+(module
+  (memory $m 1)
+  (func $stencil (param $n i32) (result i32)
+    (local $i i32) (local $s i32)
+    (i32.const 0) (local.set $i)
+    loop $fill
+      (local.get $i) (i32.const 4) (i32.mul)
+      (local.get $i) (local.get $i) (i32.mul) (i32.const 3) (i32.sub)
+      (i32.store)
+      (local.get $i) (i32.const 1) (i32.add) (local.set $i)
+      (local.get $i) (local.get $n) (i32.lt_s) (br_if $fill)
+    end
+    (i32.const 1) (local.set $i)
+    loop $sum
+      (local.get $s)
+      (local.get $i) (i32.const 1) (i32.sub) (i32.const 4) (i32.mul) (i32.load)
+      (local.get $i) (i32.const 4) (i32.mul) (i32.load) (i32.const 2) (i32.mul)
+      (i32.add)
+      (local.get $i) (i32.const 1) (i32.add) (i32.const 4) (i32.mul) (i32.load)
+      (i32.sub)
+      (i32.add)
+      (local.set $s)
+      (local.get $i) (i32.const 1) (i32.add) (local.set $i)
+      (local.get $i) (local.get $n) (i32.const 1) (i32.sub) (i32.lt_s) (br_if $sum)
+    end
+    (local.get $s))
+  (func $step_two (param $n i32) (result i32)
+    (local $i i32) (local $s i32)
+    loop $l
+      (local.get $s)
+      (local.get $i) (i32.const 12) (i32.mul)
+      (local.get $i) (i32.const 12) (i32.mul)
+      (i32.mul)
+      (i32.add)
+      (local.get $i) (i32.const 3) (i32.add) (i32.const 12) (i32.mul)
+      (i32.sub)
+      (local.set $s)
+      (local.get $i) (i32.const 2) (i32.add) (local.set $i)
+      (local.get $i) (local.get $n) (i32.lt_s) (br_if $l)
+    end
+    (local.get $s) (local.get $i) (i32.add))
+  (func $countdown (param $n i32) (result i32)
+    (local $s i32)
+    loop $l
+      (local.get $s)
+      (local.get $n) (i32.const -6) (i32.mul)
+      (i32.add)
+      (local.get $n) (i32.const -6) (i32.mul)
+      (i32.const 5) (i32.mul)
+      (i32.add)
+      (local.set $s)
+      (local.get $n) (i32.const 1) (i32.sub) (local.set $n)
+      (local.get $n) (i32.const 0) (i32.gt_s) (br_if $l)
+    end
+    (local.get $s) (local.get $n) (i32.sub))
+  (func $wrapping (param $n i32) (result i32)
+    (local $i i32) (local $s i32)
+    (i32.const 2147483000) (local.set $i)
+    loop $l
+      (local.get $s)
+      (local.get $i) (i32.const 1000000007) (i32.mul)
+      (i32.add)
+      (local.get $i) (i32.const 1) (i32.add) (i32.const 1000000007) (i32.mul)
+      (i32.add)
+      (local.get $i) (i32.const -1) (i32.add) (i32.const 1000000007) (i32.mul)
+      (i32.sub)
+      (local.set $s)
+      (local.get $i) (i32.const 97) (i32.add) (local.set $i)
+      (local.get $n) (i32.const 1) (i32.sub) (local.set $n)
+      (local.get $n) (i32.const 0) (i32.gt_s) (br_if $l)
+    end
+    (local.get $s) (local.get $i) (i32.add))
+  (export "stencil" (func $stencil))
+  (export "step_two" (func $step_two))
+  (export "countdown" (func $countdown))
+  (export "wrapping" (func $wrapping))
+)
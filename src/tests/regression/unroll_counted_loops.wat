@@ -0,0 +1,73 @@
+;; Counted loops that -O3 unrolls by 4, with a remainder loop. Bounds near
+;; INT_MIN/INT_MAX/UINT_MAX move the limit past the i32 range, so it is
+;; clamped and only the remainder loop runs. Negative bounds and starts
+;; past the bound run the body once.
+;; changes: unroll
+;; run: $up 10 0 -> 6
+;; run: $up 2147483647 2147483620 -> -143
+;; run: $up -2147483640 -2147483648 -> 0
+;; run: $up -5 -20 -> -65
+;; run: $up 3 7 -> -3
+;; run: $upu -1 -5 -> -1933
+;; run: $upu 2 0 -> -1
+;; run: $upu 0 -3 -> -1
+;; run: $upu 11 1 -> 54925730
+;; run: $down -2147483647 -2147483640 -> -2147483364
+;; run: $down 2147483645 2147483647 -> 2
+;; run: $down -10 10 -> 265736
+;; run: $down 10 -10 -> 2
+;; run: $const 0 -> 610339
+;; run: $const 9 -> -1
+;; run: $const 25 -> -1
+;; run: $const -7 -> 1029861639
+;; run: $early 100 0 -> 45
+;; run: $early 6 0 -> 9
+;; run: $early -3 -8 -> -27
+(module
+  (func $up (param $n i32) (param $i i32) (result i32)
+    (local $s i32)
+    loop $l
+      (local.get $s) (local.get $i) (i32.add) (local.set $s)
+      (local.get $i) (i32.const 3) (i32.add) (local.set $i)
+      (local.get $i) (local.get $n) (i32.lt_s) (br_if $l)
+    end
+    (local.get $s) (local.get $i) (i32.sub))
+  (func $upu (param $n i32) (param $i i32) (result i32)
+    (local $s i32)
+    loop $l
+      (local.get $s) (i32.const 7) (i32.mul) (local.get $i) (i32.add) (local.set $s)
+      (local.get $i) (i32.const 1) (i32.add) (local.set $i)
+      (local.get $i) (local.get $n) (i32.lt_u) (br_if $l)
+    end
+    (local.get $s) (local.get $i) (i32.sub))
+  (func $down (param $n i32) (param $i i32) (result i32)
+    (local $s i32)
+    loop $l
+      (local.get $s) (i32.const 3) (i32.mul) (local.get $i) (i32.add) (local.set $s)
+      (local.get $i) (i32.const 2) (i32.sub) (local.set $i)
+      (local.get $i) (local.get $n) (i32.gt_s) (br_if $l)
+    end
+    (local.get $s) (local.get $i) (i32.sub))
+  (func $const (param $i i32) (result i32)
+    (local $s i32)
+    loop $l
+      (local.get $s) (i32.const 5) (i32.mul) (local.get $i) (i32.add) (local.set $s)
+      (i32.const 1) (local.get $i) (i32.add) (local.set $i)
+      (local.get $i) (i32.const 10) (i32.lt_s) (br_if $l)
+    end
+    (local.get $s) (local.get $i) (i32.sub))
+  (func $early (param $n i32) (param $i i32) (result i32)
+    (local $s i32)
+    (block $out
+      (loop $l
+        (local.get $s) (local.get $i) (i32.add) (local.set $s)
+        (local.get $s) (i32.const 50) (i32.gt_s) (br_if $out)
+        (local.get $i) (i32.const 1) (i32.add) (local.set $i)
+        (local.get $i) (local.get $n) (i32.lt_s) (br_if $l)))
+    (local.get $s) (local.get $i) (i32.sub))
+  (export "up" (func $up))
+  (export "upu" (func $upu))
+  (export "down" (func $down))
+  (export "const" (func $const))
+  (export "early" (func $early))
+)